@@ -33,7 +33,10 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--object-size', type=int, required=False)
         parser.add_argument('--object-number', type=int, required=False)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--presigned', action="store_true")
+        parser.add_argument('--url-workers', type=int, default=None)
         parser.add_argument('--warmup-sleep', type=int, default=0)
         parser.add_argument('--concurrency', type=int, default=1)
         parser.add_argument('--timelimit', type=int, default=30)
@@ -42,6 +45,8 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--source-address', required=False)
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
 
     def parse_ab(self, stdout):
         raw_data = dict([
@@ -105,7 +110,7 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
                     self.errors.append(err)
 
         self.sleep(self.params['warmup_sleep'])
-        self.total_time = self.timeit(download_objets, urls=self.urls)[0]
+        self.total_time = utils.timeit(download_objets, urls=self.urls)[0]
 
     def tear_down(self):
         self.driver.clean_bucket(bucket_id=self.bucket['id'])
@@ -0,0 +1,76 @@
+"""
+Search of transfer parameters maximizing throughput.
+
+Parameters are tuned one at a time (coordinate search): each candidate
+value of a parameter is probed while the others stay fixed, the best one
+is kept, and the next parameter is tuned. Passes are repeated until the
+configuration stops changing or ``rounds`` is reached.
+"""
+import logging
+
+AUTOTUNE_CHUNKSIZES = (8*2**20, 16*2**20, 32*2**20, 64*2**20)
+AUTOTUNE_CONCURRENCIES = (1, 2, 4, 8, 16)
+AUTOTUNE_ROUNDS = 2
+AUTOTUNE_SAMPLES = 2
+AUTOTUNE_MAX_ERROR_RATE = .1
+
+logger = logging.getLogger('osb.autotune')
+
+
+def parse_int_list(value):
+    """Argparse type for comma separated integers"""
+    return tuple(int(i) for i in value.split(',') if i)
+
+
+def tune(probe, candidates, initial, rounds=AUTOTUNE_ROUNDS, max_error_rate=AUTOTUNE_MAX_ERROR_RATE):
+    """
+    Find the configuration maximizing throughput.
+
+    :param probe: Function called with a configuration as keyword
+                  arguments, returning throughput and error rate
+    :type probe: callable
+    :param candidates: Candidate values by parameter name
+    :type candidates: dict
+    :param initial: Starting configuration
+    :type initial: dict
+    :param max_error_rate: Configurations with a higher error rate are
+                           never selected
+
+    :returns: Best configuration and trials as list of
+              ``(config, throughput, error_rate)``
+    :rtype: tuple
+    """
+    config = dict(initial)
+    results = {}
+    trials = []
+
+    def evaluate(config):
+        key = tuple(sorted(config.items()))
+        if key not in results:
+            throughput, error_rate = probe(**config)
+            logger.info("Probed %s: %.2fMB/s, %.0f%% errors",
+                        config, throughput / 2**20, error_rate * 100)
+            results[key] = (throughput, error_rate)
+            trials.append((dict(config), throughput, error_rate))
+        throughput, error_rate = results[key]
+        if error_rate > max_error_rate:
+            return -1
+        return throughput
+
+    best_score = evaluate(config)
+    for round_ in range(rounds):
+        previous = dict(config)
+        for name, values in candidates.items():
+            for value in values:
+                candidate = dict(config, **{name: value})
+                score = evaluate(candidate)
+                if score > best_score:
+                    best_score = score
+                    config = candidate
+        if config == previous:
+            break
+    if best_score < 0:
+        logger.warning("No configuration under %s error rate, keeping %s",
+                       max_error_rate, initial)
+        return dict(initial), trials
+    return config, trials
@@ -3,37 +3,23 @@ import os
 import logging
 import time
 import socket
+import threading
 from urllib.parse import urlparse
 import statistics
 
-import asyncio
-from concurrent.futures._base import TimeoutError as AsyncTimeoutError
 from concurrent.futures import ThreadPoolExecutor
-try:
-    import aiohttp
-except ImportError:
-    aiohttp = None
-try:
-    from probes import ProbeManager
-    has_probes = True
-except ImportError:
-    has_probes = False
-
-from os_benchmark import utils
+
+from os_benchmark import utils, manifest
+from os_benchmark.drivers import base as driver_base
 from os_benchmark.drivers import errors as driver_errors
+from os_benchmark.drivers import timing
+from os_benchmark.benchmarks import sampling
 
 
 MULTIPART_THREHOLD = 64 * 2**20
 MULTIPART_CHUNKSIZE = 8 * 2**20
 MAX_CONCURRENCY = os.cpu_count() * 2
 
-if aiohttp is not None:
-    ASYNC_TIMEOUT_ERRORS = (
-        asyncio.TimeoutError,
-        AsyncTimeoutError,
-        aiohttp.client_exceptions.ServerTimeoutError
-    )
-
 DEFAULT_PORTS = {
     'http': 80,
     'https': 443,
@@ -59,11 +45,31 @@ class BaseBenchmark:
         self.driver = driver
         self.logger = logging.getLogger('osb')
         self.params = {}
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self.setup_time = None
+        self.clock = utils.Clock()
+        self.timestamps = []
+        self._name_generator = None
+        self._name_generator_lock = threading.Lock()
+        # A driver may be reused by several benchmarks
+        self._auth_offset = len(getattr(driver, 'auth_timings', None) or [])
 
     def set_params(self, **kwargs):
         """Set test parameters"""
         self.params.update(kwargs)
 
+    @property
+    def name_generator(self):
+        """Object names generator of the run"""
+        with self._name_generator_lock:
+            if self._name_generator is None:
+                self._name_generator = utils.KeyLayout(
+                    layout=self.params.get('key_layout') or 'random',
+                    prefix=self.params.get('object_prefix'),
+                )
+            return self._name_generator
+
     def sleep(self, delay):
         """Shortcut for time.sleep"""
         time.sleep(delay)
@@ -99,10 +105,113 @@ class BaseBenchmark:
             stats[key] = value
         return stats
 
+    def _make_stream_stats(self, results):
+        """Aggregate download stream measurements"""
+        stats = {}
+        results = [r for r in results if r]
+        if not results:
+            return stats
+        stats.update(self._make_aggr([r['ttfb'] for r in results], 'ttfb'))
+        bws = [r['throughput'] / 2**20 for r in results if r['throughput'] is not None]
+        stats.update(self._make_aggr(bws, 'stream_bw'))
+        stats['stalls'] = sum([r['stalls'] for r in results])
+        stats['stall_time'] = sum([r['stall_time'] for r in results])
+        return stats
+
+    def _make_setup_stats(self):
+        """Time spent preparing the benchmark, before the measured phase"""
+        stats = {}
+        if self.params.get('key_layout'):
+            stats['key_layout'] = self.params['key_layout']
+        if self.setup_time is not None:
+            stats['setup_time'] = self.setup_time
+        if getattr(self, 'presign_time', None) is not None:
+            stats['presign_time'] = self.presign_time
+        return stats
+
+    def _make_driver_stats(self):
+        """Aggregate measurements collected by the driver"""
+        stats = {}
+        phase_timings = getattr(self.driver, 'phase_timings', None)
+        if phase_timings is not None:
+            for phase in timing.PHASES:
+                values = phase_timings.get_values(phase)
+                stats.update(self._make_aggr(values, 'http_%s' % phase))
+        auth_timings = (getattr(self.driver, 'auth_timings', None) or [])[self._auth_offset:]
+        if auth_timings:
+            stats['auth_time'] = sum([t['time'] for t in auth_timings])
+            stats['auth_cached'] = int(all([t['cached'] for t in auth_timings]))
+        if hasattr(self.driver, 'get_stats'):
+            stats.update(self.driver.get_stats())
+        return stats
+
+    def reset_driver_stats(self):
+        """Forget driver measurements made before the benchmark run"""
+        phase_timings = getattr(self.driver, 'phase_timings', None)
+        if phase_timings is not None:
+            phase_timings.clear()
+        if hasattr(self.driver, 'reset_stats'):
+            self.driver.reset_stats()
+
     def timeit(self, *args, **kwargs):
-        return utils.timeit(*args, **kwargs)
+        with self._in_flight_lock:
+            self.in_flight += 1
+        try:
+            return utils.timeit(*args, **kwargs)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+
+    async def async_timeit(self, *args, **kwargs):
+        with self._in_flight_lock:
+            self.in_flight += 1
+        try:
+            return await utils.async_timeit(*args, **kwargs)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+
+    def time_operation(self, *args, **kwargs):
+        """
+        Time an operation like :meth:`timeit`, keeping its start,
+        first byte and end timestamps in :attr:`timestamps`.
+        """
+        with self._in_flight_lock:
+            self.in_flight += 1
+        try:
+            timestamps, output = utils.time_operation(*args, **kwargs)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+        self.timestamps.append(timestamps)
+        return timestamps.elapsed, output
+
+    async def async_time_operation(self, *args, **kwargs):
+        with self._in_flight_lock:
+            self.in_flight += 1
+        try:
+            timestamps, output = await utils.async_time_operation(*args, **kwargs)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+        self.timestamps.append(timestamps)
+        return timestamps.elapsed, output
+
+    def get_timestamps(self):
+        """
+        :returns: Operation timestamps as epoch nanoseconds
+        :rtype: list
+        """
+        to_wall_ns = self.clock.to_wall_ns
+        return [{
+            'start': to_wall_ns(t.start),
+            'first_byte': to_wall_ns(t.first_byte) if t.first_byte is not None else None,
+            'end': to_wall_ns(t.end),
+        } for t in self.timestamps]
 
     def start_monitoring(self, probers, interval=5):
+        # Optional and only needed with --enable-monitoring
+        from probes import ProbeManager
         if not probers:
             probers = [
                 'probes.probers.system.CpuProber',
@@ -121,8 +230,30 @@ class BaseBenchmark:
     def get_monitoring_results(self):
         return self.probe_manager.get_results()
 
+    def start_sampling(self, interval=None, callbacks=None):
+        self.sampler = sampling.Sampler(
+            benchmark=self,
+            interval=interval,
+            callbacks=callbacks,
+        )
+        self.sampler.start()
+
+    def stop_sampling(self):
+        self.sampler.stop()
+        for callback in self.sampler.callbacks:
+            if hasattr(callback, 'close'):
+                callback.close()
+
+    def get_sampling_results(self):
+        return self.sampler.results
+
 
 class BaseSetupObjectsBenchmark(BaseBenchmark):
+    @property
+    def need_urls(self):
+        """Objects are downloaded by URL, not through the driver's SDK"""
+        return not self.params.get('sdk_download')
+
     def _create_bucket(self, name=None):
         bucket_name = name or utils.get_random_name(
             size=self.params.get('bucket_name_size', 30),
@@ -158,22 +289,82 @@ class BaseSetupObjectsBenchmark(BaseBenchmark):
         self.storage_class = self.params.get('storage_class') or \
             self.bucket.get('storage_class')
 
+        if self._load_manifest_cache():
+            return
         self.objects = self.driver.list_objects(bucket_id=self.bucket_id)
         if not self.objects:
             self.logger.info("Bucket %s is empty, creating %s objects of %sB", self.bucket_id, self.params['object_number'], self.params['object_size'])
             self._create_objects()
             self.objects = self.driver.list_objects(bucket_id=self.bucket_id)
 
-        for obj_name in self.objects:
-            self.urls.append(self.driver.get_url(
-                bucket_id=self.bucket_id,
-                name=obj_name,
-                bucket_name=self.bucket.get('name', self.bucket_id),
-                presigned=self.params['presigned']
-            ))
+    @property
+    def manifest_cache_path(self):
+        return manifest.get_cache_path(self.driver, self.params['bucket_id'])
+
+    def _load_manifest_cache(self):
+        """
+        Get objects and URLs from the cached manifest of the reused bucket.
+
+        :returns: ``True`` if objects have been loaded
+        :rtype: bool
+        """
+        if self.params.get('refresh_manifest'):
+            manifest.remove_cache(self.manifest_cache_path)
+            return False
+        header, entries = manifest.read_cache(self.manifest_cache_path)
+        if header is None or not entries:
+            return False
+        if header.get('bucket') != manifest.to_json(self.bucket):
+            self.logger.info("Bucket %s changed, ignoring cached manifest", self.bucket_id)
+            manifest.remove_cache(self.manifest_cache_path)
+            return False
+        if not manifest.check_cache_entries(self.driver, self.bucket_id, entries):
+            self.logger.info("Objects of bucket %s changed, ignoring cached manifest", self.bucket_id)
+            manifest.remove_cache(self.manifest_cache_path)
+            return False
+
+        self.logger.debug("Reuse cached manifest of %s objects", len(entries))
+        self.manifest_created = header['created']
+        self.objects = [e['name'] for e in entries]
+        self.object_sizes = {e['name']: e.get('size') for e in entries}
+        # URLs are reusable only if still valid for the whole benchmark
+        min_expires = time.time() + driver_base.URL_CACHE_MIN_TTL
+        urls_valid = header.get('presigned') == self.params.get('presigned') and all(
+            e.get('url') and (e.get('url_expires') is None or e['url_expires'] > min_expires)
+            for e in entries
+        )
+        if urls_valid:
+            self.urls = [e['url'] for e in entries]
+            self.url_expires = {e['name']: e.get('url_expires') for e in entries}
+            self.presign_time = 0
+        return True
+
+    def _write_manifest_cache(self):
+        """Cache objects and URLs of the reused bucket"""
+        url_expires = None
+        if self.params.get('presigned'):
+            url_expires = time.time() + self.driver.presigned_url_expiration
+        urls = self.urls or [None] * len(self.objects)
+        # URLs and objects from the cache keep their original expiration
+        entries = [{
+            'name': name,
+            'size': self.object_sizes.get(name, self.params.get('object_size')),
+            'url': url,
+            'url_expires': self.url_expires.get(name, url_expires) if url else None,
+        } for name, url in zip(self.objects, urls)]
+        header = {
+            'bucket': manifest.to_json(self.bucket),
+            'presigned': self.params.get('presigned'),
+        }
+        if self.manifest_created is not None:
+            header['created'] = self.manifest_created
+        try:
+            manifest.write_cache(self.manifest_cache_path, header, entries)
+        except OSError as err:
+            self.logger.warning("Cannot cache manifest: %s", err)
 
     def _make_upload(self):
-        name = utils.get_random_name(prefix=self.params.get('object_prefix'))
+        name = self.name_generator()
         content = utils.get_random_content(self.params['object_size'])
 
         self.logger.debug("Uploading object '%s'", name)
@@ -197,33 +388,52 @@ class BaseSetupObjectsBenchmark(BaseBenchmark):
             self.logger.warning("Error during file uploading, tearing down the environment: %s", err)
             raise
         self.objects.append(obj['name'])
-        self.urls.append(self.driver.get_url(
+
+    def _get_urls(self):
+        """Get URLs of all objects"""
+        self.logger.debug("Getting %s URLs", len(self.objects))
+        return self.driver.get_urls(
             bucket_id=self.bucket_id,
-            name=obj['name'],
+            names=self.objects,
+            max_workers=self.params.get('url_workers'),
             bucket_name=self.bucket.get('name', self.bucket_id),
-            presigned=self.params['presigned']
-        ))
+            presigned=self.params['presigned'],
+        )
 
     def setup(self):
         self.logger.debug("Bench params '%s'", self.params)
         self.timings = []
         self.errors = []
         self.objects = []
+        self.object_sizes = {}
 
         self.urls = []
+        self.url_expires = {}
+        self.manifest_created = None
+        self.presign_time = None
 
+        bucket_reused = False
         # Re-use bucket
         if self.params.get('bucket_id'):
             try:
                 self._reuse_bucket()
-                return
+                bucket_reused = True
             except driver_errors.DriverBucketUnfoundError:
                 self.logger.warning("Bucket %s not found", self.bucket_id)
         # Or create
-        self._create_bucket(name=self.params.get('bucket_id'))
+        if not bucket_reused:
+            self._create_bucket(name=self.params.get('bucket_id'))
+
+        if self.need_urls and not self.urls:
+            self.presign_time, self.urls = utils.timeit(self._get_urls)
+
+        if self.params.get('bucket_id') and self.params.get('keep_objects'):
+            self._write_manifest_cache()
 
     def tear_down(self):
         if not self.params.get('keep_objects'):
+            if self.params.get('bucket_id'):
+                manifest.remove_cache(self.manifest_cache_path)
             try:
                 self.driver.clean_bucket(bucket_id=self.bucket['id'])
             except driver_errors.DriverNonEmptyBucketError as err:
@@ -1,9 +1,11 @@
-from os_benchmark import utils
+from os_benchmark import utils, errors
 from . import base
 
 
 class Benchmark(base.BaseSetupObjectsBenchmark):
     """Time objects copy"""
+    need_urls = False
+
     @staticmethod
     def make_parser_args(parser):
         parser.add_argument('--storage-class', required=False)
@@ -12,6 +14,8 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--object-size', type=int, required=False)
         parser.add_argument('--object-number', type=int, required=False)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
         parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         parser.add_argument('--max-concurrency', type=int, default=base.MAX_CONCURRENCY)
@@ -19,6 +23,8 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--presigned', action="store_true")
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
 
     def setup(self):
         super().setup()
@@ -40,18 +46,18 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         def copy_objets(objs):
             for obj in objs:
                 try:
-                    elapsed = self.timeit(
+                    elapsed = self.time_operation(
                         self.driver.copy_object,
                         bucket_id=self.bucket_id,
-                        name=obj['name'],
+                        name=obj,
                         dst_bucket_id=self.dst_bucket_id,
-                        dst_name=obj['name'],
+                        dst_name=obj,
                     )[0]
                     self.timings.append(elapsed)
                 except errors.InvalidHttpCode as err:
                     self.errors.append(err)
 
-        self.total_time = self.timeit(copy_objets, objs=self.objects)[0]
+        self.total_time = utils.timeit(copy_objets, objs=self.objects)[0]
 
     def make_stats(self):
         count = len(self.timings)
@@ -83,6 +89,8 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
             'warmup_sleep': self.params['warmup_sleep'],
         }
         stats.update(self._make_aggr(self.timings))
+        stats.update(self._make_driver_stats())
+        stats.update(self._make_setup_stats())
         if error_count:
             error_codes = set([e for e in self.errors])
             stats.update({'error_count_%s' % e.args[1]: 0 for e in self.errors})
@@ -1,6 +1,7 @@
 from concurrent.futures import ThreadPoolExecutor
 from os_benchmark import utils
 from os_benchmark import errors
+from os_benchmark.drivers import errors as driver_errors
 from . import base
 
 
@@ -14,38 +15,76 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--object-size', type=int, required=False)
         parser.add_argument('--object-number', type=int, required=False)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
         parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         parser.add_argument('--max-concurrency', type=int, default=base.MAX_CONCURRENCY)
         parser.add_argument('--warmup-sleep', type=int, default=0)
         parser.add_argument('--presigned', action="store_true")
+        parser.add_argument('--url-workers', type=int, default=None)
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
         parser.add_argument('--parallel-objects', type=int, default=1)
+        parser.add_argument('--stall-threshold', type=float, default=None)
+        parser.add_argument('--sdk-download', action="store_true",
+                            help="Download objects with the driver's SDK instead of their URL.")
+        parser.add_argument('--sdk-ranged', action="store_true",
+                            help="With --sdk-download, use concurrent ranged requests.")
 
     def run(self, **kwargs):
+        self.stream_results = []
+
         def download_objet(url):
             try:
-                elapsed = self.timeit(
+                elapsed, result = self.time_operation(
                     self.driver.download,
                     url=url,
-                )[0]
+                    stall_threshold=self.params.get('stall_threshold'),
+                )
+                self.timings.append(elapsed)
+                self.stream_results.append(result)
+            except (errors.InvalidHttpCode, driver_errors.DriverError) as err:
+                self.logger.error(err)
+                self.errors.append(err)
+
+        def sdk_download_object(name):
+            try:
+                elapsed, result = self.time_operation(
+                    self.driver.download_object,
+                    bucket_id=self.bucket_id,
+                    name=name,
+                    stall_threshold=self.params.get('stall_threshold'),
+                    ranged=self.params.get('sdk_ranged'),
+                    size=self.params.get('object_size'),
+                    multipart_threshold=self.params.get('multipart_threshold'),
+                    multipart_chunksize=self.params.get('multipart_chunksize'),
+                    max_concurrency=self.params.get('max_concurrency'),
+                )
                 self.timings.append(elapsed)
-            except errors.InvalidHttpCode as err:
+                self.stream_results.append(result)
+            except driver_errors.DriverError as err:
+                self.logger.error(err)
                 self.errors.append(err)
 
-        def download_objets(urls):
+        def download_objets(targets, download_func):
             futures = []
             with ThreadPoolExecutor(max_workers=self.params['parallel_objects']) as executor:
-                for url in urls:
-                    future = executor.submit(download_objet, url=url)
+                for target in targets:
+                    future = executor.submit(download_func, target)
                     futures.append(future)
 
-            for futures in futures:
+            for future in futures:
                 future.result()
 
         self.sleep(self.params['warmup_sleep'])
-        self.total_time = self.timeit(download_objets, urls=self.urls)[0]
+        if self.params.get('sdk_download'):
+            targets, download_func = self.objects, sdk_download_object
+        else:
+            targets, download_func = self.urls, download_objet
+        self.total_time = utils.timeit(download_objets, targets, download_func)[0]
 
     def make_stats(self):
         count = len(self.timings)
@@ -69,6 +108,7 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
             'max_concurrency': 1,
             'multipart_threshold': 0,
             'multipart_chunksize': 0,
+            'sdk_download': int(bool(self.params.get('sdk_download'))),
             'total_size': total_size,
             'test_time': test_time,
             'errors': error_count,
@@ -78,11 +118,25 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
             'presigned': int(self.params['presigned']),
             'warmup_sleep': self.params['warmup_sleep'],
         }
+        if self.params.get('sdk_download') and self.params.get('sdk_ranged'):
+            stats.update({
+                'max_concurrency': self.params['max_concurrency'],
+                'multipart_threshold': self.params['multipart_threshold'],
+                'multipart_chunksize': self.params['multipart_chunksize'],
+            })
         stats.update(self._make_aggr(self.timings))
+        stats.update(self._make_stream_stats(self.stream_results))
+        stats.update(self._make_driver_stats())
+        stats.update(self._make_setup_stats())
         if error_count:
             error_codes = set([e for e in self.errors])
-            stats.update({'error_count_%s' % e.args[1]: 0 for e in self.errors})
+            stats.update({'error_count_%s' % self._get_error_code(e): 0 for e in self.errors})
             for err in self.errors:
-                key = 'error_count_%s' % err.args[1]
+                key = 'error_count_%s' % self._get_error_code(err)
                 stats[key] += 1
         return stats
+
+    def _get_error_code(self, err):
+        if isinstance(err, errors.InvalidHttpCode):
+            return err.args[1]
+        return err.__class__.__name__
@@ -0,0 +1,125 @@
+"""
+OpenMetrics exporter for long-running benchmarks.
+
+:class:`MetricsExporter` is a sampler callback accumulating counters and
+latency histograms, served over HTTP for a Prometheus scraper.
+"""
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('osb.exporter')
+
+METRICS_HOST = '127.0.0.1'
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+HISTOGRAM_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.exporter.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class MetricsExporter:
+    """
+    Sampler callback exposing benchmark counters as OpenMetrics.
+
+    :param labels: Labels attached to every series, such as ``operation``,
+                   ``driver`` and ``bucket``
+    """
+    def __init__(self, benchmark, labels=None, port=0, host=None, buckets=None):
+        self.benchmark = benchmark
+        self.labels = labels or {}
+        self.buckets = tuple(buckets or HISTOGRAM_BUCKETS)
+        self.ops = 0
+        self.errors = 0
+        self.bytes = 0
+        self.duration_sum = 0
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host or METRICS_HOST, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.exporter = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.server.serve_forever,
+            name='osb-exporter',
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("Metrics available on http://%s:%s/metrics", *self.server.server_address[:2])
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __call__(self, sample, values):
+        with self._lock:
+            self.ops += sample['ops']
+            self.errors += sample['errors']
+            self.bytes += sample['bytes']
+            for value in values:
+                self.duration_sum += value
+                self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+
+    def _format_labels(self, **extra):
+        labels = dict(self.labels, **extra)
+        if not labels:
+            return ''
+        items = [
+            '%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+            for key, value in labels.items()
+        ]
+        return '{%s}' % ','.join(items)
+
+    def render(self):
+        """Format current values as OpenMetrics text"""
+        labels = self._format_labels()
+        with self._lock:
+            lines = [
+                '# TYPE osb_operations counter',
+                '# HELP osb_operations Completed operations.',
+                'osb_operations_total%s %s' % (labels, self.ops),
+                '# TYPE osb_errors counter',
+                '# HELP osb_errors Failed operations.',
+                'osb_errors_total%s %s' % (labels, self.errors),
+                '# TYPE osb_transferred_bytes counter',
+                '# UNIT osb_transferred_bytes bytes',
+                '# HELP osb_transferred_bytes Bytes of completed operations.',
+                'osb_transferred_bytes_total%s %s' % (labels, self.bytes),
+                '# TYPE osb_in_flight gauge',
+                '# HELP osb_in_flight Operations in progress.',
+                'osb_in_flight%s %s' % (labels, getattr(self.benchmark, 'in_flight', 0)),
+                '# TYPE osb_operation_duration_seconds histogram',
+                '# UNIT osb_operation_duration_seconds seconds',
+                '# HELP osb_operation_duration_seconds Operation latency.',
+            ]
+            count = 0
+            bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, self.bucket_counts):
+                count += bucket_count
+                lines.append('osb_operation_duration_seconds_bucket%s %s' % (
+                    self._format_labels(le=bound), count,
+                ))
+            lines.append('osb_operation_duration_seconds_count%s %s' % (labels, count))
+            lines.append('osb_operation_duration_seconds_sum%s %s' % (labels, self.duration_sum))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,182 @@
+"""
+Self-benchmark of the harness.
+
+Benchmarks are run against the ``ram`` driver, whose operations cost
+almost nothing, so the measured time is os-benchmark's own overhead:
+timing, name and content generation, dispatch to workers and results
+collection.
+
+``time-upload``, ``time-download`` and ``time-copy`` are run through the
+driver. ``time-multi-download`` isn't: it fetches URLs with its own HTTP
+session in worker processes, which the ``ram`` driver can't serve.
+"""
+import argparse
+import asyncio
+import statistics
+import timeit
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from os_benchmark import utils
+from os_benchmark.drivers import base as driver_base
+from . import base
+
+ENGINES = ('threads', 'processes', 'asyncio')
+OPERATIONS = ('upload', 'upload-asyncio', 'download', 'copy')
+OP_NUMBER = 2000
+HOT_PATH_NUMBER = 1000
+
+
+def _null_op(value):
+    return value
+
+
+async def _async_null_op(value):
+    return value
+
+
+def get_hot_paths():
+    """
+    Functions called for each operation by benchmarks.
+
+    :returns: Callables by name
+    :rtype: dict
+    """
+    chunks = [b'x'] * 100
+    benchmark = base.BaseBenchmark(None)
+    return {
+        'timeit': lambda: utils.timeit(_null_op, None),
+        'name_generator': lambda: benchmark.name_generator(),
+        'random_content': lambda: utils.get_random_content(1024),
+        'measure_download_100_chunks': lambda: driver_base.measure_download(chunks, 0),
+        'aggregate': lambda: base.BaseBenchmark(None)._make_aggr(list(range(100))),
+    }
+
+
+def measure_hot_path(func, number=HOT_PATH_NUMBER, repeat=3):
+    """
+    :returns: Best time per call in seconds
+    :rtype: float
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def measure_engine(engine, op_number, workers):
+    """
+    Dispatch null operations through an engine.
+
+    :returns: Elapsed time in seconds
+    :rtype: float
+    """
+    if engine == 'threads':
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return utils.timeit(lambda: list(executor.map(_null_op, range(op_number))))[0]
+    if engine == 'processes':
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Start workers before timing
+            list(executor.map(_null_op, range(workers)))
+            return utils.timeit(lambda: list(executor.map(_null_op, range(op_number))))[0]
+    if engine == 'asyncio':
+        async def run():
+            semaphore = asyncio.Semaphore(workers)
+
+            async def bounded(value):
+                async with semaphore:
+                    return await _async_null_op(value)
+
+            await asyncio.gather(*[bounded(i) for i in range(op_number)])
+        return utils.timeit(asyncio.run, run())[0]
+    raise ValueError("Unknown engine %s" % engine)
+
+
+def get_benchmark_params(benchmark_class, args):
+    """Get benchmark parameters as parsed from the command line"""
+    parser = argparse.ArgumentParser()
+    benchmark_class.make_parser_args(parser)
+    return vars(parser.parse_known_args(args)[0])
+
+
+class Benchmark(base.BaseBenchmark):
+    """Measure the harness overhead against the ram driver"""
+    @staticmethod
+    def make_parser_args(parser):
+        parser.add_argument('--op-number', type=int, default=OP_NUMBER)
+        parser.add_argument('--object-size', type=int, default=1024)
+        parser.add_argument('--parallel', type=int, default=4)
+        parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+        parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+        parser.add_argument('--hot-path-number', type=int, default=HOT_PATH_NUMBER)
+
+    def setup(self):
+        if self.driver.id != 'ram':
+            self.logger.warning("Driver %s isn't ram, its own cost is included", self.driver.id)
+        self.hot_paths = {}
+        self.engines = {}
+        self.operations = {}
+
+    def _run_operation(self, operation):
+        args = [
+            '--object-size', str(self.params['object_size']),
+            '--object-number', str(self.params['op_number']),
+            '--parallel-objects', str(self.params['parallel']),
+        ]
+        key = operation
+        if operation == 'upload-asyncio':
+            key = 'upload'
+            args += ['--engine', 'asyncio']
+        benchmark_class = base.get_benchmark(key)
+        benchmark = benchmark_class(self.driver)
+        benchmark.set_params(**get_benchmark_params(benchmark_class, args))
+        benchmark.setup()
+        try:
+            benchmark.run()
+        finally:
+            benchmark.tear_down()
+            self.driver.release()
+        return {
+            'total_time': benchmark.total_time,
+            'timings': benchmark.timings,
+            'errors': len(benchmark.errors),
+            'parallel': benchmark.params.get('parallel_objects') or 1,
+        }
+
+    def run(self, **kwargs):
+        for name, func in get_hot_paths().items():
+            self.logger.info("Measuring %s", name)
+            self.hot_paths[name] = measure_hot_path(func, self.params['hot_path_number'])
+        for engine in self.params['engines']:
+            self.logger.info("Measuring %s engine", engine)
+            self.engines[engine] = measure_engine(
+                engine=engine,
+                op_number=self.params['op_number'],
+                workers=self.params['parallel'],
+            )
+        for operation in self.params['operations']:
+            self.logger.info("Measuring %s", operation)
+            self.operations[operation] = self._run_operation(operation)
+
+    def make_stats(self):
+        op_number = self.params['op_number']
+        stats = {
+            'operation': 'self_benchmark',
+            'driver': self.driver.id,
+            'op_number': op_number,
+            'object_size': self.params['object_size'],
+            'parallel': self.params['parallel'],
+        }
+        for name, value in self.hot_paths.items():
+            stats['hot_path_%s_us' % name] = value * 10**6
+        for engine, elapsed in self.engines.items():
+            stats['engine_%s_rate' % engine] = op_number / elapsed if elapsed else 0
+            stats['engine_%s_overhead_us' % engine] = elapsed / op_number * 10**6
+        for operation, result in self.operations.items():
+            key = operation.replace('-', '_')
+            count = len(result['timings'])
+            total_time = result['total_time']
+            measured = statistics.mean(result['timings']) if count else 0
+            # Time a worker spends per operation outside the measured call
+            worker_time = total_time * result['parallel'] / count if count else 0
+            stats['%s_rate' % key] = count / total_time if total_time else 0
+            stats['%s_measured_us' % key] = measured * 10**6
+            stats['%s_overhead_us' % key] = max(worker_time - measured, 0) * 10**6
+            stats['%s_errors' % key] = result['errors']
+        return stats
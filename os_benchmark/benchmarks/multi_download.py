@@ -1,13 +1,21 @@
+import time
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import requests
 from os_benchmark import utils
-from . import base, errors
+from os_benchmark.drivers import base as driver_base
+from . import autotune, base, errors
 
 
-def _download(session, url, b_range):
+def _download(session, url, b_range, stall_threshold=None):
     headers = {'Range': 'bytes=%s-%s' % b_range}
+    start = time.perf_counter()
     try:
-        session.get(url, headers=headers)
+        with session.get(url, headers=headers, stream=True) as response:
+            return driver_base.measure_download(
+                chunks=response.iter_content(chunk_size=65536),
+                start=start,
+                stall_threshold=stall_threshold,
+            )
     except requests.exceptions.ChunkedEncodingError as err:
         raise errors.ConnectionError(err)
 
@@ -22,7 +30,10 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--object-size', type=int, required=False)
         parser.add_argument('--object-number', type=int, required=False)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--presigned', action="store_true")
+        parser.add_argument('--url-workers', type=int, default=None)
         parser.add_argument('--warmup-sleep', type=int, default=0)
         parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         parser.add_argument('--process-number', type=int, default=base.MAX_CONCURRENCY)
@@ -32,7 +43,17 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--upload-max-concurrency', type=int, default=base.MAX_CONCURRENCY)
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
         parser.add_argument('--parallel-objects', type=int, default=1)
+        parser.add_argument('--stall-threshold', type=float, default=None)
+        parser.add_argument('--autotune', action="store_true",
+                            help="Probe range sizes and process numbers before the benchmark and use the fastest.")
+        parser.add_argument('--autotune-chunksizes', type=autotune.parse_int_list, default=autotune.AUTOTUNE_CHUNKSIZES)
+        parser.add_argument('--autotune-concurrencies', type=autotune.parse_int_list, default=autotune.AUTOTUNE_CONCURRENCIES)
+        parser.add_argument('--autotune-rounds', type=int, default=autotune.AUTOTUNE_ROUNDS)
+        parser.add_argument('--autotune-samples', type=int, default=autotune.AUTOTUNE_SAMPLES)
+        parser.add_argument('--autotune-max-error-rate', type=float, default=autotune.AUTOTUNE_MAX_ERROR_RATE)
 
     def setup(self):
         if self.params.get('multipart_chunksize'):
@@ -45,29 +66,86 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         self.session = requests.Session()
         super().setup()
 
+        self.autotune_time = None
+        self.autotune_trials = []
+        if self.params.get('autotune'):
+            self.autotune_time = utils.timeit(self._autotune)[0]
+
+    def _download_object(self, pool, url, chunksize):
+        """Download an object by ranges, returning results and errors"""
+        self.logger.debug("Started downlaod '%s'", url)
+        size = self.params['object_size']
+        futures = []
+        for i in range(size // chunksize):
+            b_range = (i*chunksize, min(i*chunksize+chunksize, size-1))
+            futures.append(pool.submit(
+                _download,
+                self.session,
+                url,
+                b_range,
+                self.params.get('stall_threshold'),
+            ))
+        results = []
+        errors = []
+        for future in futures:
+            if future.exception():
+                errors.append(future.exception())
+                continue
+            results.append(future.result())
+        return results, errors
+
+    def _autotune(self):
+        samples = self.params.get('autotune_samples') or autotune.AUTOTUNE_SAMPLES
+        url = self.urls[0]
+
+        def probe(multipart_chunksize, process_number):
+            with ProcessPoolExecutor(max_workers=process_number) as pool:
+                elapsed_total = 0
+                downloaded = 0
+                error_count = 0
+                for i in range(samples):
+                    elapsed, (results, errors) = utils.timeit(
+                        self._download_object, pool, url, multipart_chunksize,
+                    )
+                    if errors:
+                        error_count += 1
+                        continue
+                    elapsed_total += elapsed
+                    downloaded += sum([r['size'] for r in results])
+            throughput = (downloaded / elapsed_total) if elapsed_total else 0
+            return throughput, error_count / samples
+
+        size = self.params['object_size']
+        chunksizes = [c for c in self.params.get('autotune_chunksizes') or autotune.AUTOTUNE_CHUNKSIZES if c <= size]
+        config, self.autotune_trials = autotune.tune(
+            probe=probe,
+            candidates={
+                'multipart_chunksize': chunksizes or [self.multipart_chunksize],
+                'process_number': self.params.get('autotune_concurrencies') or autotune.AUTOTUNE_CONCURRENCIES,
+            },
+            initial={
+                'multipart_chunksize': self.multipart_chunksize,
+                'process_number': self.params['process_number'],
+            },
+            rounds=self.params.get('autotune_rounds') or autotune.AUTOTUNE_ROUNDS,
+            max_error_rate=self.params.get('autotune_max_error_rate', autotune.AUTOTUNE_MAX_ERROR_RATE),
+        )
+        self.logger.info("Autotuned configuration: %s", config)
+        self.multipart_chunksize = config['multipart_chunksize']
+        self.chunk_number = size // self.multipart_chunksize
+        self.params['process_number'] = config['process_number']
+
     def run(self, **kwargs):
         self.sleep(self.params['warmup_sleep'])
+        self.stream_results = []
         pool = ProcessPoolExecutor(
             max_workers=self.params['process_number'],
         )
 
         def download_object(url):
-            self.logger.debug("Started downlaod '%s'", url)
-            futures = []
-            for i in range(self.chunk_number):
-                b_range = (i*self.multipart_chunksize, min(i*self.multipart_chunksize+self.multipart_chunksize, self.params['object_size']-1))
-                futures.append(pool.submit(
-                    _download,
-                    self.session,
-                    url,
-                    b_range,
-                ))
-            for future in futures:
-                while not future.done():
-                    if future.exception():
-                        self.errors.append(future.exception())
-                        break
-                    future.result()
+            results, errors = self._download_object(pool, url, self.multipart_chunksize)
+            self.errors.extend(errors)
+            self.stream_results.extend(results)
 
         def download_objects():
             futures = []
@@ -75,7 +153,7 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
             with ThreadPoolExecutor(max_workers=self.params['parallel_objects']) as executor:
                 for url in self.urls:
                     futures.append(executor.submit(
-                        self.timeit,
+                        self.time_operation,
                         download_object,
                         url
                     ))
@@ -114,10 +192,16 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
             'warmup_sleep': self.params['warmup_sleep'],
             'error_timeout': 0,
             'bw_total': total_size / self.total_time,
+            'autotune': int(bool(self.params.get('autotune'))),
         }
+        if self.params.get('autotune'):
+            stats['autotune_time'] = self.autotune_time
+            stats['autotune_trials'] = len(self.autotune_trials)
         stats.update(self._make_aggr(self.timings, 'time'))
         bws = [(size/t) for t in self.timings]
         stats.update(self._make_aggr(bws, 'bw'))
+        stats.update(self._make_stream_stats(self.stream_results))
+        stats.update(self._make_setup_stats())
 
         if error_count:
             stats.update({'error_count_%s' % e.args[1]: 0 for e in self.errors})
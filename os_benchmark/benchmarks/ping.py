@@ -2,6 +2,7 @@ try:
     import scapy.all as scapy
 except ImportError:
     pass
+from os_benchmark import utils
 from . import base
 
 
@@ -14,6 +15,8 @@ class Benchmark(base.BaseNetworkBenchmark):
         parser.add_argument('--warmup-sleep', type=int, default=0)
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
         parser.add_argument('--ttl', type=int, default=120)
         parser.add_argument('--timeout', type=int, default=5)
         parser.add_argument('--count', type=int, default=5)
@@ -39,7 +42,7 @@ class Benchmark(base.BaseNetworkBenchmark):
                 else:
                     self.errors.append(TimeoutError())
 
-        self.total_time = self.timeit(ping)[0]
+        self.total_time = utils.timeit(ping)[0]
 
     def make_stats(self):
         count = len(self.timings)
@@ -24,14 +24,19 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--object-size', type=int, required=False, default=1)
         parser.add_argument('--object-number', type=int, required=False, default=1)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
         parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         parser.add_argument('--max-concurrency', type=int, default=base.MAX_CONCURRENCY)
         parser.add_argument('--presigned', action="store_true")
+        parser.add_argument('--url-workers', type=int, default=None)
         parser.add_argument('--warmup-sleep', type=int, default=0)
         parser.add_argument('--keep-alive', action="store_true")
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
 
     def run(self, **kwargs):
         self.sleep(self.params['warmup_sleep'])
@@ -58,7 +63,7 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
                     self.logger.warning(err)
                     self.errors.append(err)
 
-        self.total_time = self.timeit(curl)[0]
+        self.total_time = utils.timeit(curl)[0]
 
     def make_stats(self):
         count = len(self.timings)
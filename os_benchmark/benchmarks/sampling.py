@@ -0,0 +1,141 @@
+"""
+Time-series sampling of benchmark counters.
+
+A :class:`Sampler` runs as a background thread and, at each interval,
+computes operations, bytes, errors and latency percentiles of the
+timings appended by the benchmark since the previous tick.
+"""
+import collections
+import logging
+import sys
+import threading
+import time
+
+from os_benchmark import utils
+
+logger = logging.getLogger('osb.sampling')
+
+SAMPLING_INTERVAL = 1
+SAMPLING_PERCENTILES = (50, 95, 99)
+PROGRESS_WINDOW = 1000
+
+
+def get_timing_value(timing):
+    """Extract elapsed time in seconds from a benchmark timing."""
+    if isinstance(timing, (int, float)):
+        return timing
+    if isinstance(timing, dict):
+        return timing.get('total_time')
+    return None
+
+
+def get_clock(benchmark):
+    """Get the wall clock anchor of a benchmark"""
+    clock = getattr(benchmark, 'clock', None)
+    return clock if clock is not None else utils.Clock()
+
+
+class Sampler(threading.Thread):
+    """Background ticker aggregating benchmark counters per interval."""
+    def __init__(self, benchmark, interval=None, callbacks=None):
+        super().__init__(name='osb-sampler', daemon=True)
+        self.benchmark = benchmark
+        self.clock = get_clock(benchmark)
+        self.interval = interval or SAMPLING_INTERVAL
+        self.callbacks = list(callbacks or [])
+        self.results = []
+        self._stop_event = threading.Event()
+        self._timing_offset = 0
+        self._error_offset = 0
+        self._last_tick = None
+
+    def _get_new_items(self, attr, offset):
+        items = getattr(self.benchmark, attr, None) or []
+        # The benchmark may have replaced its list
+        if len(items) < offset:
+            offset = 0
+        return items[offset:], offset + len(items[offset:])
+
+    def tick(self):
+        """Compute a sample from items appended since the last tick."""
+        now = time.perf_counter_ns()
+        interval = (now - self._last_tick) / 10**9 if self._last_tick else self.interval
+        self._last_tick = now
+
+        timings, self._timing_offset = self._get_new_items('timings', self._timing_offset)
+        errs, self._error_offset = self._get_new_items('errors', self._error_offset)
+        values = [v for v in map(get_timing_value, timings) if v is not None]
+
+        ops = len(timings)
+        size = self.benchmark.params.get('object_size') or 0
+        sample = {
+            'timestamp': self.clock.to_wall_ns(now) / 10**9,
+            'interval': interval,
+            'ops': ops,
+            'bytes': ops * size,
+            'errors': len(errs),
+            'rate': ops / interval if interval else 0,
+            'bw': ops * size / interval / 2**20 if interval else 0,
+        }
+        for percent in SAMPLING_PERCENTILES:
+            sample['time_perc%s' % percent] = utils.percentile(values, percent)
+
+        self.results.append(sample)
+        for callback in self.callbacks:
+            try:
+                callback(sample, values)
+            except Exception as err:
+                logger.warning("Sampling callback error: %s", err)
+        return sample
+
+    def run(self):
+        self._last_tick = time.perf_counter_ns()
+        while not self._stop_event.wait(self.interval):
+            self.tick()
+
+    def stop(self):
+        """Stop ticking and flush the last partial interval."""
+        self._stop_event.set()
+        self.join()
+        self.tick()
+
+
+class StatusLine:
+    """
+    Sampler callback printing a live status line with current rates,
+    in-flight requests, errors and rolling latency percentiles.
+    """
+    template = (
+        "\r[%(elapsed)6.0fs] %(ops)8d ops %(rate)9.1f ops/s %(bw)9.2f MB/s "
+        "in-flight %(in_flight)4d errors %(errors)5d "
+        "p50 %(p50)8.4fs p99 %(p99)8.4fs"
+    )
+
+    def __init__(self, benchmark, stream=None, window=None):
+        self.benchmark = benchmark
+        self.stream = stream or sys.stderr
+        self.values = collections.deque(maxlen=window or PROGRESS_WINDOW)
+        self.start = get_clock(benchmark).time()
+        self.ops = 0
+        self.errors = 0
+
+    def __call__(self, sample, values):
+        self.ops += sample['ops']
+        self.errors += sample['errors']
+        self.values.extend(values)
+        line = self.template % {
+            'elapsed': sample['timestamp'] - self.start,
+            'ops': self.ops,
+            'rate': sample['rate'],
+            'bw': sample['bw'],
+            'in_flight': getattr(self.benchmark, 'in_flight', 0),
+            'errors': self.errors,
+            'p50': utils.percentile(self.values, 50) or 0,
+            'p99': utils.percentile(self.values, 99) or 0,
+        }
+        self.stream.write(line)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write('\n')
+        self.stream.flush()
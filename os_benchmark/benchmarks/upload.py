@@ -1,7 +1,10 @@
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from os_benchmark import utils
+from os_benchmark import utils, manifest
 from os_benchmark.drivers import errors as driver_errors
-from . import base
+from . import autotune, base
+
+ENGINES = ('threads', 'asyncio')
 
 
 class Benchmark(base.BaseBenchmark):
@@ -14,12 +17,23 @@ class Benchmark(base.BaseBenchmark):
         parser.add_argument('--object-size', type=int, required=True)
         parser.add_argument('--object-number', type=int, required=True)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
         parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         parser.add_argument('--max-concurrency', type=int, default=base.MAX_CONCURRENCY)
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
         parser.add_argument('--parallel-objects', type=int, default=1)
+        parser.add_argument('--engine', choices=ENGINES, default='threads',
+                            help="Run uploads in a thread pool or on an event loop, with --parallel-objects in-flight uploads.")
+        parser.add_argument('--autotune', action="store_true",
+                            help="Probe multipart chunk sizes and concurrencies before the benchmark and use the fastest.")
+        parser.add_argument('--autotune-chunksizes', type=autotune.parse_int_list, default=autotune.AUTOTUNE_CHUNKSIZES)
+        parser.add_argument('--autotune-concurrencies', type=autotune.parse_int_list, default=autotune.AUTOTUNE_CONCURRENCIES)
+        parser.add_argument('--autotune-rounds', type=int, default=autotune.AUTOTUNE_ROUNDS)
+        parser.add_argument('--autotune-samples', type=int, default=autotune.AUTOTUNE_SAMPLES)
+        parser.add_argument('--autotune-max-error-rate', type=float, default=autotune.AUTOTUNE_MAX_ERROR_RATE)
 
     def setup(self):
         self.logger.debug("Bench params '%s'", self.params)
@@ -34,6 +48,8 @@ class Benchmark(base.BaseBenchmark):
             self.bucket_id = self.params['bucket_id']
             self.logger.debug("Reuse bucket '%s'", self.bucket_id)
             self.bucket = self.driver.get_bucket(bucket_id=self.bucket_id)
+            # Uploaded objects make the cached listing stale
+            manifest.remove_cache(manifest.get_cache_path(self.driver, self.bucket_id))
         else:
             bucket_name = utils.get_random_name(
                 size=self.params.get('bucket_name_size', 30),
@@ -47,16 +63,116 @@ class Benchmark(base.BaseBenchmark):
             )
             self.bucket_id = self.bucket['id']
 
+        self.autotune_time = None
+        self.autotune_trials = []
+        # Single PUTs don't depend on chunk size and concurrency
+        if self.params.get('autotune') and self.params['object_size'] < self.params['multipart_threshold']:
+            self.logger.warning(
+                "Object size %sB is below the multipart threshold %sB, skipping autotune",
+                self.params['object_size'], self.params['multipart_threshold'])
+            self.params['autotune'] = False
+        if self.params.get('autotune'):
+            self.autotune_time = utils.timeit(self._autotune)[0]
+
+    def _autotune(self):
+        size = self.params['object_size']
+        samples = self.params.get('autotune_samples') or autotune.AUTOTUNE_SAMPLES
+        names = []
+
+        def probe(multipart_chunksize, max_concurrency):
+            elapsed_total = 0
+            error_count = 0
+            for i in range(samples):
+                name = self.name_generator()
+                content = utils.get_random_content(size)
+                try:
+                    elapsed, obj = utils.timeit(
+                        self.driver.upload,
+                        bucket_id=self.bucket['id'],
+                        storage_class=self.storage_class,
+                        name=name,
+                        content=content,
+                        multipart_threshold=self.params['multipart_threshold'],
+                        multipart_chunksize=multipart_chunksize,
+                        max_concurrency=max_concurrency,
+                    )
+                except driver_errors.DriverError as err:
+                    self.logger.debug(err)
+                    error_count += 1
+                    continue
+                names.append(obj['name'])
+                elapsed_total += elapsed
+            uploaded = (samples - error_count) * size
+            throughput = (uploaded / elapsed_total) if elapsed_total else 0
+            return throughput, error_count / samples
+
+        # Chunks larger than the object are all equivalent
+        chunksizes = [c for c in self.params.get('autotune_chunksizes') or autotune.AUTOTUNE_CHUNKSIZES if c < size]
+        chunksizes = chunksizes or [size]
+        config, self.autotune_trials = autotune.tune(
+            probe=probe,
+            candidates={
+                'multipart_chunksize': chunksizes,
+                'max_concurrency': self.params.get('autotune_concurrencies') or autotune.AUTOTUNE_CONCURRENCIES,
+            },
+            initial={
+                'multipart_chunksize': min(self.params['multipart_chunksize'], size),
+                'max_concurrency': self.params['max_concurrency'],
+            },
+            rounds=self.params.get('autotune_rounds') or autotune.AUTOTUNE_ROUNDS,
+            max_error_rate=self.params.get('autotune_max_error_rate', autotune.AUTOTUNE_MAX_ERROR_RATE),
+        )
+        self.logger.info("Autotuned configuration: %s", config)
+        self.params.update(config)
+
+        try:
+            self.driver.delete_objects(bucket_id=self.bucket['id'], names=names)
+        except (driver_errors.DriverError, NotImplementedError) as err:
+            self.logger.warning("Cannot delete autotune objects: %s", err)
+
+    async def _run_async(self):
+        semaphore = asyncio.Semaphore(self.params['parallel_objects'])
+
+        async def upload_file(async_driver):
+            async with semaphore:
+                name = self.name_generator()
+                content = utils.get_random_content(self.params['object_size'])
+                self.logger.debug("Uploading object '%s'", name)
+                try:
+                    elapsed, obj = await self.async_time_operation(
+                        async_driver.upload,
+                        bucket_id=self.bucket['id'],
+                        storage_class=self.storage_class,
+                        name=name,
+                        content=content,
+                        multipart_threshold=self.params['multipart_threshold'],
+                        multipart_chunksize=self.params['multipart_chunksize'],
+                        max_concurrency=self.params['max_concurrency'],
+                    )
+                    self.timings.append(elapsed)
+                    self.objects.append(obj)
+                except driver_errors.DriverError as err:
+                    self.logger.error(err)
+                    self.errors.append(err)
+
+        async with self.driver.get_async_driver() as async_driver:
+            await asyncio.gather(*[
+                upload_file(async_driver)
+                for i in range(self.params['object_number'])
+            ])
+
     def run(self, **kwargs):
+        if self.params.get('engine') == 'asyncio':
+            self.total_time = utils.timeit(asyncio.run, self._run_async())[0]
+            return
+
         def upload_file():
-            name = utils.get_random_name(
-                prefix=self.params.get('object_prefix'),
-            )
+            name = self.name_generator()
             content = utils.get_random_content(self.params['object_size'])
 
             self.logger.debug("Uploading object '%s'", name)
             try:
-                elapsed, obj = self.timeit(
+                elapsed, obj = self.time_operation(
                     self.driver.upload,
                     bucket_id=self.bucket['id'],
                     storage_class=self.storage_class,
@@ -79,7 +195,7 @@ class Benchmark(base.BaseBenchmark):
                     futures.append(future)
 
         futures = []
-        self.total_time = self.timeit(upload_files)[0]
+        self.total_time = utils.timeit(upload_files)[0]
         for future in futures:
             try:
                 future.result()
@@ -114,6 +230,7 @@ class Benchmark(base.BaseBenchmark):
             'object_size': size,
             'object_number': self.params['object_number'],
             'object_prefix': self.params.get('object_prefix'),
+            'key_layout': self.params.get('key_layout') or 'random',
             'multipart_threshold': self.params['multipart_threshold'],
             'multipart_chunksize': self.params['multipart_chunksize'],
             'max_concurrency': self.params['max_concurrency'],
@@ -123,6 +240,13 @@ class Benchmark(base.BaseBenchmark):
             'driver': self.driver.id,
             'read_timeout': self.driver.read_timeout,
             'connect_timeout': self.driver.connect_timeout,
+            'autotune': int(bool(self.params.get('autotune'))),
+            'engine': self.params.get('engine') or 'threads',
         }
+        if self.params.get('autotune'):
+            stats['autotune_time'] = self.autotune_time
+            stats['autotune_trials'] = len(self.autotune_trials)
         stats.update(self._make_aggr(self.timings))
+        stats.update(self._make_driver_stats())
+        stats.update(self._make_setup_stats())
         return stats
@@ -1,13 +1,29 @@
 import logging
 import concurrent
 import asyncio
+from concurrent.futures._base import TimeoutError as AsyncTimeoutError
 try:
     import aiohttp
 except ImportError:
     aiohttp = None
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 from os_benchmark import utils, errors
 from . import base
 
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 15
+LOOP_LAG_INTERVAL = .1
+
+if aiohttp is not None:
+    ASYNC_TIMEOUT_ERRORS = (
+        asyncio.TimeoutError,
+        AsyncTimeoutError,
+        aiohttp.client_exceptions.ServerTimeoutError
+    )
+
 logger = logging.getLogger("osb")
 
 
@@ -24,17 +40,15 @@ async def _download(session, url):
         return -1, err
     except aiohttp.client_exceptions.ClientConnectorError as err:
         return -1, err
-    except base.ASYNC_TIMEOUT_ERRORS as err:
+    except ASYNC_TIMEOUT_ERRORS as err:
         return -1, err
     return elapsed, response
 
 
 async def _download_objets(
+        session,
         urls,
         delay=0,
-        read_timeout=5,
-        connect_timeout=10,
-        max_concurrency=1,
         sleep_time=5,
         process_id=None,
         thread_id=None,
@@ -43,18 +57,8 @@ async def _download_objets(
     Download each object defined by ``urls``.
     A sleep time is applied between each request.
     """
-    session_kwargs = {
-        'raise_for_status': True,
-        'read_timeout': read_timeout,
-        'conn_timeout': connect_timeout,
-    }
     await asyncio.sleep(delay)
     logger.debug("Started client %s-%s", process_id, thread_id)
-    connector = aiohttp.TCPConnector(
-        limit=max_concurrency,
-    )
-    session_kwargs['connector'] = connector
-    session = aiohttp.ClientSession(**session_kwargs)
     timings, errs = [], []
     for url in urls:
         await asyncio.sleep(sleep_time)
@@ -63,12 +67,86 @@ async def _download_objets(
             errs.append(response)
         else:
             timings.append(elapsed)
-    await session.close()
-    connector.close()
     logger.debug("End client %s-%s", process_id, thread_id)
     return timings, errs
 
 
+async def _monitor_loop_lag(lags, interval=LOOP_LAG_INTERVAL):
+    """
+    Record how late the loop wakes up from a sleep of ``interval``, the
+    time a ready callback waits behind the others.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - start - interval, 0))
+
+
+def _new_event_loop(use_uvloop=False):
+    """
+    Create an event loop, with uvloop if asked and available.
+
+    :returns: Loop and whether it is an uvloop
+    :rtype: tuple
+    """
+    if use_uvloop:
+        if uvloop is not None:
+            return uvloop.new_event_loop(), True
+        logger.warning("uvloop is not installed, using default event loop")
+    return asyncio.new_event_loop(), False
+
+
+async def _run_clients(
+        process_id,
+        urls,
+        client_number,
+        delay,
+        sleep_time,
+        read_timeout,
+        connect_timeout,
+        connection_limit=0,
+        dns_cache_ttl=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        loop_lag_interval=LOOP_LAG_INTERVAL,
+    ):
+    """
+    Run clients sharing a connection pool and DNS cache.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=connection_limit,
+        ttl_dns_cache=dns_cache_ttl,
+        keepalive_timeout=keepalive_timeout or None,
+        force_close=not keepalive_timeout,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        raise_for_status=True,
+        timeout=aiohttp.ClientTimeout(
+            sock_read=read_timeout,
+            sock_connect=connect_timeout,
+        ),
+    )
+    lags = []
+    monitor = asyncio.ensure_future(_monitor_loop_lag(lags, loop_lag_interval))
+    try:
+        results = await asyncio.gather(*[
+            _download_objets(
+                session=session,
+                process_id=process_id,
+                thread_id=i,
+                urls=urls,
+                delay=i * delay,
+                sleep_time=sleep_time,
+            )
+            for i in range(client_number)
+        ])
+    finally:
+        monitor.cancel()
+        await session.close()
+    return results, lags
+
+
 def _run_process(
         process_id,
         urls,
@@ -77,37 +155,43 @@ def _run_process(
         sleep_time,
         read_timeout,
         connect_timeout,
+        use_uvloop=False,
+        connection_limit=0,
+        dns_cache_ttl=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        loop_lag_interval=LOOP_LAG_INTERVAL,
     ):
     """
     Run a process containing one or several clients.
+
+    :returns: Timings, errors, event loop lags and whether uvloop was used
+    :rtype: tuple
     """
-    clients = []
     timings = []
     errors = []
-    loop = asyncio.new_event_loop()
+    loop, is_uvloop = _new_event_loop(use_uvloop)
     asyncio.set_event_loop(loop)
 
     logger.debug("Started process %s", process_id)
-    for i in range(client_number):
-        delay = i * delay
-        clients.append(_download_objets(
-            process_id=process_id,
-            thread_id=i,
-            urls=urls,
-            delay=delay,
-            read_timeout=read_timeout,
-            connect_timeout=connect_timeout,
-            max_concurrency=1,
-            sleep_time=sleep_time,
-        ))
-    tasks = asyncio.gather(*clients)
-    results = loop.run_until_complete(tasks)
+    results, lags = loop.run_until_complete(_run_clients(
+        process_id=process_id,
+        urls=urls,
+        client_number=client_number,
+        delay=delay,
+        sleep_time=sleep_time,
+        read_timeout=read_timeout,
+        connect_timeout=connect_timeout,
+        connection_limit=connection_limit,
+        dns_cache_ttl=dns_cache_ttl,
+        keepalive_timeout=keepalive_timeout,
+        loop_lag_interval=loop_lag_interval,
+    ))
     for _timings, errs in results:
         timings.extend(_timings)
         errors.extend(errs)
 
     loop.close()
-    return timings, errors
+    return timings, errors, lags, is_uvloop
 
 
 class Benchmark(base.BaseSetupObjectsBenchmark):
@@ -122,21 +206,36 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
         parser.add_argument('--object-size', type=int, required=False)
         parser.add_argument('--object-number', type=int, required=False)
         parser.add_argument('--object-prefix', required=False)
+        parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                            help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
         parser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
         parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         parser.add_argument('--max-concurrency', type=int, default=base.MAX_CONCURRENCY)
         parser.add_argument('--presigned', action="store_true")
+        parser.add_argument('--url-workers', type=int, default=None)
         parser.add_argument('--warmup-sleep', type=int, default=0)
         parser.add_argument('--sleep-time', type=int, default=5)
         parser.add_argument('--client-number', type=int, default=1)
         parser.add_argument('--process-number', type=int, default=1)
         parser.add_argument('--delay-time', type=float, default=.25)
+        parser.add_argument('--uvloop', action="store_true",
+                            help="Run clients on uvloop if installed.")
+        parser.add_argument('--connection-limit', type=int, default=0,
+                            help="Maximum connections per process shared by its clients, 0 for no limit.")
+        parser.add_argument('--dns-cache-ttl', type=int, default=DNS_CACHE_TTL)
+        parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                            help="Idle time before closing a connection, 0 to close after each request.")
+        parser.add_argument('--loop-lag-interval', type=float, default=LOOP_LAG_INTERVAL)
         parser.add_argument('--keep-objects', action="store_true")
         parser.add_argument('--bucket-id', default=None)
+        parser.add_argument('--refresh-manifest', action="store_true",
+                            help="Ignore the cached manifest of the reused bucket.")
 
     def run(self, **kwargs):
         self.sleep(self.params['warmup_sleep'])
         self.timings = []
+        self.loop_lags = []
+        self.uvloop = True
         def run():
             self.logger.debug('Starting processs')
             pool = concurrent.futures.ProcessPoolExecutor(
@@ -153,16 +252,23 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
                     self.params['sleep_time'],
                     self.driver.read_timeout,
                     self.driver.connect_timeout,
+                    self.params.get('uvloop', False),
+                    self.params.get('connection_limit', 0),
+                    self.params.get('dns_cache_ttl', DNS_CACHE_TTL),
+                    self.params.get('keepalive_timeout', KEEPALIVE_TIMEOUT),
+                    self.params.get('loop_lag_interval', LOOP_LAG_INTERVAL),
                 ))
             for future in futures:
                 while not future.done():
                     pass
-                timings, errs = future.result()
+                timings, errs, lags, is_uvloop = future.result()
                 self.timings.extend(timings)
                 self.errors.extend(errs)
+                self.loop_lags.extend(lags)
+                self.uvloop = self.uvloop and is_uvloop
             pool.shutdown()
 
-        self.total_time = self.timeit(run)[0]
+        self.total_time = utils.timeit(run)[0]
 
     def make_stats(self):
         count = len(self.timings)
@@ -190,10 +296,14 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
             'client_number': int(self.params['client_number']),
             'process_number': int(self.params['process_number']),
             'delay_time': self.params['delay_time'],
+            'uvloop': int(self.uvloop),
+            'connection_limit': self.params.get('connection_limit', 0),
+            'keepalive_timeout': self.params.get('keepalive_timeout', KEEPALIVE_TIMEOUT),
         }
 
         stats.update(self._make_aggr(self.timings, 'time'))
         stats.update(self._make_aggr(bws, 'bw', decimals=3))
+        stats.update(self._make_aggr(self.loop_lags, 'loop_lag'))
 
         if error_count:
             for err in self.errors:
@@ -203,7 +313,7 @@ class Benchmark(base.BaseSetupObjectsBenchmark):
                     key = 'error_client'
                 elif isinstance(err, aiohttp.client_exceptions.ServerDisconnectedError):
                     key = 'error_server'
-                elif isinstance(err, base.ASYNC_TIMEOUT_ERRORS):
+                elif isinstance(err, ASYNC_TIMEOUT_ERRORS):
                     key = 'error_timeout'
                 else:
                     key = 'error_count_%s' % err.args[1]
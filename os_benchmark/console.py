@@ -8,9 +8,8 @@ from collections import defaultdict
 
 import os_benchmark
 from os_benchmark import logger as logger_
-from os_benchmark import utils, benchmarks, errors
-from os_benchmark.benchmarks import base
-from os_benchmark import prepare
+from os_benchmark import utils, benchmarks, errors, manifest
+from os_benchmark.benchmarks import base, sampling
 from os_benchmark.drivers import errors as driver_errors
 
 ACTIONS = (
@@ -42,7 +41,21 @@ ACTIONS = (
     'traceroute',
     'tcptraceroute',
     'test-features',
+    'self-benchmark',
+    'daemon',
 )
+# Actions always run against the ram driver
+RAM_ACTIONS = (
+    'self_benchmark',
+)
+# Actions not using a driver
+NO_DRIVER_ACTIONS = (
+    'daemon',
+)
+STD_STREAMS = {
+    '/dev/stdout': lambda: sys.stdout,
+    '/dev/stderr': lambda: sys.stderr,
+}
 
 
 def create_parser():
@@ -87,6 +100,10 @@ def create_parser():
         default=False, action='store_true',
         help="Disable any prompt",
     )
+    parser.add_argument(
+        '--http-phases', action="store_true",
+        help="Measure DNS, connect, TLS, TTFB and transfer time of HTTP requests.",
+    )
     parser.add_argument(
         '--enable-monitoring', action="store_true", dest="monitoring_enabled",
     )
@@ -99,23 +116,89 @@ def create_parser():
     parser.add_argument(
         '--monitoring-output', default="/dev/stderr"
     )
+    parser.add_argument(
+        '--sampling-interval', type=float, default=None,
+        help="Collect a time series of benchmark counters every N seconds.",
+    )
+    parser.add_argument(
+        '--sampling-output', default="/dev/stderr",
+        help="File receiving time series samples as JSON lines.",
+    )
+    parser.add_argument(
+        '--timestamps-output', default=None,
+        help="File receiving start, first byte and end epoch nanoseconds of each operation as JSON lines.",
+    )
+    parser.add_argument(
+        '--progress', action="store_true",
+        help="Display a live status line while the benchmark is running.",
+    )
+    parser.add_argument(
+        '--daemon-socket', default=None,
+        help="Run the command in the os-benchmark daemon listening on this socket.",
+    )
+    parser.add_argument(
+        '--metrics-port', type=int, default=None,
+        help="Expose an OpenMetrics endpoint on this port during the benchmark.",
+    )
+    parser.add_argument(
+        '--metrics-host', default=None,
+        help="Address the OpenMetrics endpoint listens on, 127.0.0.1 by default.",
+    )
     return parser
 
 
+def get_action(argv):
+    """
+    Get the action of arguments, the first one naming an action.
+
+    :returns: Action and its position, ``None`` for both if missing
+    :rtype: tuple
+    """
+    for i, arg in enumerate(argv):
+        if arg in ACTIONS:
+            return arg, i
+    return None, None
+
+
+def pop_daemon_socket(argv):
+    """
+    Remove ``--daemon-socket`` from arguments.
+
+    :returns: Socket path and other arguments
+    :rtype: tuple
+    """
+    argv = list(argv)
+    for i, arg in enumerate(argv):
+        if arg in ACTIONS:
+            break
+        if arg == '--daemon-socket' and i + 1 < len(argv):
+            return argv[i+1], argv[:i] + argv[i+2:]
+        if arg.startswith('--daemon-socket='):
+            return arg.split('=', 1)[1], argv[:i] + argv[i+1:]
+    return None, argv
+
+
 class Controller:
-    """Helper for organise CLI work"""
-    def __init__(self):
+    """
+    Helper for organise CLI work
+
+    :param argv: Command line arguments, ``sys.argv[1:]`` by default
+    :param drivers: Drivers by configuration, shared between controllers
+                    to reuse authenticated drivers
+    """
+    def __init__(self, argv=None, drivers=None):
+        self.argv = sys.argv[1:] if argv is None else list(argv)
+        self.drivers = drivers
         self.parser = create_parser()
         self.subparsers = self.parser.add_subparsers(help="Sub-command", dest='action')
 
         action_subparsers = {}
-        main_action = base_num_args = None
         for action in ACTIONS:
             action_subparsers[action] = self.subparsers.add_parser(action)
-            if action in sys.argv:
-                main_action = action
-                base_num_args = sys.argv.index(action) + 1
-        self.main_args = self.parser.parse_known_args(sys.argv[1:base_num_args])[0]
+        main_action, base_num_args = get_action(self.argv)
+        if main_action is not None:
+            base_num_args += 1
+        self.main_args = self.parser.parse_known_args(self.argv[:base_num_args])[0]
         main_action = self.main_args.action or 'help'
         self.subparser = action_subparsers[main_action]
         self.action = main_action.replace('-', '_')
@@ -123,8 +206,13 @@ class Controller:
         self.verbosity = 40 - (min(self.main_args.verbosity, 3) * 10)
         self.logger = logger_.logger
         self.logger.setLevel(self.verbosity)
+        self._driver = None
         # Get config
-        if self.main_args.config_raw:
+        if self.action in NO_DRIVER_ACTIONS:
+            config = {}
+        elif self.action in RAM_ACTIONS:
+            config = {'driver': 'ram'}
+        elif self.main_args.config_raw:
             config = json.loads(self.main_args.config_raw)
         else:
             try:
@@ -137,9 +225,23 @@ class Controller:
                 self.help()
         config['read_timeout'] = self.main_args.read_timeout
         config['connect_timeout'] = self.main_args.connect_timeout
-        # Get driver
-        self.driver = utils.get_driver(config)
-        self.driver.set_backend_logger(self.main_args.verbosity)
+        if self.main_args.http_phases:
+            config['http_phases'] = True
+        self.config = config
+
+    @property
+    def driver(self):
+        """Driver built on first use, actions without one start faster"""
+        if self._driver is None:
+            key = json.dumps(self.config, sort_keys=True, default=str)
+            if self.drivers is not None and key in self.drivers:
+                self._driver = self.drivers[key]
+            else:
+                self._driver = utils.get_driver(dict(self.config))
+                if self.drivers is not None:
+                    self.drivers[key] = self._driver
+            self._driver.set_backend_logger(self.main_args.verbosity)
+        return self._driver
 
     def run(self):
         func = getattr(self, self.action)
@@ -153,7 +255,7 @@ class Controller:
     def create_bucket(self):
         self.subparser.add_argument('--name', required=False)
         self.subparser.add_argument('--storage-class', required=False)
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         name = parsed_args.name or utils.get_random_name()
         bucket = self.driver.create_bucket(
@@ -165,19 +267,20 @@ class Controller:
     def delete_bucket(self):
         self.subparser.add_argument('bucket_id')
         self.subparser.add_argument('--delete-files', action='store_true')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         if parsed_args.delete_files:
             try:
                 self.driver.clean_bucket(bucket_id=parsed_args.bucket_id)
             except driver_errors.DriverBucketUnfoundError:
                 return
+        manifest.remove_cache(manifest.get_cache_path(self.driver, parsed_args.bucket_id))
         self.driver.delete_bucket(
             bucket_id=parsed_args.bucket_id,
         )
 
     def list_buckets(self):
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
         buckets = self.driver.list_buckets()
         for bucket in buckets:
             print(bucket['id'])
@@ -193,11 +296,11 @@ class Controller:
         self.subparser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
         self.subparser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
         self.subparser.add_argument('--max-concurrency', type=int, default=base.MAX_CONCURRENCY)
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         name = parsed_args.name or utils.get_random_name()
         if parsed_args.from_stdin:
-            content = sys.stdin
+            content = sys.stdin.buffer
         elif parsed_args.content is not None:
             content = parsed_args.content
         elif parsed_args.content_size:
@@ -220,7 +323,7 @@ class Controller:
     def download(self):
         self.subparser.add_argument('--bucket-id')
         self.subparser.add_argument('--name')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
         url = self.driver.get_url(
             bucket_id=parsed_args.bucket_id,
             name=parsed_args.name,
@@ -233,7 +336,7 @@ class Controller:
         self.subparser.add_argument('bucket_id')
         self.subparser.add_argument('--url', action='store_true')
         self.subparser.add_argument('--versions', action='store_true')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         if parsed_args.versions:
             names = []
@@ -270,7 +373,7 @@ class Controller:
     def list_object_versions(self):
         self.subparser.add_argument('bucket_id')
         self.subparser.add_argument('name')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         versions = self.driver.list_object_versions(
             bucket_id=parsed_args.bucket_id,
@@ -281,7 +384,7 @@ class Controller:
 
     def list_objects_versions(self):
         self.subparser.add_argument('bucket_id')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         versions = self.driver.list_objects_versions(
             bucket_id=parsed_args.bucket_id,
@@ -292,7 +395,7 @@ class Controller:
     def delete_object(self):
         self.subparser.add_argument('bucket_id')
         self.subparser.add_argument('name')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         self.driver.delete_object(
             bucket_id=parsed_args.bucket_id,
@@ -304,7 +407,7 @@ class Controller:
         self.subparser.add_argument('name')
         self.subparser.add_argument('dst_bucket_id')
         self.subparser.add_argument('dst_name')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         self.driver.copy_object(
             bucket_id=parsed_args.bucket_id,
@@ -315,129 +418,104 @@ class Controller:
 
     def clean_bucket(self):
         self.subparser.add_argument('bucket_id')
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         if not self.main_args.noinput:
             print("You are going to clean entirely this bucket.")
             input("Press [ENTER] to continue\n")
+        manifest.remove_cache(manifest.get_cache_path(self.driver, parsed_args.bucket_id))
         self.driver.clean_bucket(
             bucket_id=parsed_args.bucket_id,
         )
 
     def clean(self):
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         if not self.main_args.noinput:
             print("You are going to clean entirely this object storage.")
             input("Press [ENTER] to continue\n")
+        for bucket in self.driver.list_buckets():
+            manifest.remove_cache(manifest.get_cache_path(self.driver, bucket['id']))
         self.driver.clean()
 
     def time_upload(self):
         benchmark_class = base.get_benchmark('upload')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def time_download(self):
         benchmark_class = base.get_benchmark('download')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def time_multi_download(self):
         benchmark_class = base.get_benchmark('multi_download')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def time_copy(self):
         benchmark_class = base.get_benchmark('copy')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def ab(self):
         benchmark_class = base.get_benchmark('ab')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
 
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def curl(self):
         benchmark_class = base.get_benchmark('pycurl')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
 
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def video_streaming(self):
         benchmark_class = base.get_benchmark('video_streaming')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(**vars(parsed_args))
 
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def ping(self):
         benchmark_class = base.get_benchmark('ping')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(
@@ -455,17 +533,13 @@ class Controller:
             count=parsed_args.count,
             scapy_verbose=parsed_args.scapy_verbose,
         )
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def tcpping(self):
         benchmark_class = base.get_benchmark('tcpping')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(
@@ -483,17 +557,13 @@ class Controller:
             count=parsed_args.count,
             scapy_verbose=parsed_args.scapy_verbose,
         )
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def traceroute(self):
         benchmark_class = base.get_benchmark('traceroute')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(
@@ -511,17 +581,13 @@ class Controller:
             count=parsed_args.count,
             scapy_verbose=parsed_args.scapy_verbose,
         )
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def tcptraceroute(self):
         benchmark_class = base.get_benchmark('tcptraceroute')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(
@@ -539,36 +605,119 @@ class Controller:
             count=parsed_args.count,
             scapy_verbose=parsed_args.scapy_verbose,
         )
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
 
     def test_features(self):
         self.subparser.add_argument('--storage-class', required=False)
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark_class = base.get_benchmark('features')
         benchmark_class.make_parser_args(self.subparser)
 
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
 
         benchmark = benchmark_class(self.driver)
         benchmark.set_params(
             storage_class=parsed_args.storage_class,
         )
-        benchmark.setup()
-        benchmark.run()
-        benchmark.tear_down()
-        stats = benchmark.make_stats()
-        self.print_stats(stats)
+        self.run_benchmark(benchmark)
+
+    def self_benchmark(self):
+        benchmark_class = base.get_benchmark('harness')
+        benchmark_class.make_parser_args(self.subparser)
+
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
+
+        benchmark = benchmark_class(self.driver)
+        benchmark.set_params(**vars(parsed_args))
+        self.run_benchmark(benchmark)
+
+    def daemon(self):
+        from os_benchmark import daemon
+        daemon.make_parser_args(self.subparser)
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
+        daemon.run(parsed_args)
 
     def prepare(self):
+        from os_benchmark import prepare
         prepare.make_parser_args(self.subparser)
-        parsed_args = self.parser.parse_known_args()[0]
+        parsed_args = self.parser.parse_known_args(self.argv)[0]
         prepare.run(parsed_args, self.driver)
 
+    def run_benchmark(self, benchmark):
+        """Run a configured benchmark and output its results"""
+        benchmark.setup_time = utils.timeit(benchmark.setup)[0]
+        benchmark.reset_driver_stats()
+        if self.main_args.monitoring_enabled:
+            benchmark.start_monitoring(
+                probers=self.main_args.monitoring_probers,
+                interval=self.main_args.monitoring_interval,
+            )
+        sampling_enabled = self.main_args.sampling_interval or \
+            self.main_args.progress or \
+            self.main_args.metrics_port is not None
+        if sampling_enabled:
+            callbacks = []
+            if self.main_args.progress:
+                callbacks.append(sampling.StatusLine(benchmark))
+            if self.main_args.metrics_port is not None:
+                from os_benchmark.benchmarks import exporter
+                metrics_exporter = exporter.MetricsExporter(
+                    benchmark=benchmark,
+                    labels={
+                        'operation': self.action.replace('time_', ''),
+                        'driver': self.driver.id,
+                        'bucket': getattr(benchmark, 'bucket_id', ''),
+                    },
+                    port=self.main_args.metrics_port,
+                    host=self.main_args.metrics_host,
+                )
+                metrics_exporter.start()
+                callbacks.append(metrics_exporter)
+            benchmark.start_sampling(
+                interval=self.main_args.sampling_interval,
+                callbacks=callbacks,
+            )
+        try:
+            benchmark.run()
+        finally:
+            if sampling_enabled:
+                benchmark.stop_sampling()
+            if self.main_args.monitoring_enabled:
+                benchmark.stop_monitoring()
+        benchmark.tear_down()
+        self.driver.release()
+        stats = benchmark.make_stats()
+        self.print_stats(stats)
+        if self.main_args.sampling_interval:
+            self.write_results(
+                benchmark.get_sampling_results(),
+                self.main_args.sampling_output,
+            )
+        if self.main_args.monitoring_enabled:
+            self.write_results(
+                benchmark.get_monitoring_results(),
+                self.main_args.monitoring_output,
+            )
+        if self.main_args.timestamps_output:
+            self.write_results(
+                benchmark.get_timestamps(),
+                self.main_args.timestamps_output,
+            )
+        return stats
+
+    def write_results(self, results, output):
+        """Write a time series as JSON lines"""
+        if not isinstance(results, (list, tuple)):
+            results = [results]
+        lines = [json.dumps(result, default=str) + '\n' for result in results]
+        # Current streams are the client's ones in the daemon
+        if output in STD_STREAMS:
+            STD_STREAMS[output]().writelines(lines)
+            return
+        with open(output, 'a') as fd:
+            fd.writelines(lines)
+
     def print_stats(self, stats):
         template = '%s\t\t%s'
         print(template % ('version', os_benchmark.__version__))
@@ -580,10 +729,19 @@ class Controller:
                 print(template % (key, value))
 
 
-def main():
+def main(argv=None, drivers=None):
     """Entry function"""
+    argv = sys.argv[1:] if argv is None else argv
+    socket_path, argv = pop_daemon_socket(argv)
+    if socket_path:
+        from os_benchmark import daemon
+        try:
+            sys.exit(daemon.forward(socket_path, argv))
+        except OSError as err:
+            logger_.logger.error("Cannot reach the daemon at %s: %s", socket_path, err)
+            sys.exit(1)
     try:
-        controller = Controller()
+        controller = Controller(argv=argv, drivers=drivers)
         controller.run()
     except KeyboardInterrupt:
         print("Stopped by user")
@@ -0,0 +1,170 @@
+"""
+Long-lived process keeping drivers warm between CLI invocations.
+
+Each invocation of ``os-benchmark`` parses its configuration, builds a
+driver, authenticates and opens connection pools before running a command
+lasting sometimes less than the setup. The daemon listens on a Unix socket
+and runs commands sent by ``os-benchmark --daemon-socket``, with drivers
+kept by configuration, and returns their output.
+
+A request is a JSON line with ``argv`` and ``cwd``, the response a JSON line
+with ``stdout``, ``stderr`` and ``exit_code``. Commands are run one at a
+time: concurrent benchmarks would skew each other. They run without prompt
+and can't read the client's standard input.
+"""
+import io
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+
+from os_benchmark import logger as logger_
+from os_benchmark import manifest
+
+SOCKET_NAME = 'daemon.sock'
+
+logger = logging.getLogger('osb.daemon')
+
+
+def get_socket_path(path=None):
+    """Get the daemon socket path, in the cache directory by default"""
+    if path:
+        return path
+    cache_dir = os.environ.get('OSB_CACHE_DIR') or manifest.CACHE_DIR
+    return os.path.join(os.path.expanduser(cache_dir), SOCKET_NAME)
+
+
+def make_parser_args(parser):
+    parser.add_argument('--socket', required=False,
+                        help="Unix socket path, %s in the cache directory by default." % SOCKET_NAME)
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help="Stop after N seconds without request.")
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(arg) for arg in request['argv']]
+        except (ValueError, KeyError, TypeError) as err:
+            response = {'stdout': '', 'stderr': "Invalid request: %s\n" % err, 'exit_code': 2}
+        else:
+            response = self.server.execute(argv, cwd=request.get('cwd'))
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class Server(socketserver.UnixStreamServer):
+    """Unix socket server running commands with shared drivers"""
+    def __init__(self, path, idle_timeout=None):
+        self.path = path
+        self.timeout = idle_timeout
+        self.drivers = {}
+        self.stopped = False
+        self.executing = False
+        os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+        # Commands run with the daemon's credentials, the socket is never
+        # accessible to other users, even between its bind and chmod
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, RequestHandler)
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o600)
+
+    def execute(self, argv, cwd=None):
+        """Run a command as the CLI would, capturing its output"""
+        from os_benchmark import console
+
+        action, index = console.get_action(argv)
+        if action == 'daemon':
+            return {'stdout': '', 'stderr': "The daemon cannot start a daemon\n", 'exit_code': 2}
+        if action == 'upload' and '--from-stdin' in argv[index+1:]:
+            return {'stdout': '', 'stderr': "The daemon cannot read standard input\n", 'exit_code': 2}
+        # Prompts would read the daemon's standard input
+        argv = ['--noinput'] + list(argv)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code = 0
+        previous_cwd = os.getcwd()
+        previous_stream = logger_.handler.setStream(stderr)
+        self.executing = True
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                if cwd:
+                    os.chdir(cwd)
+                console.main(argv, drivers=self.drivers)
+        except SystemExit as err:
+            if isinstance(err.code, int) or err.code is None:
+                exit_code = err.code or 0
+            else:
+                stderr.write("%s\n" % err.code)
+                exit_code = 1
+        except Exception as err:
+            logger.exception(err)
+            stderr.write("%s\n" % err)
+            exit_code = 1
+        finally:
+            self.executing = False
+            logger_.handler.setStream(previous_stream)
+            os.chdir(previous_cwd)
+        return {
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+            'exit_code': exit_code,
+        }
+
+    def handle_sigterm(self, signum, frame):
+        """Stop now if idle, else once the running command is done"""
+        self.stopped = True
+        if not self.executing:
+            sys.exit(0)
+
+    def handle_timeout(self):
+        logger.info("No request since %ss, stopping", self.timeout)
+        self.stopped = True
+
+    def serve(self):
+        while not self.stopped:
+            self.handle_request()
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def forward(path, argv):
+    """
+    Run a command in the daemon and output its result.
+
+    :returns: Exit code of the command
+    :rtype: int
+    """
+    request = {'argv': list(argv), 'cwd': os.getcwd()}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        with sock.makefile('rb') as fd:
+            response = json.loads(fd.readline())
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['exit_code']
+
+
+def run(args):
+    path = get_socket_path(args.socket)
+    server = Server(path, idle_timeout=args.idle_timeout)
+    # Remove the socket when stopped by a service manager
+    signal.signal(signal.SIGTERM, server.handle_sigterm)
+    logger.info("Listening on %s", path)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,424 @@
+"""
+Asynchronous driver interface.
+
+Drivers are synchronous, :meth:`BaseDriver.get_async_driver` gives an
+:class:`AsyncDriver` allowing to run operations from an event loop:
+
+- :class:`ThreadedAsyncDriver` runs the methods of any driver in a thread
+  pool, in-flight operations are bounded by the pool size
+- :class:`S3AsyncDriver` talks natively to S3-compatible endpoints with
+  `aiohttp`_ and AWS Signature Version 4, in-flight operations are only
+  bounded by the connection limit
+
+.. code-block:: python
+
+  async with driver.get_async_driver() as async_driver:
+      await async_driver.upload(bucket_id='foo', name='bar', content=content)
+
+.. _aiohttp: https://docs.aiohttp.org/
+"""
+import asyncio
+import datetime
+import functools
+import hashlib
+import hmac
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit, parse_qsl
+from xml.etree import ElementTree
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+from os_benchmark.drivers import base, errors
+
+MAX_WORKERS = 64
+CONNECTION_LIMIT = 0
+# Bytes read from upload content at once
+UPLOAD_CHUNKSIZE = 2**20
+DNS_CACHE_TTL = 300
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+S3_NAMESPACE = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+
+logger = logging.getLogger('osb.driver')
+
+
+class AsyncDriver:
+    """Base asynchronous driver"""
+    async def upload(self, bucket_id, name, content, **kwargs):
+        """Upload an object into a bucket"""
+        raise NotImplementedError()
+
+    async def download(self, url, block_size=65536, headers=None, **kwargs):
+        """
+        Download object from URL
+
+        :returns: Stream measurements from :func:`base.measure_download`
+        """
+        raise NotImplementedError()
+
+    async def download_object(self, bucket_id, name, block_size=65536, stall_threshold=None, **kwargs):
+        """
+        Download object without its URL
+
+        :returns: Stream measurements from :func:`base.measure_download`
+        """
+        raise NotImplementedError()
+
+    async def list_objects(self, bucket_id, **kwargs):
+        """List objects from a bucket"""
+        raise NotImplementedError()
+
+    async def head_object(self, bucket_id, name, **kwargs):
+        """Get object metadata without its content"""
+        raise NotImplementedError()
+
+    async def delete_object(self, bucket_id, name, **kwargs):
+        """Delete object from a bucket"""
+        raise NotImplementedError()
+
+    async def delete_objects(self, bucket_id, names, **kwargs):
+        """Delete multiple objects from a bucket"""
+        await asyncio.gather(*[
+            self.delete_object(bucket_id, name, **kwargs)
+            for name in names
+        ])
+
+    async def close(self):
+        """Release connections"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+class ThreadedAsyncDriver(AsyncDriver):
+    """Run a synchronous driver in a thread pool"""
+    def __init__(self, driver, max_workers=None):
+        self.driver = driver
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(func, *args, **kwargs),
+        )
+
+    async def upload(self, bucket_id, name, content, **kwargs):
+        return await self._run(self.driver.upload, bucket_id=bucket_id, name=name, content=content, **kwargs)
+
+    async def download(self, url, block_size=65536, headers=None, **kwargs):
+        return await self._run(self.driver.download, url=url, block_size=block_size, headers=headers, **kwargs)
+
+    async def download_object(self, bucket_id, name, block_size=65536, stall_threshold=None, **kwargs):
+        return await self._run(
+            self.driver.download_object,
+            bucket_id=bucket_id,
+            name=name,
+            block_size=block_size,
+            stall_threshold=stall_threshold,
+            **kwargs
+        )
+
+    async def list_objects(self, bucket_id, **kwargs):
+        return await self._run(self.driver.list_objects, bucket_id=bucket_id, **kwargs)
+
+    async def head_object(self, bucket_id, name, **kwargs):
+        return await self._run(self.driver.head_object, bucket_id=bucket_id, name=name, **kwargs)
+
+    async def delete_object(self, bucket_id, name, **kwargs):
+        return await self._run(self.driver.delete_object, bucket_id=bucket_id, name=name, **kwargs)
+
+    async def delete_objects(self, bucket_id, names, **kwargs):
+        return await self._run(self.driver.delete_objects, bucket_id=bucket_id, names=names, **kwargs)
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def _hmac(key, msg):
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+async def iter_content(content, size, chunksize=None):
+    """Read ``size`` bytes of a file-object by chunks"""
+    chunksize = chunksize or UPLOAD_CHUNKSIZE
+    remaining = size
+    while remaining > 0:
+        chunk = content.read(min(chunksize, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def sign_request(method, url, headers, access_key, secret_key, region,
+                 service='s3', session_token=None, payload_hash=UNSIGNED_PAYLOAD,
+                 now=None):
+    """
+    Sign a request with AWS Signature Version 4.
+
+    :param url: Request URL, with path and query already encoded
+    :returns: Headers to send, including ``Authorization``
+    :rtype: dict
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date = amz_date[:8]
+    parsed = urlsplit(url)
+
+    headers = dict(headers or {})
+    headers['Host'] = parsed.netloc
+    headers['X-Amz-Date'] = amz_date
+    headers['X-Amz-Content-SHA256'] = payload_hash
+    if session_token:
+        headers['X-Amz-Security-Token'] = session_token
+
+    canonical_headers = sorted(
+        (key.lower(), ' '.join(str(value).split()))
+        for key, value in headers.items()
+    )
+    signed_headers = ';'.join(key for key, value in canonical_headers)
+    canonical_query = '&'.join(sorted(
+        '%s=%s' % (quote(key, safe='-_.~'), quote(value, safe='-_.~'))
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+    ))
+    canonical_request = '\n'.join([
+        method,
+        parsed.path or '/',
+        canonical_query,
+        ''.join('%s:%s\n' % header for header in canonical_headers),
+        signed_headers,
+        payload_hash,
+    ])
+
+    scope = '%s/%s/%s/aws4_request' % (date, region, service)
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256',
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    key = _hmac(('AWS4' + secret_key).encode(), date)
+    for part in (region, service, 'aws4_request'):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    headers['Authorization'] = (
+        'AWS4-HMAC-SHA256 Credential=%s/%s, SignedHeaders=%s, Signature=%s'
+        % (access_key, scope, signed_headers, signature)
+    )
+    return headers
+
+
+def _get_error(status, body):
+    """Map an S3 error response to a driver error"""
+    code = message = None
+    try:
+        root = ElementTree.fromstring(body)
+        code = root.findtext('Code')
+        message = root.findtext('Message')
+    except ElementTree.ParseError:
+        pass
+    message = message or code or body.decode(errors='replace') or str(status)
+    if code == 'NoSuchBucket':
+        return errors.DriverBucketUnfoundError(message)
+    if code == 'NoSuchKey' or (status == 404 and code is None):
+        return errors.DriverObjectUnfoundError(message)
+    if code in ('InvalidAccessKeyId', 'SignatureDoesNotMatch', 'AccountProblem'):
+        return errors.DriverAuthenticationError(message)
+    if code == 'AccessDenied':
+        return errors.DriverPermissionError(message)
+    if code == 'NotImplemented' or status == 501:
+        return errors.DriverFeatureUnsupported(message)
+    if code == 'SlowDown' or status == 429:
+        return errors.DriverRateLimitError(message)
+    if status >= 500:
+        return errors.DriverServerError(message)
+    return errors.InvalidHttpCode(message, status)
+
+
+class S3AsyncDriver(AsyncDriver):
+    """
+    Native asynchronous S3 driver, using path-style addressing and
+    unsigned payloads.
+
+    Uploads of known size are streamed, S3 requiring the payload length,
+    streams of unknown size such as pipes are read in memory.
+
+    :param limit: Maximum number of simultaneous connections, ``0`` for
+                  no limit
+    """
+    def __init__(self, endpoint_url, access_key=None, secret_key=None,
+                 region_name=None, session_token=None, default_acl=None,
+                 limit=CONNECTION_LIMIT, connect_timeout=None, read_timeout=None):
+        if aiohttp is None:
+            raise errors.DriverClientError("aiohttp is required by the asynchronous S3 driver")
+        self.endpoint_url = endpoint_url.rstrip('/')
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region_name = region_name or 'us-east-1'
+        self.session_token = session_token
+        self.default_acl = default_acl
+        self.limit = limit
+        self.connect_timeout = connect_timeout or base.CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or base.READ_TIMEOUT
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.connect_timeout,
+                sock_read=self.read_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                headers={'User-Agent': base.USER_AGENT},
+            )
+        return self._session
+
+    def _get_url(self, bucket_id, name=None, params=None):
+        url = '%s/%s' % (self.endpoint_url, quote(bucket_id, safe=''))
+        if name is not None:
+            url += '/' + quote(name, safe='/~')
+        if params:
+            url += '?' + '&'.join(
+                '%s=%s' % (quote(key, safe='-_.~'), quote(str(value), safe='-_.~'))
+                for key, value in sorted(params.items())
+            )
+        return url
+
+    async def _request(self, method, bucket_id, name=None, params=None, headers=None, data=None):
+        """
+        Send a signed request.
+
+        :returns: Response, to be released by the caller
+        :rtype: :class:`aiohttp.ClientResponse`
+        """
+        url = self._get_url(bucket_id, name, params)
+        if self.access_key:
+            headers = sign_request(
+                method=method,
+                url=url,
+                headers=headers,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                region=self.region_name,
+                session_token=self.session_token,
+            )
+        logger.debug('%s %s', method, url)
+        try:
+            response = await self.session.request(
+                method,
+                yarl.URL(url, encoded=True),
+                headers=headers,
+                data=data,
+            )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+            raise errors.DriverConnectionError(str(err) or err.__class__.__name__)
+        if response.status >= 300:
+            body = await response.read()
+            response.release()
+            raise _get_error(response.status, body)
+        return response
+
+    async def _measure(self, response, start, block_size, stall_threshold):
+        meter = base.StreamMeter(start, stall_threshold)
+        try:
+            async for chunk in response.content.iter_chunked(block_size):
+                meter.add(chunk)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+            raise errors.DriverConnectionError(str(err) or err.__class__.__name__)
+        finally:
+            response.release()
+        return meter.result()
+
+    async def upload(self, bucket_id, name, content, acl=None, storage_class=None, **kwargs):
+        headers = {}
+        acl = acl or self.default_acl
+        if acl:
+            headers['x-amz-acl'] = acl
+        if storage_class:
+            headers['x-amz-storage-class'] = storage_class
+        if hasattr(content, 'read'):
+            size = base.get_content_size(content)
+            if size is None:
+                content = content.read()
+            else:
+                headers['Content-Length'] = str(size)
+                content = iter_content(content, size)
+        response = await self._request('PUT', bucket_id, name, headers=headers, data=content)
+        response.release()
+        return {'name': name}
+
+    async def download(self, url, block_size=65536, headers=None, stall_threshold=None, **kwargs):
+        logger.debug('GET %s', url)
+        start = time.perf_counter()
+        try:
+            response = await self.session.get(
+                yarl.URL(url, encoded=True),
+                headers=headers,
+            )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+            raise errors.DriverConnectionError(str(err) or err.__class__.__name__)
+        if response.status != 200:
+            body = await response.read()
+            response.release()
+            msg = '%s %s' % (url, body)
+            raise errors.InvalidHttpCode(msg, response.status)
+        return await self._measure(response, start, block_size, stall_threshold)
+
+    async def download_object(self, bucket_id, name, block_size=65536, stall_threshold=None, **kwargs):
+        start = time.perf_counter()
+        response = await self._request('GET', bucket_id, name)
+        return await self._measure(response, start, block_size, stall_threshold)
+
+    async def list_objects(self, bucket_id, prefix=None, **kwargs):
+        names = []
+        params = {'list-type': 2}
+        if prefix:
+            params['prefix'] = prefix
+        while True:
+            response = await self._request('GET', bucket_id, params=params)
+            body = await response.read()
+            response.release()
+            root = ElementTree.fromstring(body)
+            names += [
+                content.findtext(S3_NAMESPACE + 'Key')
+                for content in root.iter(S3_NAMESPACE + 'Contents')
+            ]
+            token = root.findtext(S3_NAMESPACE + 'NextContinuationToken')
+            if root.findtext(S3_NAMESPACE + 'IsTruncated') != 'true' or not token:
+                return names
+            params['continuation-token'] = token
+
+    async def head_object(self, bucket_id, name, **kwargs):
+        response = await self._request('HEAD', bucket_id, name)
+        response.release()
+        return {
+            'name': name,
+            'size': int(response.headers.get('Content-Length', 0)),
+            'etag': response.headers.get('ETag', '').strip('"') or None,
+        }
+
+    async def delete_object(self, bucket_id, name, **kwargs):
+        response = await self._request('DELETE', bucket_id, name)
+        response.release()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
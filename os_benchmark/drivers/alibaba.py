@@ -20,7 +20,6 @@ Configuration
 .. _`Object Storage Service`: https://www.alibabacloud.com/product/oss
 .. _`Alibaba Cloud`: https://www.alibabacloud.com/
 """
-import concurrent.futures
 from functools import wraps
 from urllib.parse import urlparse
 import oss2
@@ -131,32 +130,20 @@ class Driver(base.RequestsMixin, base.BaseDriver):
 
     def _multipart_upload(self, bucket_id, name, content, acl='public-read', multipart_chunksize=None, max_concurrency=None):
         bucket = self._get_bucket(bucket_id)
-        multipart_chunksize = multipart_chunksize or base.MULTIPART_CHUNKSIZE
-        max_concurrency = max_concurrency or base.MAX_CONCURRENCY
-
-        content_size = content.size
-        part_id = 1
-        offset = 0
-        parts = []
         upload_id = bucket.init_multipart_upload(name).upload_id
 
-        def _upload(part_id, offset):
+        def _upload(part_id, offset, content):
             self.logger.debug('Uploading %s part %s', name, part_id)
-            result = bucket.upload_part(name, upload_id, part_id, oss2.SizedFileAdapter(content, multipart_chunksize))
+            result = bucket.upload_part(name, upload_id, part_id, content)
             self.logger.debug('Done %s part %s', name, part_id)
-            parts.append(oss2.models.PartInfo(part_id, result.etag, size=multipart_chunksize, part_crc=result.crc))
-
-        pool_kwargs = {'max_workers': max_concurrency}
-        with concurrent.futures.ThreadPoolExecutor(**pool_kwargs) as executor:
-            futures = []
-            while offset < content_size:
-                chunk_size = min(multipart_chunksize, content_size - offset)
-                result = executor.submit(_upload, part_id=part_id, offset=offset)
-                futures.append(result)
-                part_id += 1
-                offset += multipart_chunksize
-            for future in futures:
-                future.result()
+            return oss2.models.PartInfo(part_id, result.etag, size=content.size, part_crc=result.crc)
+
+        uploader = base.MultiPartUploader(
+            content=content,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+        )
+        parts = uploader.run(_upload)
 
         bucket.complete_multipart_upload(name, upload_id, parts)
 
@@ -166,7 +153,8 @@ class Driver(base.RequestsMixin, base.BaseDriver):
                max_concurrency=None,
                **kwargs):
         multipart_threshold = multipart_threshold or base.MULTIPART_THRESHOLD
-        if content.size > multipart_threshold:
+        content, size = base.spool_content(content, multipart_threshold)
+        if size is None or size > multipart_threshold:
             self._multipart_upload(bucket_id, name, content, acl, multipart_chunksize, max_concurrency)
         else:
             self._simple_upload(bucket_id, name, content, acl)
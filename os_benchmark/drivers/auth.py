@@ -0,0 +1,92 @@
+"""
+On-disk cache of authentication tokens.
+
+Drivers authenticating with a token (Keystone, Backblaze, Storj access
+grants, Google OAuth) authenticate again in every process. With
+``token_cache`` enabled in a profile, tokens are cached in
+``~/.cache/os-benchmark/tokens`` (or ``$OSB_CACHE_DIR``), by a hash of the
+driver configuration, readable only by their owner, and reused until close
+to their expiration. The cache is disabled by default, as tokens are
+credentials written to disk: a cached Storj access grant doesn't expire
+and gives the same access as the API key and passphrase. Time spent authenticating is
+reported by benchmarks as ``auth_time``, and ``auth_cached`` tells if
+the token came from the cache.
+
+Configuration
+~~~~~~~~~~~~~
+
+.. code-block:: yaml
+
+  ---
+  mySwiftProfile:
+    driver: swift
+    # Disabled by default
+    token_cache: true
+    # Validity of tokens without known expiration, in seconds
+    token_ttl: 3600
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from os_benchmark import manifest
+
+TOKEN_DIR = 'tokens'
+# Minimum remaining validity of a reused token, in seconds
+TOKEN_MIN_TTL = 300
+
+logger = logging.getLogger('osb.auth')
+
+
+def get_token_path(driver, cache_dir=None):
+    """Get the cache path of a driver's token, named after its configuration"""
+    cache_dir = cache_dir or os.environ.get('OSB_CACHE_DIR') or manifest.CACHE_DIR
+    config = json.dumps({
+        'driver': driver.id,
+        'kwargs': driver.kwargs,
+    }, sort_keys=True, default=str)
+    digest = hashlib.sha256(config.encode()).hexdigest()
+    return os.path.join(os.path.expanduser(cache_dir), TOKEN_DIR, '%s.json' % digest)
+
+
+def read_token(path, min_ttl=TOKEN_MIN_TTL):
+    """
+    Read a cached token valid for at least ``min_ttl`` seconds.
+
+    :returns: Token or ``None`` if missing, invalid or expiring
+    """
+    try:
+        with open(path) as fd:
+            data = json.load(fd)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as err:
+        logger.warning("Ignoring invalid token cache %s: %s", path, err)
+        return None
+    if data.get('expires', 0) - time.time() < min_ttl:
+        return None
+    return data.get('token')
+
+
+def write_token(path, token, expires):
+    """Atomically write a token readable only by the current user"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump({'token': token, 'expires': expires}, tmp_file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def remove_token(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
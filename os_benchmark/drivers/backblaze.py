@@ -17,11 +17,14 @@ Configuration
 """
 from functools import wraps
 import hashlib
+import time
 from requests.packages.urllib3.util.retry import Retry
 from b2sdk import v2 as b2
 from b2sdk.v2 import api, exception, AbstractUploadSource
 from os_benchmark.drivers import base, errors
 
+HASH_BLOCK_SIZE = 2**20
+AUTH_TOKEN_TTL = 24 * 3600
 ACLS = {
     'public-read': 'allPublic',
     'private': 'allPrivate',
@@ -37,7 +40,14 @@ class UploadSourceFileIo(AbstractUploadSource):
 
     def get_content_sha1(self):
         self.file.seek(0)
-        return hashlib.sha1(self.file.read()).hexdigest()
+        sha1 = hashlib.sha1()
+        while True:
+            chunk = self.file.read(HASH_BLOCK_SIZE)
+            if not chunk:
+                break
+            sha1.update(chunk)
+        self.file.seek(0)
+        return sha1.hexdigest()
 
     def open(self):
         return self.file
@@ -60,6 +70,10 @@ def handle_request(method):
             raise errors.DriverConnectionError(err)
         except exception.TooManyRequests as err:
             raise errors.DriverServerError(err)
+        except exception.Unauthorized as err:
+            # Don't reuse a rejected token in next processes
+            self.forget_token()
+            raise errors.DriverAuthenticationError(err)
     return _handle_request
 
 
@@ -71,10 +85,11 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         if not hasattr(self, '_client'):
             self._account_info = b2.InMemoryAccountInfo()
             self._client = api.B2Api(self._account_info)
-            self.client.authorize_account(
-                'production',
-                self.kwargs['application_key_id'],
-                self.kwargs['application_key']
+            auth_data = self.authenticate(self._authorize_account)
+            self._account_info.set_auth_data(
+                application_key=self.kwargs['application_key'],
+                application_key_id=self.kwargs['application_key_id'],
+                **auth_data
             )
             retry = Retry(
                 total=self.retry,
@@ -92,6 +107,26 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             self._client.raw_api.b2_http.TIMEOUT = timeout
         return self._client
 
+    def _authorize_account(self):
+        self._client.authorize_account(
+            'production',
+            self.kwargs['application_key_id'],
+            self.kwargs['application_key']
+        )
+        info = self._account_info
+        auth_data = {
+            'account_id': info.get_account_id(),
+            'auth_token': info.get_account_auth_token(),
+            'api_url': info.get_api_url(),
+            'download_url': info.get_download_url(),
+            'recommended_part_size': info.get_recommended_part_size(),
+            'absolute_minimum_part_size': info.get_absolute_minimum_part_size(),
+            'realm': info.get_realm(),
+            's3_api_url': info.get_s3_api_url(),
+            'allowed': info.get_allowed(),
+        }
+        return auth_data, time.time() + AUTH_TOKEN_TTL
+
     @handle_request
     def list_buckets(self, **kwargs):
         buckets = self.client.list_buckets()
@@ -152,13 +187,12 @@ class Driver(base.RequestsMixin, base.BaseDriver):
 
         def _upload(part_id, offset, content, file_id):
             self.logger.debug('Uploading %s part %s', name, part_id)
-            part = base.MultiPart(content, multipart_chunksize)
-            upload_source = UploadSourceFileIo(part)
+            upload_source = UploadSourceFileIo(content)
             result = bucket.api.session.upload_part(
                 file_id=file_id,
                 part_number=part_id,
                 sha1_sum='do_not_verify',
-                content_length=part.size,
+                content_length=content.size,
                 input_stream=upload_source,
             )
             self.logger.debug('Done %s part %s', name, part_id)
@@ -196,9 +230,10 @@ class Driver(base.RequestsMixin, base.BaseDriver):
                validate_content=False, **kwargs):
         multipart_threshold = multipart_threshold or base.MULTIPART_THRESHOLD
         multipart_chunksize = multipart_chunksize or base.MULTIPART_CHUNKSIZE
+        content, size = base.spool_content(content, multipart_threshold)
 
         try:
-            if content.size > multipart_threshold:
+            if size is None or size > multipart_threshold:
                 self._multipart_upload(
                     bucket_id,
                     name,
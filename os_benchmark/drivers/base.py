@@ -1,16 +1,20 @@
 """
 Base Driver class module.
 """
+from collections import OrderedDict
 from urllib.parse import urljoin
+import io
 import logging
+import os
+import stat
+import threading
+import time
+import weakref
 
 import tenacity
 import concurrent.futures
-import requests
-from requests.adapters import HTTPAdapter as BaseHTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 
-from os_benchmark.drivers import errors
+from os_benchmark.drivers import auth, errors, timing
 
 USER_AGENT = 'os-benchmark/1.0 (Linux; U; en-US; rv:1.9.0.14) Gecko/20090203 Firefox/3.5.16'
 MULTIPART_THRESHOLD = 64*2**20
@@ -23,6 +27,13 @@ RETRY_STATUS_CODE = (408, 413, 429, 500, 503, 504)
 CONNECT_RETRY = 3
 READ_RETRY = 1
 STATUS_RETRY = 3
+STALL_THRESHOLD = 1
+URL_CACHE_SIZE = 2**17
+URL_CACHE_MIN_TTL = 300
+URL_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_read_locks = weakref.WeakKeyDictionary()
+_read_locks_lock = threading.Lock()
 
 retry = tenacity.Retrying(
     wait=tenacity.wait_exponential(),
@@ -30,35 +41,270 @@ retry = tenacity.Retrying(
 )
 
 
+class StreamMeter:
+    """
+    Measure a download stream, chunk by chunk, as received from a
+    synchronous or asynchronous body.
+
+    :param start: :func:`time.perf_counter` value when the request started
+    :param stall_threshold: Delay in seconds between two chunks considered
+                            as a stall
+    """
+    def __init__(self, start, stall_threshold=None):
+        self.start = start
+        self.stall_threshold = stall_threshold or STALL_THRESHOLD
+        self.first_byte = self.last = None
+        self.size = self.first_size = self.stalls = 0
+        self.stall_time = 0
+
+    def add(self, chunk):
+        now = time.perf_counter()
+        if self.first_byte is None:
+            self.first_byte = now
+            self.first_size = len(chunk)
+        elif now - self.last > self.stall_threshold:
+            self.stalls += 1
+            self.stall_time += now - self.last
+        self.last = now
+        self.size += len(chunk)
+
+    def result(self):
+        """
+        :returns: ``size``, ``ttfb``, ``transfer_time``, steady-state
+                  ``throughput`` in B/s excluding the first chunk,
+                  ``stalls`` count and ``stall_time``
+        """
+        end = time.perf_counter()
+        first_byte = self.first_byte or end
+        transfer_time = end - first_byte
+        throughput = None
+        if self.size > self.first_size and transfer_time:
+            throughput = (self.size - self.first_size) / transfer_time
+        return {
+            'size': self.size,
+            'ttfb': first_byte - self.start,
+            'transfer_time': transfer_time,
+            'throughput': throughput,
+            'stalls': self.stalls,
+            'stall_time': self.stall_time,
+        }
+
+
+def measure_download(chunks, start, stall_threshold=None):
+    """
+    Consume downloaded chunks and measure the stream.
+
+    :param chunks: Iterable of received chunks
+    :param start: :func:`time.perf_counter` value when the request started
+    :param stall_threshold: Delay in seconds between two chunks considered
+                            as a stall
+
+    :returns: Measurements from :meth:`StreamMeter.result`
+    """
+    meter = StreamMeter(start, stall_threshold)
+    for chunk in chunks:
+        meter.add(chunk)
+    return meter.result()
+
+
+class UrlCache:
+    """
+    Thread-safe LRU cache of expiring URLs, such as presigned ones.
+
+    URLs are evicted when they have less than ``min_ttl`` seconds left, so
+    a cached URL doesn't expire during a benchmark.
+    """
+    def __init__(self, max_size=URL_CACHE_SIZE, min_ttl=URL_CACHE_MIN_TTL):
+        self.max_size = max_size
+        self.min_ttl = min_ttl
+        self._urls = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._urls)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._urls:
+                return None
+            url, expires_at = self._urls[key]
+            if expires_at - time.monotonic() < self.min_ttl:
+                del self._urls[key]
+                return None
+            self._urls.move_to_end(key)
+            return url
+
+    def set(self, key, url, ttl):
+        with self._lock:
+            self._urls[key] = (url, time.monotonic() + ttl)
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.max_size:
+                self._urls.popitem(last=False)
+
+    def get_or_create(self, key, ttl, func):
+        """Get URL from cache or create it with ``func``"""
+        url = self.get(key)
+        if url is None:
+            url = func()
+            self.set(key, url, ttl)
+        return url
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+
+
+def get_read_lock(file_object):
+    """
+    Get the lock shared by all readers of ``file_object``, or a global one
+    if the object can't be weakly referenced.
+    """
+    with _read_locks_lock:
+        try:
+            return _read_locks.setdefault(file_object, threading.Lock())
+        except TypeError:
+            return _read_locks_lock
+
+
+def read_at(file_object, position, size, lock=None):
+    """
+    Read ``size`` bytes at ``position`` without relying on the shared
+    position of ``file_object``.
+
+    In-memory buffers are copied from a released view, without moving
+    their position, files are read with :func:`os.pread`, other objects
+    fall back to seek and read under ``lock``, by default the one from
+    :func:`get_read_lock`.
+    """
+    if hasattr(file_object, 'getbuffer'):
+        # A kept view would prevent resizing or closing the buffer
+        with file_object.getbuffer() as view:
+            return bytes(view[position:position+size])
+    try:
+        fileno = file_object.fileno()
+    except (AttributeError, OSError, ValueError):
+        fileno = None
+    if fileno is not None:
+        try:
+            return os.pread(fileno, size, position)
+        except OSError:
+            # Not a regular file
+            pass
+    with lock or get_read_lock(file_object):
+        file_object.seek(position)
+        return file_object.read(size)
+
+
+def get_content_size(content):
+    """
+    Get the size of an upload content, or ``None`` for streams of unknown
+    size such as pipes. Content is always uploaded from its start.
+    """
+    size = getattr(content, 'size', None)
+    if size is not None:
+        return size
+    try:
+        file_stat = os.fstat(content.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+    return file_stat.st_size
+
+
+class StreamContent:
+    """Non-seekable stream whose first bytes have already been read."""
+    size = None
+
+    def __init__(self, head, file_object):
+        self.head = memoryview(head)
+        self.file_object = file_object
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = bytes(self.head) + self.file_object.read()
+            self.head = memoryview(b'')
+            return data
+        data = bytes(self.head[:size])
+        # Release the head as soon as it is consumed
+        self.head = self.head[size:]
+        if len(data) < size:
+            data += self.file_object.read(size - len(data))
+        return data
+
+
+def spool_content(content, threshold):
+    """
+    Prepare a content of unknown size for upload.
+
+    Up to ``threshold`` bytes are read: a smaller stream is buffered and
+    returned with its size, a larger one is returned as a
+    :class:`StreamContent` with a ``None`` size, meant to be uploaded in
+    parts.
+
+    :returns: Content and its size
+    :rtype: tuple
+    """
+    size = get_content_size(content)
+    if size is not None:
+        return content, size
+    head = content.read(threshold + 1)
+    if len(head) <= threshold:
+        buffer = io.BytesIO(head)
+        buffer.size = len(head)
+        return buffer, buffer.size
+    return StreamContent(head, content), None
+
+
 class MultiPart:
-    """Object simulating part from file-object for multipart-upload."""
-    def __init__(self, file_object, size):
+    """
+    Object simulating part from file-object for multipart-upload.
+
+    Each part is an independent view starting at ``start`` in the
+    file-object, so several parts can be read concurrently.
+    """
+    def __init__(self, file_object, size, start=0, lock=None):
         self.file_object = file_object
         self.size = size
+        self.start = start
         self.offset = 0
+        self.lock = lock
 
     def read(self, chunksize=None):
         if self.offset >= self.size:
-            return ''
+            return b''
 
         if (chunksize is None or chunksize < 0) or (chunksize + self.offset >= self.size):
-            data = self.file_object.read(self.size - self.offset)
-            self.offset = self.size
-            return data
-
+            chunksize = self.size - self.offset
+        data = read_at(self.file_object, self.start + self.offset, chunksize, self.lock)
         self.offset += chunksize
-        return self.file_object.read(chunksize)
+        return data
 
     @property
     def len(self):
         return self.size
 
     def seek(self, pos, whence=0, /):
+        if whence == 1:
+            pos += self.offset
+        elif whence == 2:
+            pos += self.size
         self.offset = pos
+        return self.offset
+
+    def tell(self):
+        return self.offset
 
 
 class MultiPartUploader:
-    """Helper creating a thread pool and splitting file in several parts."""
+    """
+    Helper creating a thread pool and splitting file in several parts.
+
+    Parts are submitted as :class:`MultiPart` views and at most
+    ``max_concurrency`` parts are in flight, so memory is bounded by
+    ``max_concurrency * multipart_chunksize``. Content of unknown size is
+    read sequentially, one part buffer per in-flight part.
+    """
     def __init__(self, content, max_concurrency=None, multipart_chunksize=None, extra_upload_kwargs=None):
         self.content = content
         self.max_concurrency = max_concurrency or MAX_CONCURRENCY
@@ -67,28 +313,60 @@ class MultiPartUploader:
         self.logger = logging.getLogger('osb.uploader')
         self.futures = []
 
+    def iter_parts(self):
+        """Split content into :class:`MultiPart`"""
+        content_length = get_content_size(self.content)
+        if content_length is None:
+            while True:
+                data = self.content.read(self.multipart_chunksize)
+                if not data:
+                    return
+                yield MultiPart(io.BytesIO(data), len(data))
+
+        offset = 0
+        lock = threading.Lock()
+        while offset < content_length:
+            chunk_size = min(self.multipart_chunksize, content_length - offset)
+            yield MultiPart(self.content, chunk_size, start=offset, lock=lock)
+            offset += chunk_size
+
     def run(self, upload_func):
-        content_length = self.content.size
         part_id = 1
-        offset = 0
+        parts = self.iter_parts()
+        window = threading.BoundedSemaphore(self.max_concurrency)
+        failed = threading.Event()
 
-        pool_kwargs = {'max_workers': self.max_concurrency}
-        with concurrent.futures.ThreadPoolExecutor(**pool_kwargs) as executor:
-            self.logger.debug('Started uploader')
-            while offset < content_length:
-                chunk_size = min(self.multipart_chunksize, content_length - offset)
-                result = executor.submit(
-                    upload_func,
-                    content=self.content,
+        def upload_part(part_id, offset, part):
+            try:
+                return upload_func(
+                    content=part,
                     part_id=part_id,
                     offset=offset,
                     **self.extra_upload_kwargs,
                 )
+            except BaseException:
+                failed.set()
+                raise
+            finally:
+                window.release()
+
+        pool_kwargs = {'max_workers': self.max_concurrency}
+        with concurrent.futures.ThreadPoolExecutor(**pool_kwargs) as executor:
+            self.logger.debug('Started uploader')
+            offset = 0
+            while not failed.is_set():
+                # Wait for a free slot before reading the next part
+                window.acquire()
+                part = next(parts, None)
+                if part is None:
+                    window.release()
+                    break
+                result = executor.submit(upload_part, part_id, offset, part)
                 self.logger.debug('Submitted part %s (%s)', part_id, offset)
 
                 self.futures.append(result)
                 part_id += 1
-                offset += chunk_size
+                offset += part.size
 
             self.logger.debug('Waiting all upload')
         results = [
@@ -108,6 +386,11 @@ class BaseDriver:
     read_retry = READ_RETRY
     connect_retry = CONNECT_RETRY
     status_retry = STATUS_RETRY
+    http_phases = False
+    presigned_url_expiration = 3600
+    token_cache = False
+    # Validity assumed for tokens without known expiration, in seconds
+    token_ttl = 3600
 
     def __init__(
         self,
@@ -117,6 +400,9 @@ class BaseDriver:
         read_retry=None,
         connect_retry=None,
         status_retry=None,
+        http_phases=None,
+        token_cache=None,
+        token_ttl=None,
         **kwargs
     ):
         self.retry = retry or self.retry
@@ -125,6 +411,13 @@ class BaseDriver:
         self.read_retry = read_retry or self.read_retry
         self.connect_retry = connect_retry or self.connect_retry
         self.status_retry = status_retry or self.status_retry
+        self.http_phases = http_phases or self.http_phases
+        if token_cache is not None:
+            self.token_cache = token_cache
+        self.token_ttl = token_ttl or self.token_ttl
+        self.auth_timings = []
+        self.phase_timings = timing.PhaseTimings()
+        self.url_cache = UrlCache()
         self.kwargs = self._validate_kwargs(kwargs)
         self.logger = logging.getLogger('osb.driver')
 
@@ -134,6 +427,55 @@ class BaseDriver:
     def setup(self, **kwargs):
         """Initialiaze driver before benchmark"""
 
+    def authenticate(self, func):
+        """
+        Get a token from the on-disk cache, or by calling ``func``
+        returning a JSON serializable token and its expiration timestamp,
+        ``None`` meaning ``token_ttl`` from now. The time spent is appended
+        to :attr:`auth_timings`.
+
+        :returns: Token
+        """
+        start = time.perf_counter()
+        path = auth.get_token_path(self) if self.token_cache else None
+        token = auth.read_token(path) if path else None
+        cached = token is not None
+        if cached:
+            self.logger.debug("Reusing cached token %s", path)
+        else:
+            token, expires = func()
+            if path:
+                try:
+                    auth.write_token(path, token, expires or time.time() + self.token_ttl)
+                except OSError as err:
+                    self.logger.warning("Cannot cache token: %s", err)
+        self.auth_timings.append({
+            'time': time.perf_counter() - start,
+            'cached': cached,
+        })
+        return token
+
+    def get_stats(self):
+        """Driver specific measurements, reported in benchmark stats"""
+        return {}
+
+    def reset_stats(self):
+        """Forget driver specific measurements"""
+
+    def release(self):
+        """Release resources kept between operations, such as thread pools"""
+
+    def forget_token(self):
+        """Remove the cached token, when rejected by the server"""
+        if self.token_cache:
+            auth.remove_token(auth.get_token_path(self))
+
+    def reauthenticate(self, func):
+        """Get a new token with ``func``, when the current one is rejected"""
+        self.logger.debug("Token rejected, authenticating again")
+        self.forget_token()
+        return self.authenticate(func)
+
     def _validate_kwargs(self, kwargs):
         """Ensure kwargs passed to __init__ are correct."""
         return kwargs
@@ -166,10 +508,54 @@ class BaseDriver:
         """Get object URL"""
         raise NotImplementedError()
 
+    def get_urls(self, bucket_id, names, max_workers=None, **kwargs):
+        """
+        Get URLs of several objects, in the order of ``names``, with a
+        pool of workers.
+        """
+        max_workers = max_workers or URL_WORKERS
+        if max_workers <= 1 or len(names) < 2:
+            return [self.get_url(bucket_id, name, **kwargs) for name in names]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda name: self.get_url(bucket_id, name, **kwargs),
+                names,
+            ))
+
     def download(self, url, block_size=65536, headers=None, **kwargs):
-        """Download object from URL"""
+        """
+        Download object from URL
+
+        :returns: Stream measurements from :func:`measure_download`
+        """
         raise NotImplementedError()
 
+    def download_object(self, bucket_id, name, block_size=65536, stall_threshold=None, **kwargs):
+        """
+        Download object with the SDK instead of its URL
+
+        :returns: Stream measurements from :func:`measure_download`
+        """
+        raise NotImplementedError()
+
+    def head_object(self, bucket_id, name, **kwargs):
+        """
+        Get object metadata without its content
+
+        :returns: ``name`` and ``size``, and ``etag`` if available
+        """
+        raise NotImplementedError()
+
+    def get_async_driver(self, **kwargs):
+        """
+        Get an asynchronous interface of the driver, by default running
+        its methods in a thread pool.
+
+        :rtype: :class:`os_benchmark.drivers.aio.AsyncDriver`
+        """
+        from os_benchmark.drivers import aio
+        return aio.ThreadedAsyncDriver(self, **kwargs)
+
     def delete_object(self, bucket_id, name, **kwargs):
         """Delete object from a bucket"""
         raise NotImplementedError()
@@ -375,16 +761,37 @@ class BaseDriver:
             self.clean_bucket(bucket_id=bucket['id'], delete_bucket=True)
 
 
-class HTTPAdapter(BaseHTTPAdapter):
-    def __init__(self, timeout=None, *args, **kwargs):
-        self.timeout = 3 if timeout is None else timeout
-        super().__init__(*args, **kwargs)
+_http_adapter_class = None
+
 
-    def send(self, request, **kwargs):
-        timeout = kwargs.get("timeout")
-        if timeout is None:
-            kwargs["timeout"] = self.timeout
-        return super().send(request, **kwargs)
+def get_http_adapter_class():
+    """
+    Get the requests adapter with a default timeout, defined on first use
+    so that requests is only imported by drivers using it.
+    """
+    global _http_adapter_class
+    if _http_adapter_class is None:
+        from requests.adapters import HTTPAdapter as BaseHTTPAdapter
+
+        class HTTPAdapter(BaseHTTPAdapter):
+            def __init__(self, timeout=None, *args, **kwargs):
+                self.timeout = 3 if timeout is None else timeout
+                super().__init__(*args, **kwargs)
+
+            def send(self, request, **kwargs):
+                timeout = kwargs.get("timeout")
+                if timeout is None:
+                    kwargs["timeout"] = self.timeout
+                return super().send(request, **kwargs)
+
+        _http_adapter_class = HTTPAdapter
+    return _http_adapter_class
+
+
+def __getattr__(name):
+    if name == 'HTTPAdapter':
+        return get_http_adapter_class()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class RequestsMixin:
@@ -394,6 +801,8 @@ class RequestsMixin:
     @property
     def session(self):
         if not hasattr(self, '_session'):
+            import requests
+            from requests.packages.urllib3.util.retry import Retry
             self._session = requests.Session()
             self._session.headers = self.session_headers.copy()
             retry = Retry(
@@ -406,20 +815,32 @@ class RequestsMixin:
                 redirect=0
             )
             timeout = (self.connect_timeout, self.read_timeout)
-            adapter = HTTPAdapter(max_retries=retry, timeout=timeout)
+            adapter = get_http_adapter_class()(max_retries=retry, timeout=timeout)
+            if self.http_phases:
+                timing.install(adapter.poolmanager, self.phase_timings)
             self._session.mount('http://', adapter)
             self._session.mount('https://', adapter)
         return self._session
 
-    def download(self, url, block_size=65536, headers=None, **kwargs):
+    def download(self, url, block_size=65536, headers=None, stall_threshold=None, **kwargs):
+        import requests
         self.logger.debug('GET %s', url)
+        start = time.perf_counter()
         try:
             with self.session.get(url, stream=True, headers=headers) as response:
                 if response.status_code != 200:
                     self.logger.warning('GET %s: %s', url, response.status_code)
                     msg = '%s %s' % (url, response.content)
                     raise errors.InvalidHttpCode(msg, response.status_code)
-                for chunk in response.iter_content(chunk_size=block_size):
-                    pass
+                body_start = time.perf_counter()
+                result = measure_download(
+                    chunks=response.iter_content(chunk_size=block_size),
+                    start=start,
+                    stall_threshold=stall_threshold,
+                )
+                record = self.phase_timings.get_last()
+                if self.http_phases and record is not None:
+                    record['transfer'] += time.perf_counter() - body_start
         except requests.exceptions.ConnectionError as err:
             raise errors.DriverConnectionError(err.args[0])
+        return result
@@ -33,7 +33,7 @@ class Driver(swift.Driver):
     @property
     def session_headers(self):
         if not hasattr(self, '_session_headers'):
-            self.base_url, self.token = self.swift.get_auth()
+            self.base_url, self.token = self.swift.url, self.swift.token
             self._session_headers = {'X-Auth-Token': self.token}
         return self._session_headers
 
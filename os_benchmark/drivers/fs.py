@@ -10,14 +10,71 @@ Configuration
   myFsrofile:
     driver: fs
     path: /tmp/osn/
+    block_size: 1048576
+    upload_mode: auto
+    download_mode: readinto
+    direct_io: false
+
+To be a local-disk upper bound, data avoids Python objects where possible:
+
+- ``upload_mode: auto`` copies file objects backed by a file descriptor in
+  kernel with ``copy_file_range`` or ``sendfile``, and writes in-memory
+  buffers without copy; ``copy`` always reads the content by blocks
+- ``download_mode: readinto`` reads into a reusable buffer per thread,
+  ``mmap`` maps the file and copies it into this buffer, and ``read``
+  allocates a new bytes object for each block
+- ``direct_io: true`` opens files with ``O_DIRECT`` to bypass the page cache,
+  ``block_size`` must then be a multiple of 4096 and the filesystem must
+  support it (tmpfs doesn't)
 """
+import errno
+import mmap
 import os
 import shutil
-from os_benchmark.drivers import base
+import stat
+import threading
+import time
+from os_benchmark.drivers import base, errors
+
+BLOCK_SIZE = 2**20
+UPLOAD_MODES = ('auto', 'copy')
+DOWNLOAD_MODES = ('readinto', 'mmap', 'read')
+DIRECT_ALIGNMENT = 4096
+COPY_FALLBACK_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
 
 
 class Driver(base.BaseDriver):
     id = 'fs'
+    block_size = BLOCK_SIZE
+    upload_mode = 'auto'
+    download_mode = 'readinto'
+    direct_io = False
+
+    def __init__(self, *args, **kwargs):
+        for key in ('block_size', 'upload_mode', 'download_mode', 'direct_io'):
+            value = kwargs.pop(key, None)
+            if value is not None:
+                setattr(self, key, value)
+        if self.upload_mode not in UPLOAD_MODES:
+            raise errors.DriverConfigError("upload_mode must be one of %s" % (UPLOAD_MODES,))
+        if self.download_mode not in DOWNLOAD_MODES:
+            raise errors.DriverConfigError("download_mode must be one of %s" % (DOWNLOAD_MODES,))
+        if self.direct_io:
+            if not hasattr(os, 'O_DIRECT'):
+                raise errors.DriverFeatureUnsupported("O_DIRECT isn't available on this platform")
+            if self.block_size % DIRECT_ALIGNMENT:
+                raise errors.DriverConfigError("block_size must be a multiple of %s with direct_io" % DIRECT_ALIGNMENT)
+            if self.download_mode == 'mmap':
+                raise errors.DriverConfigError("mmap download_mode can't be used with direct_io")
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
 
     def setup(self, **kwargs):
         try:
@@ -47,7 +104,7 @@ class Driver(base.BaseDriver):
         self._create_directory(path)
         return {'id': name}
 
-    def delete_bucket(self, bucket_id):
+    def delete_bucket(self, bucket_id, **kwargs):
         path = os.path.join(self.path, bucket_id)
         try:
             shutil.rmtree(path)
@@ -64,10 +121,124 @@ class Driver(base.BaseDriver):
         for root, dirs, files in os.walk(path):
             for file_ in files:
                 bucket_files.append(
-                    file_
+                    os.path.relpath(os.path.join(root, file_), path)
                 )
         return bucket_files
 
+    def _get_buffer(self, size):
+        """Get a buffer reused by the thread, page-aligned for O_DIRECT"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) != size:
+            if self.direct_io:
+                buffer = memoryview(mmap.mmap(-1, size))
+            else:
+                buffer = memoryview(bytearray(size))
+            self._local.buffer = buffer
+        return buffer
+
+    def _open(self, path, flags):
+        if self.direct_io:
+            flags |= os.O_DIRECT
+        try:
+            return os.open(path, flags, 0o644)
+        except OSError as err:
+            if self.direct_io and err.errno == errno.EINVAL:
+                raise errors.DriverFeatureUnsupported("O_DIRECT isn't supported for %s" % path)
+            raise
+
+    def _copy_file(self, fd, content):
+        """
+        Copy a content backed by a regular file in kernel.
+
+        :returns: ``False`` if the content isn't a regular file
+        :rtype: bool
+        """
+        try:
+            src_fd = content.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        if not stat.S_ISREG(os.fstat(src_fd).st_mode):
+            return False
+        offset = content.tell()
+        count = os.fstat(src_fd).st_size - offset
+        copy_file_range = getattr(os, 'copy_file_range', None)
+        while count > 0:
+            try:
+                if copy_file_range is not None:
+                    sent = copy_file_range(src_fd, fd, count, offset)
+                else:
+                    sent = os.sendfile(fd, src_fd, offset, count)
+            except OSError as err:
+                # Cross-device or unsupported by the filesystem
+                if copy_file_range is None or err.errno not in COPY_FALLBACK_ERRNOS:
+                    raise
+                copy_file_range = None
+                continue
+            if not sent:
+                break
+            offset += sent
+            count -= sent
+        content.seek(offset)
+        return True
+
+    def _fill(self, content, buffer):
+        """Read content until the buffer is full or the end is reached"""
+        readinto = getattr(content, 'readinto', None)
+        filled = 0
+        while filled < len(buffer):
+            if readinto is not None:
+                read = readinto(buffer[filled:])
+            else:
+                chunk = content.read(len(buffer) - filled)
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                read = len(chunk)
+                buffer[filled:filled+read] = chunk
+            if not read:
+                break
+            filled += read
+        return filled
+
+    def _write(self, fd, content):
+        if self.upload_mode == 'auto':
+            if self._copy_file(fd, content):
+                return
+            if hasattr(content, 'getbuffer'):
+                with content.getbuffer() as view:
+                    _write_all(fd, view[content.tell():])
+                return
+        if hasattr(content, 'readinto'):
+            buffer = self._get_buffer(self.block_size)
+            while True:
+                read = self._fill(content, buffer)
+                if not read:
+                    break
+                _write_all(fd, buffer[:read])
+            return
+        while True:
+            chunk = content.read(self.block_size)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            _write_all(fd, chunk)
+
+    def _write_direct(self, fd, content):
+        """Write aligned blocks, padding the last one then truncating"""
+        buffer = self._get_buffer(self.block_size)
+        size = 0
+        while True:
+            read = self._fill(content, buffer)
+            if not read:
+                break
+            size += read
+            if read < len(buffer):
+                buffer[read:] = bytes(len(buffer) - read)
+            _write_all(fd, buffer)
+            if read < len(buffer):
+                break
+        os.ftruncate(fd, size)
+
     def upload(self, bucket_id, name, content, **kwargs):
         path = os.path.join(self.path, bucket_id, name)
         directory_path = os.path.dirname(path)
@@ -76,24 +247,81 @@ class Driver(base.BaseDriver):
         except FileExistsError:
             pass
 
-        mode = 'wb' if 'b' in content.mode else 'w'
-        with open(path, mode) as fd:
-            shutil.copyfileobj(
-                fsrc=content,
-                fdst=fd,
-            )
-        return name
+        fd = self._open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        try:
+            if self.direct_io:
+                self._write_direct(fd, content)
+            else:
+                self._write(fd, content)
+        finally:
+            os.close(fd)
+        return {'name': name}
 
     def get_url(self, bucket_id, name, **kwargs):
         path = os.path.join(self.path, bucket_id, name)
         url = 'file://%s' % path
         return url
 
-    def download(self, url, block_size=2048, **kwargs):
+    def _iter_read(self, fd, block_size):
+        return iter(lambda: os.read(fd, block_size), b'')
+
+    def _iter_readinto(self, fd, block_size):
+        buffer = self._get_buffer(block_size)
+        while True:
+            read = os.readv(fd, [buffer])
+            if not read:
+                return
+            yield buffer[:read]
+
+    def _iter_mmap(self, fd, block_size):
+        size = os.fstat(fd).st_size
+        if not size:
+            return
+        buffer = self._get_buffer(block_size)
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                for position in range(0, size, block_size):
+                    with view[position:position+block_size] as chunk:
+                        # Copy to fault the pages in, as a read would
+                        length = len(chunk)
+                        buffer[:length] = chunk
+                    yield buffer[:length]
+            finally:
+                view.release()
+
+    def download(self, url, block_size=None, stall_threshold=None, **kwargs):
         path = url.replace('file://', '')
-        with open(path, 'rb') as fd:
-            while fd.read(block_size):
-                pass
+        block_size = block_size or self.block_size
+        start = time.perf_counter()
+        fd = self._open(path, os.O_RDONLY)
+        try:
+            iter_chunks = getattr(self, '_iter_%s' % self.download_mode)
+            return base.measure_download(
+                chunks=iter_chunks(fd, block_size),
+                start=start,
+                stall_threshold=stall_threshold,
+            )
+        finally:
+            os.close(fd)
+
+    def download_object(self, bucket_id, name, block_size=None, stall_threshold=None, **kwargs):
+        return self.download(
+            url=self.get_url(bucket_id, name),
+            block_size=block_size,
+            stall_threshold=stall_threshold,
+        )
+
+    def head_object(self, bucket_id, name, **kwargs):
+        path = os.path.join(self.path, bucket_id, name)
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            msg = "Object %s/%s not found" % (bucket_id, name)
+            raise errors.DriverObjectUnfoundError(msg)
+        return {'name': name, 'size': size, 'etag': None}
 
     def download_stream(self, url, **kwargs):
         path = url.replace('file://', '')
@@ -19,10 +19,13 @@ Configuration
 .. _`Google Storage`: https://cloud.google.com/storage/
 .. _`Google Cloud`: https://cloud.google.com/
 """
+import calendar
+import datetime
 import json
 import requests
 import urllib3
 import tenacity
+from google.auth.transport import requests as google_requests
 from google.cloud import storage
 from google.cloud.client import service_account
 from google.api_core import exceptions
@@ -52,10 +55,15 @@ class Driver(base.RequestsMixin, base.BaseDriver):
     @property
     def client(self):
         if not hasattr(self, '_client'):
+            # Scoped by us, the client would use a copy of the credentials
             self.credentials = service_account.Credentials.from_service_account_info(
                 self.json,
+                scopes=storage.Client.SCOPE,
             )
             session = self.session
+            token = self.authenticate(self._refresh_credentials)
+            self.credentials.token = token['token']
+            self.credentials.expiry = datetime.datetime.utcfromtimestamp(token['expiry'])
             self._client = storage.Client(
                 credentials=self.credentials,
                 project=self.json['project_id'],
@@ -63,6 +71,11 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             self._client._http.adapters = session.adapters
         return self._client
 
+    def _refresh_credentials(self):
+        self.credentials.refresh(google_requests.Request(session=self.session))
+        expiry = calendar.timegm(self.credentials.expiry.timetuple())
+        return {'token': self.credentials.token, 'expiry': expiry}, expiry
+
     def list_buckets(self, **kwargs):
         buckets = self.client.list_buckets()
         return [{'id': c.name} for c in buckets]
@@ -139,11 +152,10 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         def _upload(part_id, offset, content):
             self.logger.debug('Uploading %s part %s', name, part_id)
             part_name = '%s-%s' % (name, part_id)
-            part = base.MultiPart(params['stream'], multipart_chunksize)
             part_params = params.copy()
             part_params.update({
-                'stream': part,
-                'size': part.size,
+                'stream': content,
+                'size': content.size,
             })
             self._simple_upload(bucket_id, part_name, **part_params)
             self.logger.debug('Done %s part %s', name, part_id)
@@ -215,12 +227,13 @@ class Driver(base.RequestsMixin, base.BaseDriver):
                validate_content=False, acl='public-read', **kwargs):
         multipart_threshold = multipart_threshold or base.MULTIPART_THRESHOLD
         oacl = OACLS[acl]
+        content, size = base.spool_content(content, multipart_threshold)
 
         params = {
             'stream': content,
             'client': self.client,
             'content_type': 'application/octet-stream',
-            'size': content.size,
+            'size': size,
             'timeout': (self.connect_timeout, self.read_timeout),
             'num_retries': 0,
             'predefined_acl': oacl,
@@ -229,7 +242,7 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             'if_metageneration_match': None,
             'if_metageneration_not_match': None,
         }
-        if content.size >= multipart_threshold:
+        if size is None or size >= multipart_threshold:
             self._multipart_upload(
                 bucket_id=bucket_id,
                 name=name,
@@ -21,6 +21,7 @@ Configuration
 All parameters except ``driver`` will be passed to ``minio.Minio``
 """
 import json
+from datetime import timedelta
 import ssl
 import urllib3
 
@@ -126,16 +127,20 @@ class Driver(base.RequestsMixin, base.BaseDriver):
                **kwargs):
         acl = acl or self.default_object_acl
         multipart_threshold = multipart_threshold or base.MULTIPART_THRESHOLD
+        size = base.get_content_size(content)
         params = {
             'bucket_name': bucket_id,
             'object_name': name,
             'data': content,
-            'length': content.size or -1,
+            'length': size or -1,
             'metadata': {}
         }
         if max_concurrency is not None:
             params['num_parallel_uploads'] = max_concurrency
-        if multipart_chunksize is not None and multipart_chunksize < content.size:
+        if size is None:
+            # Part size is required for streams
+            params['part_size'] = multipart_chunksize or base.MULTIPART_CHUNKSIZE
+        elif multipart_chunksize is not None and multipart_chunksize < size:
             params['part_size'] = multipart_chunksize
         if acl is not None:
             params['metadata']['x-amz-acl'] = acl
@@ -162,13 +167,21 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         self.logger.debug("Delete object params: %s", params)
         self.client.remove_object(**params)
 
-    def get_presigned_url(self, bucket_id, name, method='GET', **kwargs):
-        url = self.client.get_presigned_url(
-            method=method,
-            bucket_name=bucket_id,
-            object_name=name,
+    def get_presigned_url(self, bucket_id, name, method='GET', expiration=None, **kwargs):
+        expiration = expiration or self.presigned_url_expiration
+
+        def presign():
+            return self.client.get_presigned_url(
+                method=method,
+                bucket_name=bucket_id,
+                object_name=name,
+                expires=timedelta(seconds=expiration),
+            )
+        return self.url_cache.get_or_create(
+            key=(bucket_id, name, method, expiration),
+            ttl=expiration,
+            func=presign,
         )
-        return url
 
     def put_bucket_policy(self, bucket_id, object_id='*', **kwargs):
         policy = json.dumps({
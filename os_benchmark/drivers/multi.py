@@ -0,0 +1,328 @@
+"""
+Composite driver spreading operations over several endpoints or regions,
+to measure aggregate throughput and client-side endpoint selection.
+
+Configuration
+~~~~~~~~~~~~~
+
+.. code-block:: yaml
+
+  ---
+  wasabi_multi:
+    driver: multi
+    strategy: least-latency
+    defaults:
+      driver: wasabi
+      aws_access_key_id: <your_ak>
+      aws_secret_access_key: <your_sk>
+    endpoints:
+      - name: eu
+        region_name: eu-central-1
+      - name: us
+        region_name: us-east-1
+
+Each endpoint is a driver configuration, merged into ``defaults``. Buckets
+are created with the same name on every endpoint and each object is stored
+on the endpoint chosen at upload by ``strategy``:
+
+- ``round-robin``: endpoints in turn
+- ``least-latency``: endpoint with the lowest moving average of operation
+  time, endpoints without measurement first
+- ``consistent-hash``: endpoint given by a hash ring of object names,
+  stable when adding or removing endpoints
+
+Objects not uploaded by the driver, such as objects of a reused bucket,
+are looked up over endpoints on first use, with ``head_object`` or else a
+listing of the bucket. URLs are downloaded by the endpoints of their host.
+
+Benchmarks report operations, errors and time of each endpoint as
+``endpoint_<name>_*``.
+"""
+import bisect
+import hashlib
+import itertools
+import re
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+
+from os_benchmark import utils
+from os_benchmark.drivers import base, errors
+from os_benchmark.drivers import utils as driver_utils
+
+STRATEGIES = ('round-robin', 'least-latency', 'consistent-hash')
+# Weight of the last operation in the least-latency moving average
+LATENCY_ALPHA = .2
+# Points per endpoint on the consistent hash ring
+RING_REPLICAS = 64
+
+
+def _hash(value):
+    return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+
+class Endpoint:
+    """Endpoint driver and its measurements"""
+    def __init__(self, name, driver):
+        self.name = name
+        self.driver = driver
+        self.latency = None
+        self.timings = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def call(self, method, *args, count_unfound=True, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = getattr(self.driver, method)(*args, **kwargs)
+        except errors.DriverObjectUnfoundError:
+            # Not an error when looking for an object over endpoints
+            if count_unfound:
+                with self._lock:
+                    self.errors += 1
+            raise
+        except errors.DriverError:
+            with self._lock:
+                self.errors += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.timings.append(elapsed)
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency += LATENCY_ALPHA * (elapsed - self.latency)
+        return result
+
+    def reset_stats(self):
+        with self._lock:
+            self.timings = []
+            self.errors = 0
+
+
+class Driver(base.BaseDriver):
+    id = 'multi'
+    strategy = 'round-robin'
+
+    def __init__(self, *args, **kwargs):
+        endpoints = kwargs.pop('endpoints', None)
+        defaults = kwargs.pop('defaults', None) or {}
+        strategy = kwargs.pop('strategy', None)
+        if strategy:
+            self.strategy = strategy
+        if self.strategy not in STRATEGIES:
+            raise errors.DriverConfigError("Unknown strategy '%s', choose from %s" % (
+                self.strategy, ', '.join(STRATEGIES)))
+        if not endpoints:
+            raise errors.DriverConfigError("At least one endpoint is required")
+        super().__init__(*args, **kwargs)
+        self.endpoints = [
+            self._make_endpoint(i, dict(defaults, **config))
+            for i, config in enumerate(endpoints)
+        ]
+        names = [e.name for e in self.endpoints]
+        if len(set(names)) != len(names):
+            raise errors.DriverConfigError("Endpoint names must be unique")
+        self._counter = itertools.count()
+        self._ring = sorted(
+            (_hash('%s-%s' % (endpoint.name, i)), index)
+            for index, endpoint in enumerate(self.endpoints)
+            for i in range(RING_REPLICAS)
+        )
+        self._ring_keys = [point for point, index in self._ring]
+        # Endpoint index of objects, and endpoints by URL host
+        self._locations = {}
+        self._hosts = {}
+        self._listed_buckets = set()
+        self._list_lock = threading.Lock()
+
+    def _make_endpoint(self, index, config):
+        config = config.copy()
+        name = config.pop('name', None) or str(index)
+        key = config.pop('driver', None)
+        if not key:
+            raise errors.DriverConfigError("Endpoint %s has no driver" % name)
+        config.setdefault('read_timeout', self.read_timeout)
+        config.setdefault('connect_timeout', self.connect_timeout)
+        config.setdefault('http_phases', self.http_phases)
+        config.setdefault('token_cache', self.token_cache)
+        driver = driver_utils.get_driver_class(key)(**config)
+        # Measurements are collected by the composite driver
+        driver.phase_timings = self.phase_timings
+        driver.auth_timings = self.auth_timings
+        return Endpoint(re.sub(r'\W', '_', name), driver)
+
+    def _select(self, name):
+        if self.strategy == 'consistent-hash':
+            position = bisect.bisect(self._ring_keys, _hash(name)) % len(self._ring)
+            return self._ring[position][1]
+        if self.strategy == 'least-latency':
+            return min(
+                range(len(self.endpoints)),
+                key=lambda i: (self.endpoints[i].latency is not None, self.endpoints[i].latency or 0),
+            )
+        return next(self._counter) % len(self.endpoints)
+
+    def _locate(self, bucket_id, name):
+        index = self._locations.get((bucket_id, name))
+        if index is None:
+            index = self._find(bucket_id, name)
+        return self.endpoints[index]
+
+    def _find(self, bucket_id, name):
+        """
+        Find the endpoint of an object not uploaded or listed by this
+        driver, such as objects of a reused bucket.
+        """
+        first = self._select(name) if self.strategy == 'consistent-hash' else 0
+        indexes = [first] + [i for i in range(len(self.endpoints)) if i != first]
+        try:
+            for index in indexes:
+                try:
+                    self.endpoints[index].driver.head_object(bucket_id=bucket_id, name=name)
+                except errors.DriverObjectUnfoundError:
+                    continue
+                self._locations[(bucket_id, name)] = index
+                return index
+        except NotImplementedError:
+            # List the bucket once instead
+            with self._list_lock:
+                if bucket_id not in self._listed_buckets:
+                    self.list_objects(bucket_id=bucket_id)
+                    self._listed_buckets.add(bucket_id)
+        # Unknown objects fail on the first endpoint
+        return self._locations.get((bucket_id, name), first)
+
+    def _call_any(self, endpoints, method, **kwargs):
+        """Call endpoints in turn until one finds the object"""
+        for endpoint in endpoints[:-1]:
+            try:
+                return endpoint.call(method, count_unfound=False, **kwargs)
+            except errors.DriverObjectUnfoundError:
+                continue
+        return endpoints[-1].call(method, **kwargs)
+
+    def set_backend_logger(self, level):
+        for endpoint in self.endpoints:
+            endpoint.driver.set_backend_logger(level)
+
+    def setup(self, **kwargs):
+        for endpoint in self.endpoints:
+            endpoint.driver.setup(**kwargs)
+
+    def release(self):
+        for endpoint in self.endpoints:
+            endpoint.driver.release()
+
+    def get_stats(self):
+        stats = {}
+        for endpoint in self.endpoints:
+            timings = list(endpoint.timings)
+            prefix = 'endpoint_%s_' % endpoint.name
+            stats[prefix + 'ops'] = len(timings)
+            stats[prefix + 'errors'] = endpoint.errors
+            stats[prefix + 'time_avg'] = statistics.mean(timings) if timings else None
+            stats[prefix + 'time_perc95'] = utils.percentile95(timings) if timings else None
+        return stats
+
+    def reset_stats(self):
+        for endpoint in self.endpoints:
+            endpoint.reset_stats()
+
+    def list_buckets(self, **kwargs):
+        bucket_ids = set()
+        for endpoint in self.endpoints:
+            bucket_ids.update(b['id'] for b in endpoint.driver.list_buckets(**kwargs))
+        return [{'id': bucket_id} for bucket_id in sorted(bucket_ids)]
+
+    def create_bucket(self, name, **kwargs):
+        for endpoint in self.endpoints:
+            endpoint.driver.create_bucket(name=name, **kwargs)
+        return {'id': name}
+
+    def get_bucket(self, bucket_id, **kwargs):
+        for endpoint in self.endpoints:
+            endpoint.driver.get_bucket(bucket_id=bucket_id, **kwargs)
+        return {'id': bucket_id}
+
+    def delete_bucket(self, bucket_id, **kwargs):
+        for endpoint in self.endpoints:
+            endpoint.driver.delete_bucket(bucket_id=bucket_id, **kwargs)
+
+    def list_objects(self, bucket_id, **kwargs):
+        names = []
+        for index, endpoint in enumerate(self.endpoints):
+            for name in endpoint.driver.list_objects(bucket_id=bucket_id, **kwargs):
+                self._locations[(bucket_id, name)] = index
+                names.append(name)
+        return names
+
+    def upload(self, bucket_id, name, content, **kwargs):
+        index = self._select(name)
+        obj = self.endpoints[index].call('upload', bucket_id=bucket_id, name=name, content=content, **kwargs)
+        self._locations[(bucket_id, obj['name'])] = index
+        return obj
+
+    def get_url(self, bucket_id, name, **kwargs):
+        endpoint = self._locate(bucket_id, name)
+        url = endpoint.driver.get_url(bucket_id=bucket_id, name=name, **kwargs)
+        endpoints = self._hosts.setdefault(urlparse(url).netloc, [])
+        if endpoint not in endpoints:
+            endpoints.append(endpoint)
+        return url
+
+    def download(self, url, **kwargs):
+        # Endpoints sharing a host, or all for URLs of unknown hosts
+        endpoints = self._hosts.get(urlparse(url).netloc) or self.endpoints
+        return self._call_any(endpoints, 'download', url=url, **kwargs)
+
+    def download_object(self, bucket_id, name, **kwargs):
+        endpoint = self._locate(bucket_id, name)
+        return endpoint.call('download_object', bucket_id=bucket_id, name=name, **kwargs)
+
+    def head_object(self, bucket_id, name, **kwargs):
+        endpoint = self._locate(bucket_id, name)
+        return endpoint.call('head_object', bucket_id=bucket_id, name=name, **kwargs)
+
+    def copy_object(self, bucket_id, name, dst_bucket_id, dst_name, **kwargs):
+        # Copies stay on the source endpoint
+        endpoint = self._locate(bucket_id, name)
+        result = endpoint.call(
+            'copy_object',
+            bucket_id=bucket_id,
+            name=name,
+            dst_bucket_id=dst_bucket_id,
+            dst_name=dst_name,
+            **kwargs
+        )
+        self._locations[(dst_bucket_id, dst_name)] = self.endpoints.index(endpoint)
+        return result
+
+    def delete_object(self, bucket_id, name, **kwargs):
+        endpoint = self._locate(bucket_id, name)
+        endpoint.call('delete_object', bucket_id=bucket_id, name=name, **kwargs)
+        self._locations.pop((bucket_id, name), None)
+
+    def delete_objects(self, bucket_id, names, **kwargs):
+        names_by_endpoint = {}
+        for name in names:
+            names_by_endpoint.setdefault(self._locate(bucket_id, name), []).append(name)
+        for endpoint, endpoint_names in names_by_endpoint.items():
+            endpoint.call('delete_objects', bucket_id=bucket_id, names=endpoint_names, **kwargs)
+            for name in endpoint_names:
+                self._locations.pop((bucket_id, name), None)
+
+    def clean_bucket(self, bucket_id, delete_bucket=True, skip_lock=None):
+        for endpoint in self.endpoints:
+            endpoint.driver.clean_bucket(bucket_id=bucket_id, delete_bucket=delete_bucket, skip_lock=skip_lock)
+        for key in [k for k in self._locations if k[0] == bucket_id]:
+            del self._locations[key]
+        self._listed_buckets.discard(bucket_id)
+
+    def clean(self):
+        for endpoint in self.endpoints:
+            endpoint.driver.clean()
+        self._locations.clear()
+        self._hosts.clear()
+        self._listed_buckets.clear()
@@ -31,7 +31,6 @@ Configuration
 .. _`Object Storage`: https://www.oracle.com/cloud/storage/object-storage.html
 .. _`Oracle Cloud`: https://www.oracle.com/cloud
 """
-import concurrent.futures
 from functools import wraps
 import oci
 from oci.object_storage import models
@@ -44,30 +43,6 @@ ACLS = {
 }
 
 
-class MultiPart:
-    """Object simulating part from file-object for multipart-upload."""
-    def __init__(self, file_object, size):
-        self.file_object = file_object
-        self.size = size
-        self.offset = 0
-
-    def read(self, chunksize=None):
-        if self.offset >= self.size:
-            return ''
-
-        if (chunksize is None or chunksize < 0) or (chunksize + self.offset >= self.size):
-            data = self.file_object.read(self.size - self.offset)
-            self.offset = self.size
-            return data
-
-        self.offset += chunksize
-        return self.file_object.read(chunksize)
-
-    @property
-    def len(self):
-        return self.size
-
-
 def handle_request(method):
     @wraps(method)
     def _handle_request(self, *args, **kwargs):
@@ -156,14 +131,6 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         return [o.name for o in response.data.objects]
 
     def _multipart_upload(self, bucket_id, name, content, multipart_chunksize=None, max_concurrency=None):
-        multipart_chunksize = multipart_chunksize or base.MULTIPART_CHUNKSIZE
-        max_concurrency = max_concurrency or base.MAX_CONCURRENCY
-
-        content_size = content.size
-        part_id = 1
-        offset = 0
-        parts = []
-
         create_multipart_upload_details = models.CreateMultipartUploadDetails(
             object=name,
         )
@@ -174,37 +141,27 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         )
         upload_id = upload_data.data.upload_id
 
-        def _upload(part_id, chunk_size):
+        def _upload(part_id, offset, content):
             self.logger.debug('Uploading %s part %s', name, part_id)
-            part = MultiPart(content, chunk_size)
             response = self.client.upload_part(
                 namespace_name=self.kwargs['namespace'],
                 bucket_name=bucket_id,
                 object_name=name,
                 upload_part_num=part_id,
-                upload_part_body=part,
+                upload_part_body=content,
                 upload_id=upload_id
             )
             self.logger.debug('Done %s part %s', name, part_id)
-            return part_id, response.headers['etag']
+            return models.CommitMultipartUploadPartDetails(
+                part_num=part_id, etag=response.headers['etag'],
+            )
 
-        pool_kwargs = {'max_workers': max_concurrency}
-        with concurrent.futures.ThreadPoolExecutor(**pool_kwargs) as executor:
-            futures = []
-            while offset < content_size:
-                chunk_size = min(multipart_chunksize, content_size - offset)
-                # result = _upload(part_id=part_id, chunk_size=chunk_size)
-                result = executor.submit(_upload, part_id=part_id, chunk_size=chunk_size)
-                futures.append(result)
-                part_id += 1
-                offset += multipart_chunksize
-            for future in futures:
-                part_id, etag = future.result()
-                parts.append(
-                    models.CommitMultipartUploadPartDetails(
-                        part_num=part_id, etag=etag,
-                    )
-                )
+        uploader = base.MultiPartUploader(
+            content=content,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+        )
+        parts = uploader.run(_upload)
 
         commit_multipart_upload_details = models.CommitMultipartUploadDetails(
             parts_to_commit=parts
@@ -231,7 +188,7 @@ class Driver(base.RequestsMixin, base.BaseDriver):
                max_concurrency=None,
                **kwargs):
         multipart_threshold = multipart_threshold or base.MULTIPART_THRESHOLD
-        self.logger.debug('Multipart: %s > %s -> %s', content.size, multipart_threshold, content.size > multipart_threshold)
+        self.logger.debug('Multipart: %s > %s', base.get_content_size(content), multipart_threshold)
         # if content.size > multipart_threshold:
         if True:
             self._multipart_upload(bucket_id, name, content, multipart_chunksize, max_concurrency)
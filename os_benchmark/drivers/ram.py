@@ -9,64 +9,138 @@ Configuration
   ---
   myRamProfile:
     driver: ram
+    lock_stripes: 64
+
+Objects are stored as immutable ``bytes`` shared by copies and downloads,
+which are served as ``memoryview`` slices without copy. Objects are spread
+over ``lock_stripes`` locks by bucket and name, so concurrent operations on
+different objects of a bucket don't contend, and a single lock is only
+taken to create, delete or list buckets. It measures the overhead of the
+benchmark harness itself.
 """
-import io
-from shutil import copyfileobj
+import threading
+import time
 from urllib.parse import urlparse
 from os_benchmark.drivers import base, errors
 
+LOCK_STRIPES = 64
+
+
+def _to_bytes(content):
+    """Get content as bytes, without copy if already bytes"""
+    if isinstance(content, bytes):
+        return content
+    if isinstance(content, (bytearray, memoryview)):
+        return bytes(content)
+    if hasattr(content, 'getbuffer'):
+        with content.getbuffer() as view:
+            return bytes(view[content.tell():])
+    data = content.read()
+    if isinstance(data, str):
+        data = data.encode()
+    return data
+
+
 class Driver(base.BaseDriver):
     id = 'ram'
+    lock_stripes = LOCK_STRIPES
 
-    def __init__(self):
+    def __init__(self, *args, **kwargs):
+        lock_stripes = kwargs.pop('lock_stripes', None)
+        if lock_stripes:
+            self.lock_stripes = lock_stripes
         self.buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._locks = [threading.Lock() for i in range(self.lock_stripes)]
+        super().__init__(*args, **kwargs)
+
+    def _get_lock(self, bucket_id, name):
+        return self._locks[hash((bucket_id, name)) % self.lock_stripes]
+
+    def _get_objects(self, bucket_id):
+        try:
+            return self.buckets[bucket_id]
+        except KeyError:
+            raise errors.DriverBucketUnfoundError("Bucket %s not found" % bucket_id)
+
+    def _get_object(self, bucket_id, name):
+        try:
+            return self._get_objects(bucket_id)[name]
+        except KeyError:
+            raise errors.DriverObjectUnfoundError("Object %s/%s not found" % (bucket_id, name))
 
     def list_buckets(self, **kwargs):
-        return [{'id': b} for b in self.buckets]
+        return [{'id': b} for b in list(self.buckets)]
+
+    def get_bucket(self, bucket_id, **kwargs):
+        self._get_objects(bucket_id)
+        return {'id': bucket_id}
 
     def delete_bucket(self, bucket_id, **kwargs):
-        self.buckets.pop(bucket_id, None)
+        with self._buckets_lock:
+            self.buckets.pop(bucket_id, None)
 
     def create_bucket(self, name, **kwargs):
-        self.buckets[name] = {}
+        with self._buckets_lock:
+            self.buckets.setdefault(name, {})
         return {'id': name}
 
     def list_objects(self, bucket_id, **kwargs):
-        if bucket_id not in self.buckets:
-            raise errors.DriverBucketUnfoundError("Bucket not found")
-        return list(self.buckets[bucket_id])
+        objects = self._get_objects(bucket_id)
+        # Snapshot of names, insertions and removals are atomic
+        with self._buckets_lock:
+            return list(objects)
 
     def upload(self, bucket_id, name, content, acl='public-read', **kwargs):
-        if bucket_id not in self.buckets:
-            raise errors.DriverBucketUnfoundError("Bucket not found")
-
-        stored = io.BytesIO()
-        copyfileobj(content, stored)
-        stored.seek(0)
-
-        self.buckets[bucket_id][name] = stored
+        objects = self._get_objects(bucket_id)
+        data = _to_bytes(content)
+        with self._get_lock(bucket_id, name):
+            objects[name] = data
         return {'name': name}
 
+    def head_object(self, bucket_id, name, **kwargs):
+        return {
+            'name': name,
+            'size': len(self._get_object(bucket_id, name)),
+            'etag': None,
+        }
+
+    def copy_object(self, bucket_id, name, dst_bucket_id, dst_name, **kwargs):
+        data = self._get_object(bucket_id, name)
+        objects = self._get_objects(dst_bucket_id)
+        # Immutable content is shared
+        with self._get_lock(dst_bucket_id, dst_name):
+            objects[dst_name] = data
+        return {'name': dst_name}
+
     def delete_object(self, bucket_id, name, **kwargs):
-        if bucket_id not in self.buckets:
-            raise errors.DriverBucketUnfoundError("Bucket not found")
-        self.buckets[bucket_id].pop(name, None)
+        objects = self._get_objects(bucket_id)
+        with self._get_lock(bucket_id, name):
+            objects.pop(name, None)
+
+    def delete_objects(self, bucket_id, names, **kwargs):
+        objects = self._get_objects(bucket_id)
+        for name in names:
+            with self._get_lock(bucket_id, name):
+                objects.pop(name, None)
 
     def get_url(self, bucket_id, name, **kwargs):
         return 'ram://%s/%s' % (bucket_id, name)
 
-    def download(self, url, block_size=65536, **kwargs):
-        parsed_url = urlparse(url)
-
-        bucket_id = parsed_url.netloc
-        if bucket_id not in self.buckets:
-            raise errors.DriverBucketUnfoundError("Bucket not found")
+    def _measure(self, data, block_size, stall_threshold):
+        start = time.perf_counter()
+        view = memoryview(data)
+        return base.measure_download(
+            chunks=(view[i:i+block_size] for i in range(0, len(view), block_size)),
+            start=start,
+            stall_threshold=stall_threshold,
+        )
 
-        obj_name = parsed_url.path[1:]
-        if obj_name not in self.buckets[bucket_id]:
-            raise errors.DriverObjectUnfoundError("Object not found")
+    def download(self, url, block_size=65536, stall_threshold=None, **kwargs):
+        parsed_url = urlparse(url)
+        data = self._get_object(parsed_url.netloc, parsed_url.path[1:])
+        return self._measure(data, block_size, stall_threshold)
 
-        fd = self.buckets[bucket_id][obj_name]
-        for chunk in fd.read(block_size):
-            pass
-        self.buckets[bucket_id][obj_name].seek(0)
+    def download_object(self, bucket_id, name, block_size=65536, stall_threshold=None, **kwargs):
+        data = self._get_object(bucket_id, name)
+        return self._measure(data, block_size, stall_threshold)
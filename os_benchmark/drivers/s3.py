@@ -17,17 +17,28 @@ Configuration
     region_name: eu-west-1
 
 All parameters except ``driver`` will be passed to ``boto3.resource``.
+
+Transfers reuse a long-lived transfer manager per configuration, set
+``transfer_manager_reuse: false`` to create one for each upload as
+``upload_fileobj`` does.
 """
 import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from functools import wraps
 
 import botocore
 import boto3
-from boto3.s3.transfer import TransferConfig
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from s3transfer.subscribers import BaseSubscriber
 
-from os_benchmark.drivers import base, errors
+from os_benchmark.drivers import base, errors, timing
 
+# Transfer managers kept for other configurations, each one owns a thread pool
+TRANSFER_MANAGERS_MAX = 4
 
 def handle_request(method):
     @wraps(method)
@@ -62,18 +73,73 @@ def handle_request(method):
                 raise errors.DriverAuthenticationError(msg)
             if code == 'NoSuchBucket':
                 raise errors.DriverBucketUnfoundError(msg)
+            if code == 'NoSuchKey':
+                raise errors.DriverObjectUnfoundError(msg)
             if code == 'AccessDenied':
                 raise errors.DriverPermissionError(msg)
             raise
     return _handle_request
 
 
+class NullSink:
+    """
+    Seekable file-object discarding data written by a transfer manager,
+    the written sizes are exposed as chunks for
+    :func:`~os_benchmark.drivers.base.measure_download`.
+    """
+    def __init__(self):
+        self.position = 0
+        self._sizes = queue.Queue()
+
+    def seekable(self):
+        return True
+
+    def seek(self, position, whence=0):
+        self.position = position
+        return position
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        self.position += len(data)
+        self._sizes.put(len(data))
+        return len(data)
+
+    def close(self):
+        self._sizes.put(None)
+
+    def iter_chunks(self):
+        while True:
+            size = self._sizes.get()
+            if size is None:
+                return
+            # Sized placeholder, data has been discarded
+            yield range(size)
+
+
+class SinkSubscriber(BaseSubscriber):
+    """Provide the known object size and close the sink when done."""
+    def __init__(self, sink, size=None):
+        self.sink = sink
+        self.size = size
+
+    def on_queued(self, future, **kwargs):
+        if self.size is not None:
+            # Avoid a HeadObject request
+            future.meta.provide_transfer_size(self.size)
+
+    def on_done(self, future, **kwargs):
+        self.sink.close()
+
+
 class Driver(base.RequestsMixin, base.BaseDriver):
     id = 's3'
     default_acl = None
     default_object_acl = None
     old_acl = True
     manage_public_access_block = False
+    transfer_manager_reuse = True
 
     default_kwargs = {}
     default_config = {}
@@ -87,6 +153,15 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         # 'proxies': proxies,
     }
 
+    def __init__(self, *args, **kwargs):
+        transfer_manager_reuse = kwargs.pop('transfer_manager_reuse', None)
+        if transfer_manager_reuse is not None:
+            self.transfer_manager_reuse = transfer_manager_reuse
+        self._transfer_managers = {}
+        self._transfer_manager_users = {}
+        self._transfer_managers_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
     def set_backend_logger(self, verbosity):
         if verbosity == 4:
             boto3.set_stream_logger('botocore')
@@ -112,6 +187,8 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             kwargs['config'] = botocore.client.Config(**config)
 
             self._s3 = boto3.resource('s3', **kwargs)
+            if self.http_phases and not timing.install_botocore(self._s3.meta.client, self.phase_timings):
+                self.logger.warning("HTTP phase timings unsupported by this botocore version")
         return self._s3
 
     @handle_request
@@ -204,17 +281,18 @@ class Driver(base.RequestsMixin, base.BaseDriver):
 
     @handle_request
     def list_objects(self, bucket_id, **kwargs):
+        # Pages are limited to 1000 keys
+        paginator = self.s3.meta.client.get_paginator('list_objects_v2')
+        objects = []
         try:
-            response = self.s3.meta.client.list_objects(
-                Bucket=bucket_id,
-            )
+            for page in paginator.paginate(Bucket=bucket_id):
+                objects += [o['Key'] for o in page.get('Contents', [])]
         except botocore.exceptions.ClientError as err:
             code = err.response['Error']['Code']
             msg = err.response['Error'].get('Message', err.args[0])
             if code == 'NoSuchBucket':
                 raise errors.DriverBucketUnfoundError(msg)
             raise
-        objects = [o['Key'] for o in response.get('Contents', [])]
         return objects
 
     @handle_request
@@ -311,6 +389,62 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             for t in response.get('TagSet', [])
         }
 
+    @contextmanager
+    def transfer_manager(self, multipart_threshold=None, multipart_chunksize=None,
+                         max_concurrency=None):
+        """
+        Use a transfer manager shared by every transfer with the same
+        configuration, its thread pool is created once. Beyond
+        ``TRANSFER_MANAGERS_MAX``, least recently used managers are shut
+        down once no transfer uses them.
+        """
+        key = (
+            multipart_threshold or base.MULTIPART_THRESHOLD,
+            multipart_chunksize or base.MULTIPART_CHUNKSIZE,
+            max_concurrency or base.MAX_CONCURRENCY,
+        )
+        with self._transfer_managers_lock:
+            manager = self._transfer_managers.pop(key, None)
+            if manager is None:
+                transfer_config = TransferConfig(
+                    multipart_threshold=key[0],
+                    multipart_chunksize=key[1],
+                    max_concurrency=key[2],
+                )
+                self.logger.debug("New transfer manager: %s", key)
+                manager = create_transfer_manager(
+                    self.s3.meta.client,
+                    transfer_config,
+                )
+            # Most recently used last
+            self._transfer_managers[key] = manager
+            self._transfer_manager_users[key] = self._transfer_manager_users.get(key, 0) + 1
+        try:
+            yield manager
+        finally:
+            with self._transfer_managers_lock:
+                self._transfer_manager_users[key] -= 1
+                evicted = self._pop_idle_transfer_managers(TRANSFER_MANAGERS_MAX)
+            for evicted_manager in evicted:
+                evicted_manager.shutdown()
+
+    def _pop_idle_transfer_managers(self, keep):
+        """Remove least recently used managers without transfer beyond ``keep``"""
+        evicted = []
+        for key in list(self._transfer_managers):
+            if len(self._transfer_managers) <= keep:
+                break
+            if not self._transfer_manager_users.get(key):
+                evicted.append(self._transfer_managers.pop(key))
+                self._transfer_manager_users.pop(key, None)
+        return evicted
+
+    def release(self):
+        with self._transfer_managers_lock:
+            evicted = self._pop_idle_transfer_managers(0)
+        for manager in evicted:
+            manager.shutdown()
+
     @handle_request
     def upload(self, bucket_id, name, content, acl=None,
                multipart_threshold=None, multipart_chunksize=None,
@@ -326,21 +460,36 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         multipart_chunksize = multipart_chunksize or base.MULTIPART_CHUNKSIZE
         max_concurrency = max_concurrency or base.MAX_CONCURRENCY
 
-        transfer_config = TransferConfig(
-            multipart_threshold=multipart_threshold,
-            max_concurrency=max_concurrency,
-            multipart_chunksize=multipart_chunksize,
-        )
-        params = {
-            'Fileobj': content,
-            'Bucket': bucket_id,
-            'Key': name,
-            'ExtraArgs': extra,
-            'Config': transfer_config,
-        }
-        self.logger.debug("Upload obj params: %s", params)
         try:
-            self.s3.meta.client.upload_fileobj(**params)
+            if self.transfer_manager_reuse:
+                with self.transfer_manager(
+                    multipart_threshold=multipart_threshold,
+                    multipart_chunksize=multipart_chunksize,
+                    max_concurrency=max_concurrency,
+                ) as manager:
+                    self.logger.debug("Upload obj %s/%s: %s", bucket_id, name, extra)
+                    future = manager.upload(
+                        fileobj=content,
+                        bucket=bucket_id,
+                        key=name,
+                        extra_args=extra,
+                    )
+                    future.result()
+            else:
+                transfer_config = TransferConfig(
+                    multipart_threshold=multipart_threshold,
+                    max_concurrency=max_concurrency,
+                    multipart_chunksize=multipart_chunksize,
+                )
+                params = {
+                    'Fileobj': content,
+                    'Bucket': bucket_id,
+                    'Key': name,
+                    'ExtraArgs': extra,
+                    'Config': transfer_config,
+                }
+                self.logger.debug("Upload obj params: %s", params)
+                self.s3.meta.client.upload_fileobj(**params)
         except botocore.exceptions.ClientError as err:
             code = err.response['Error']['Code']
             msg = err.response['Error']['Message']
@@ -352,6 +501,102 @@ class Driver(base.RequestsMixin, base.BaseDriver):
 
         return {'name': name}
 
+    @handle_request
+    def download_object(self, bucket_id, name, block_size=65536, stall_threshold=None,
+                        ranged=False, size=None, multipart_threshold=None,
+                        multipart_chunksize=None, max_concurrency=None, **kwargs):
+        """
+        Download object with ``get_object`` or, if ``ranged``, with
+        concurrent ranged requests of a transfer manager.
+
+        :param size: Known object size, avoiding a ``HeadObject`` request
+                     for ranged downloads
+        """
+        self.logger.debug('GET %s/%s', bucket_id, name)
+        start = time.perf_counter()
+        if not ranged:
+            response = self.s3.meta.client.get_object(Bucket=bucket_id, Key=name)
+            body = response['Body']
+            body_start = time.perf_counter()
+            try:
+                result = base.measure_download(
+                    chunks=body.iter_chunks(block_size),
+                    start=start,
+                    stall_threshold=stall_threshold,
+                )
+            finally:
+                body.close()
+            record = self.phase_timings.get_last()
+            if self.http_phases and record is not None:
+                record['transfer'] += time.perf_counter() - body_start
+            return result
+
+        with self.transfer_manager(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+        ) as manager:
+            sink = NullSink()
+            future = manager.download(
+                bucket=bucket_id,
+                key=name,
+                fileobj=sink,
+                subscribers=[SinkSubscriber(sink, size)],
+            )
+            result = base.measure_download(
+                chunks=sink.iter_chunks(),
+                start=start,
+                stall_threshold=stall_threshold,
+            )
+            try:
+                future.result()
+            except botocore.exceptions.ClientError as err:
+                # Without size, the manager's HeadObject fails without message
+                if err.response['Error']['Code'] == '404':
+                    msg = "Object %s/%s not found" % (bucket_id, name)
+                    raise errors.DriverObjectUnfoundError(msg)
+                raise
+        return result
+
+    @handle_request
+    def head_object(self, bucket_id, name, **kwargs):
+        try:
+            response = self.s3.meta.client.head_object(Bucket=bucket_id, Key=name)
+        except botocore.exceptions.ClientError as err:
+            if err.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                msg = "Object %s/%s not found" % (bucket_id, name)
+                raise errors.DriverObjectUnfoundError(msg)
+            raise
+        return {
+            'name': name,
+            'size': response['ContentLength'],
+            'etag': response.get('ETag', '').strip('"') or None,
+        }
+
+    def get_async_driver(self, native=True, **kwargs):
+        """
+        Get a native aiohttp driver using the resolved endpoint and
+        credentials, or with ``native=False`` run this driver in threads.
+        """
+        from os_benchmark.drivers import aio
+        if not native or aio.aiohttp is None:
+            return super().get_async_driver(**kwargs)
+        client = self.s3.meta.client
+        credentials = client._request_signer._credentials
+        if credentials is not None:
+            credentials = credentials.get_frozen_credentials()
+        return aio.S3AsyncDriver(
+            endpoint_url=client.meta.endpoint_url,
+            access_key=credentials.access_key if credentials else None,
+            secret_key=credentials.secret_key if credentials else None,
+            session_token=credentials.token if credentials else None,
+            region_name=client.meta.region_name,
+            default_acl=self.default_object_acl if self.old_acl else None,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            **kwargs
+        )
+
     @handle_request
     def delete_object(self, bucket_id, name, skip_lock=None, version_id=None, **kwargs):
         params = {
@@ -555,13 +800,20 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         return magnet
 
     @handle_request
-    def get_presigned_url(self, bucket_id, name, expiration=3600, **kwargs):
-        url = self.s3.meta.client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket_id, 'Key': name},
-            ExpiresIn=expiration
+    def get_presigned_url(self, bucket_id, name, expiration=None, **kwargs):
+        expiration = expiration or self.presigned_url_expiration
+
+        def presign():
+            return self.s3.meta.client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': bucket_id, 'Key': name},
+                ExpiresIn=expiration
+            )
+        return self.url_cache.get_or_create(
+            key=(bucket_id, name, expiration),
+            ttl=expiration,
+            func=presign,
         )
-        return url
 
     @handle_request
     def enable_bucket_website(self, bucket_id, **kwargs):
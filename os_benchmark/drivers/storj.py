@@ -14,14 +14,22 @@ Configuration
     api_key: <key>
     passphrase: <pass>
 
+With ``token_cache: true``, the access grant derived from the API key and
+passphrase is cached on disk: it is a long-lived secret, giving the same
+access as both.
+
 .. _uplink-python: https://github.com/storj-thirdparty/uplink-python
 """
+import time
 from urllib.parse import urlparse
 from uplink_python.uplink import Uplink
 from uplink_python import errors as uplink_errors
 from uplink_python import module_classes
 from os_benchmark.drivers import base, errors
 
+# Access grants don't expire, they are derived again from time to time
+ACCESS_CACHE_TTL = 24 * 3600
+
 
 class Driver(base.RequestsMixin, base.BaseDriver):
     id = 'storj'
@@ -38,11 +46,8 @@ class Driver(base.RequestsMixin, base.BaseDriver):
         if not hasattr(self, '_access'):
             try:
                 if self.kwargs.get('api_key'):
-                    self._access = self.uplink.request_access_with_passphrase(
-                        satellite=self.kwargs['satellite'],
-                        api_key=self.kwargs['api_key'],
-                        passphrase=self.kwargs['passphrase'],
-                    )
+                    serialized_access = self.authenticate(self._request_access)
+                    self._access = self.uplink.parse_access(serialized_access)
                 elif 'access_grant' in self.kwargs:
                     self._access = self.uplink.parse_access(self.kwargs['access_grant'])
             except uplink_errors.InternalError as err:
@@ -50,6 +55,15 @@ class Driver(base.RequestsMixin, base.BaseDriver):
                 raise errors.DriverConfigError(msg)
         return self._access
 
+    def _request_access(self):
+        # Derivation of the encryption key from the passphrase is slow
+        access = self.uplink.request_access_with_passphrase(
+            satellite=self.kwargs['satellite'],
+            api_key=self.kwargs['api_key'],
+            passphrase=self.kwargs['passphrase'],
+        )
+        return access.serialize(), time.time() + ACCESS_CACHE_TTL
+
     @property
     def project(self):
         if not hasattr(self, '_project'):
@@ -122,16 +136,20 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             name,
         )
 
-    def download(self, url, block_size=65536, **kwargs):
+    def download(self, url, block_size=65536, stall_threshold=None, **kwargs):
         self.logger.debug('GET %s', url)
         if self.mode == 'http':
-            return super().download(url, block_size=block_size, **kwargs)
+            return super().download(url, block_size=block_size, stall_threshold=stall_threshold, **kwargs)
 
+        start = time.perf_counter()
         parsed_url = urlparse(url)
         download = self.project.download_object(parsed_url.netloc, parsed_url.path[1:])
         block_num = (download.file_size() // block_size) + 1
-        for i in range(block_num):
-            download.read(block_size)
+        return base.measure_download(
+            chunks=(download.read(block_size)[0] for i in range(block_num)),
+            start=start,
+            stall_threshold=stall_threshold,
+        )
 
     def _get_link_sharing_key(self):
         url = 'https://auth.storjsatelliteshare.io/v1/access'
@@ -39,8 +39,16 @@ class Driver(base.RequestsMixin, base.BaseDriver):
             kwargs.update(self.kwargs)
             kwargs['os_options'].update(os_options)
             self._swift = swiftclient.Connection(**kwargs)
+            self._swift.url, self._swift.token = self.authenticate(self._get_auth)
+            # Called by swiftclient only once a token is rejected with 401
+            self._swift.get_auth = lambda: self.reauthenticate(self._get_auth)
         return self._swift
 
+    def _get_auth(self):
+        # Keystone doesn't give the expiration through swiftclient
+        url, token = swiftclient.Connection.get_auth(self._swift)
+        return [url, token], None
+
     def setup(self, **kwargs):
         self.service_kwargs = kwargs.copy()
         self.service_kwargs.update(
@@ -0,0 +1,162 @@
+"""
+Per-phase HTTP timing for urllib3-based clients.
+
+Connection pools of a ``requests`` session or a botocore client are
+replaced by subclasses whose connections record, for every request, the
+time spent in DNS resolution, TCP connect, TLS handshake, sending the
+request (``transfer``) and waiting for the response headers (``ttfb``).
+Reused connections report zero for the connection phases.
+"""
+import socket
+import threading
+import time
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer')
+
+
+class PhaseTimings:
+    """Thread-safe collector of per-request phase timings."""
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+        self._local.last = record
+
+    def get_last(self):
+        """Get the last record added by the current thread"""
+        return getattr(self._local, 'last', None)
+
+    def get_values(self, phase):
+        with self._lock:
+            return [r[phase] for r in self.records if r.get(phase) is not None]
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+
+class PhaseTimingMixin:
+    """Mixin for urllib3 connections recording phases into ``phase_timings``."""
+    phase_timings = None
+    _pending_phases = None
+    _connect_end = 0
+    _connect_duration = 0
+    _failed_connect_duration = 0
+    _request_start = 0
+    _request_end = 0
+
+    def _new_conn(self):
+        # Private urllib3 attribute, not timed if missing
+        dns_host = getattr(self, '_dns_host', None)
+        if dns_host is None:
+            return super()._new_conn()
+        from urllib3.exceptions import ConnectTimeoutError
+        from urllib3.util.connection import allowed_gai_family
+
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(dns_host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            infos = []
+        dns_end = time.perf_counter()
+        error = None
+        # Try every address like urllib3.util.connection.create_connection,
+        # the connect phase is the successful attempt
+        try:
+            # Without address, let urllib3 raise its own error
+            for info in infos or [None]:
+                if info is not None:
+                    self._dns_host = info[4][0]
+                attempt_start = time.perf_counter()
+                try:
+                    sock = super()._new_conn()
+                except ConnectTimeoutError as err:
+                    error = err
+                    continue
+                self._failed_connect_duration = attempt_start - dns_end
+                self._pending_phases = {
+                    'dns': dns_end - start,
+                    'connect': time.perf_counter() - attempt_start,
+                }
+                return sock
+        finally:
+            self._dns_host = dns_host
+        raise error
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        self._connect_end = time.perf_counter()
+        self._connect_duration = self._connect_end - start
+        phases = self._pending_phases or {'dns': 0, 'connect': 0}
+        tls = self._connect_duration - phases['dns'] - self._failed_connect_duration - phases['connect']
+        phases['tls'] = max(tls, 0)
+        self._failed_connect_duration = 0
+        self._pending_phases = phases
+
+    def request(self, *args, **kwargs):
+        self._request_start = time.perf_counter()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            self._request_end = time.perf_counter()
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        end = time.perf_counter()
+        record = self._pending_phases or {'dns': 0, 'connect': 0, 'tls': 0}
+        self._pending_phases = None
+        transfer = self._request_end - self._request_start
+        # Connection may be lazily established while sending
+        if self._connect_end > self._request_start:
+            transfer -= self._connect_duration
+        record['transfer'] = max(transfer, 0)
+        record['ttfb'] = end - self._request_end
+        if self.phase_timings is not None:
+            self.phase_timings.add(record)
+        return response
+
+
+def get_pool_classes(pool_classes_by_scheme, phase_timings):
+    """Subclass connection pools to use phase-timed connections."""
+    pool_classes = {}
+    for scheme, pool_class in pool_classes_by_scheme.items():
+        conn_class = pool_class.ConnectionCls
+        timed_conn_class = type('Timed%s' % conn_class.__name__, (PhaseTimingMixin, conn_class), {
+            'phase_timings': phase_timings,
+        })
+        pool_classes[scheme] = type('Timed%s' % pool_class.__name__, (pool_class,), {
+            'ConnectionCls': timed_conn_class,
+        })
+    return pool_classes
+
+
+def install(pool_manager, phase_timings):
+    """Make a urllib3 pool manager record phases into ``phase_timings``."""
+    pool_manager.pool_classes_by_scheme = get_pool_classes(
+        pool_manager.pool_classes_by_scheme,
+        phase_timings,
+    )
+    return pool_manager.pool_classes_by_scheme
+
+
+def install_botocore(client, phase_timings):
+    """
+    Make a botocore client record phases into ``phase_timings``.
+
+    Its HTTP session is a private botocore attribute, checked first.
+
+    :returns: ``False`` if this botocore version isn't supported
+    :rtype: bool
+    """
+    http_session = getattr(getattr(client, '_endpoint', None), 'http_session', None)
+    pool_manager = getattr(http_session, '_manager', None)
+    if not hasattr(pool_manager, 'pool_classes_by_scheme') or \
+            not hasattr(http_session, '_pool_classes_by_scheme'):
+        return False
+    http_session._pool_classes_by_scheme = install(pool_manager, phase_timings)
+    return True
@@ -0,0 +1,170 @@
+"""
+Manifest of objects stored in a bucket.
+
+A manifest is a JSON lines file with an entry per object, at least its
+``name`` and ``size``. Entries are flushed one by one, so a manifest of an
+interrupted run lists every object created before the interruption.
+
+Manifests are also cached locally, by driver configuration and bucket, to
+reuse a bucket without listing it and computing its URLs again. A cached
+manifest starts with a header line describing the bucket.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from os_benchmark.drivers import errors as driver_errors
+
+CACHE_DIR = '~/.cache/os-benchmark'
+CACHE_TTL = 24 * 3600
+# Cached objects checked before reusing a cached manifest
+CACHE_SAMPLES = 3
+
+logger = logging.getLogger('osb.manifest')
+
+
+def read_manifest(path):
+    """
+    Read manifest entries, ignoring a truncated last line.
+
+    :returns: Entries, empty if the file doesn't exist
+    :rtype: list
+    """
+    entries = []
+    try:
+        with open(path) as fd:
+            for line in fd:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("Ignoring invalid manifest line: %s", line)
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+class ManifestWriter:
+    """Thread-safe manifest writer"""
+    def __init__(self, path, entries=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = open(path, 'w')
+        for entry in entries or []:
+            self.write(entry)
+
+    def write(self, entry):
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            self._fd.write(line)
+            self._fd.flush()
+
+    def close(self):
+        with self._lock:
+            self._fd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def to_json(value):
+    """Get value as loaded back from JSON, to compare with cached data"""
+    return json.loads(json.dumps(value, sort_keys=True, default=str))
+
+
+def get_cache_path(driver, bucket_id, cache_dir=None):
+    """
+    Get the path of the cached manifest of a bucket, named after a hash of
+    the driver configuration so credentials aren't written.
+    """
+    cache_dir = cache_dir or os.environ.get('OSB_CACHE_DIR') or CACHE_DIR
+    config = json.dumps({
+        'driver': driver.id,
+        'kwargs': driver.kwargs,
+        'bucket_id': bucket_id,
+    }, sort_keys=True, default=str)
+    digest = hashlib.sha256(config.encode()).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(cache_dir), '%s-%s.jsonl' % (driver.id, digest))
+
+
+def write_cache(path, header, entries):
+    """
+    Atomically write a cached manifest readable only by the current user,
+    as it may contain presigned URLs. The ``created`` time of the header is
+    kept if given, so rewriting a cache doesn't extend its validity.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    header = dict(header)
+    header.setdefault('created', time.time())
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            tmp_file.write(json.dumps(header) + '\n')
+            for entry in entries:
+                tmp_file.write(json.dumps(entry) + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logger.debug("Cached manifest of %s objects in %s", len(entries), path)
+
+
+def read_cache(path, max_age=CACHE_TTL):
+    """
+    Read a cached manifest.
+
+    :returns: Header and entries, header is ``None`` if the cache is
+              missing, invalid or older than ``max_age``
+    :rtype: tuple
+    """
+    entries = read_manifest(path)
+    if not entries:
+        return None, []
+    header, entries = entries[0], entries[1:]
+    if 'created' not in header or time.time() - header['created'] > max_age:
+        logger.debug("Cached manifest %s expired", path)
+        return None, []
+    return header, entries
+
+
+def check_cache_entries(driver, bucket_id, entries, samples=CACHE_SAMPLES):
+    """
+    Check that randomly sampled cached objects still exist with the same
+    size, to detect buckets changed outside the tool.
+
+    :returns: ``False`` if a sampled object is missing or changed, ``True``
+              otherwise, or if the driver can't get object metadata
+    :rtype: bool
+    """
+    for entry in random.sample(entries, min(samples, len(entries))):
+        try:
+            obj = driver.head_object(bucket_id=bucket_id, name=entry['name'])
+        except NotImplementedError:
+            return True
+        except driver_errors.DriverObjectUnfoundError:
+            logger.debug("Cached object %s not found", entry['name'])
+            return False
+        if None not in (entry.get('size'), obj.get('size')) and entry['size'] != obj['size']:
+            logger.debug("Cached object %s changed", entry['name'])
+            return False
+    return True
+
+
+def remove_cache(path):
+    """Invalidate a cached manifest"""
+    try:
+        os.remove(path)
+        logger.debug("Removed cached manifest %s", path)
+    except FileNotFoundError:
+        pass
@@ -1,6 +1,24 @@
-from concurrent.futures import ThreadPoolExecutor
-from os_benchmark import utils
+import argparse
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from os_benchmark import utils, manifest
 from os_benchmark.benchmarks import base
+from os_benchmark.drivers import errors as driver_errors
+
+PROGRESS_INTERVAL = 5
+
+logger = logging.getLogger('osb')
+
+
+def key_depth_type(value):
+    """Argparse type converting a tree depth to a key layout"""
+    try:
+        depth = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid key depth '%s'" % value)
+    return utils.key_layout_type('deep-tree:%s' % depth) if depth else 'random'
 
 
 def make_parser_args(parser):
@@ -13,8 +31,17 @@ def make_parser_args(parser):
     parser.add_argument('--object-size', type=int)
     parser.add_argument('--object-number', type=int)
     parser.add_argument('--object-prefix', required=False)
+    parser.add_argument('--key-layout', type=utils.key_layout_type, default='random',
+                        help="Distribution of object keys: %s." % ', '.join(utils.KEY_LAYOUTS))
+    parser.add_argument('--key-depth', dest='key_layout', type=key_depth_type,
+                        help="Put objects under N levels of hashed directories, alias of --key-layout deep-tree:N.")
 
     parser.add_argument('--clean', action="store_true")
+    parser.add_argument('--manifest', required=False,
+                        help="File receiving the created objects as JSON lines.")
+    parser.add_argument('--resume', action="store_true",
+                        help="Only create objects missing from the bucket listing.")
+    parser.add_argument('--progress-interval', type=float, default=PROGRESS_INTERVAL)
 
     parser.add_argument('--multipart-threshold', type=int, default=base.MULTIPART_THREHOLD)
     parser.add_argument('--multipart-chunksize', type=int, default=base.MULTIPART_CHUNKSIZE)
@@ -22,6 +49,34 @@ def make_parser_args(parser):
     parser.add_argument('--parallel-objects', type=int, default=1)
 
 
+def get_resume_entries(args, driver, bucket_id):
+    """
+    Diff the manifest against the bucket listing.
+
+    :returns: Entries of objects already in the bucket and names of
+              manifest entries to upload again
+    :rtype: tuple
+    """
+    listed = set(driver.list_objects(bucket_id=bucket_id))
+    entries = manifest.read_manifest(args.manifest) if args.manifest else []
+    done = [e for e in entries if e['name'] in listed]
+    missing = [e['name'] for e in entries if e['name'] not in listed]
+    known = set(e['name'] for e in entries)
+    # Objects listed but not in manifest, created by another way
+    done += [{'name': n, 'size': None} for n in sorted(listed - known)]
+    return done, missing
+
+
+def iter_names(args, count, names=None):
+    """Yield ``count`` names to upload, given ones first"""
+    names = (names or [])[:count]
+    for name in names:
+        yield name
+    key_layout = utils.KeyLayout(args.key_layout, prefix=args.object_prefix)
+    for i in range(count - len(names)):
+        yield key_layout()
+
+
 def run(args, driver):
     bucket_id = args.bucket_id
     if not bucket_id:
@@ -31,19 +86,93 @@ def run(args, driver):
         )
         bucket_id = bucket['id']
     elif bucket_id and args.clean:
+        manifest.remove_cache(manifest.get_cache_path(driver, bucket_id))
         driver.clean_bucket(bucket_id=bucket_id, delete_bucket=False)
 
-    with ThreadPoolExecutor(max_workers=args.parallel_objects) as executor:
-        for i in range(args.object_number):
-            content = utils.get_random_content(args.object_size)
-            obj = executor.submit(
-                driver.upload,
-                bucket_id=bucket_id,
-                storage_class=args.storage_class,
-                name=utils.get_random_name(),
-                content=content,
-                multipart_threshold=args.multipart_threshold,
-                multipart_chunksize=args.multipart_chunksize,
-                max_concurrency=args.max_concurrency,
-            )
+    done, missing = [], []
+    if args.resume and args.bucket_id and not args.clean:
+        done, missing = get_resume_entries(args, driver, bucket_id)
+        logger.info("Resuming with %s objects found, %s to upload again",
+                    len(done), len(missing))
+    count = max(args.object_number - len(done), 0)
+
+    entries = list(done)
+    writer = None
+    if args.manifest:
+        writer = manifest.ManifestWriter(args.manifest, entries=done)
+
+    errors = Counter()
+    uploaded = 0
+    start = last_report = time.perf_counter()
+
+    def upload_object(name):
+        content = utils.get_random_content(args.object_size)
+        driver.upload(
+            bucket_id=bucket_id,
+            storage_class=args.storage_class,
+            name=name,
+            content=content,
+            multipart_threshold=args.multipart_threshold,
+            multipart_chunksize=args.multipart_chunksize,
+            max_concurrency=args.max_concurrency,
+        )
+        entry = {'name': name, 'size': args.object_size}
+        if writer is not None:
+            writer.write(entry)
+        entries.append(entry)
+        return entry
+
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        rate = uploaded / elapsed if elapsed else 0
+        logger.info(
+            "%s %s/%s objects, %.1f obj/s, %.2f MB/s, %s errors",
+            "Uploaded" if final else "Uploading",
+            uploaded, count, rate, rate * args.object_size / 2**20,
+            sum(errors.values()),
+        )
+
+    # Bound pending uploads instead of submitting every object up front
+    max_pending = args.parallel_objects * 2
+    pending = set()
+    try:
+        with ThreadPoolExecutor(max_workers=args.parallel_objects) as executor:
+            names = iter_names(args, count, missing)
+            while True:
+                for name in names:
+                    pending.add(executor.submit(upload_object, name))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    try:
+                        future.result()
+                        uploaded += 1
+                    except Exception as err:
+                        # Errors not wrapped by drivers don't abort the load
+                        logger.warning("Upload error: %s", err)
+                        errors[err.__class__.__name__] += 1
+                if time.perf_counter() - last_report >= args.progress_interval:
+                    report()
+                    last_report = time.perf_counter()
+    finally:
+        if writer is not None:
+            writer.close()
+
+    report(final=True)
+    for error, error_count in errors.items():
+        logger.error("%s: %s", error, error_count)
+    write_cache(driver, bucket_id, entries)
     print(bucket_id)
+
+
+def write_cache(driver, bucket_id, entries):
+    """Cache the bucket manifest for benchmarks reusing the bucket"""
+    try:
+        bucket = driver.get_bucket(bucket_id=bucket_id)
+        header = {'bucket': manifest.to_json(bucket), 'presigned': None}
+        manifest.write_cache(manifest.get_cache_path(driver, bucket_id), header, entries)
+    except (driver_errors.DriverError, OSError) as err:
+        logger.warning("Cannot cache manifest: %s", err)
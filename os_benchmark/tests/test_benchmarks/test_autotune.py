@@ -0,0 +1,79 @@
+from unittest import TestCase
+from os_benchmark.tests import utils
+from os_benchmark.benchmarks import autotune, upload
+
+
+class ParseIntListTest(TestCase):
+    def test_func(self):
+        self.assertEqual(autotune.parse_int_list('1,2,4'), (1, 2, 4))
+
+
+class TuneTest(TestCase):
+    def test_func(self):
+        def probe(chunksize, concurrency):
+            return chunksize * concurrency, 0
+
+        config, trials = autotune.tune(
+            probe=probe,
+            candidates={'chunksize': (1, 2, 3), 'concurrency': (1, 4)},
+            initial={'chunksize': 1, 'concurrency': 1},
+        )
+        self.assertEqual(config, {'chunksize': 3, 'concurrency': 4})
+        # Each configuration is probed once
+        configs = [tuple(sorted(t[0].items())) for t in trials]
+        self.assertEqual(len(configs), len(set(configs)))
+
+    def test_error_rate(self):
+        def probe(chunksize):
+            return chunksize, .5 if chunksize > 2 else 0
+
+        config, trials = autotune.tune(
+            probe=probe,
+            candidates={'chunksize': (1, 2, 3)},
+            initial={'chunksize': 1},
+            max_error_rate=.1,
+        )
+        self.assertEqual(config, {'chunksize': 2})
+
+    def test_no_valid(self):
+        config, trials = autotune.tune(
+            probe=lambda chunksize: (chunksize, 1),
+            candidates={'chunksize': (1, 2)},
+            initial={'chunksize': 1},
+        )
+        self.assertEqual(config, {'chunksize': 1})
+
+
+class UploadAutotuneTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = upload.Benchmark(self.driver)
+        self.bench.params.update({
+            'object_size': 4,
+            'object_number': 1,
+            'multipart_threshold': 1,
+            'multipart_chunksize': 1,
+            'max_concurrency': 1,
+            'parallel_objects': 1,
+            'autotune': True,
+            'autotune_chunksizes': (1, 2),
+            'autotune_concurrencies': (1, 2),
+            'autotune_samples': 1,
+        })
+
+    def test_func(self):
+        self.bench.setup()
+        self.assertIn(self.bench.params['multipart_chunksize'], (1, 2))
+        self.assertIn(self.bench.params['max_concurrency'], (1, 2))
+        self.assertTrue(self.bench.autotune_trials)
+        self.bench.run()
+        stats = self.bench.make_stats()
+        self.assertEqual(stats['autotune'], 1)
+        self.assertEqual(stats['autotune_trials'], len(self.bench.autotune_trials))
+
+    def test_single_part(self):
+        self.bench.params['multipart_threshold'] = 8
+        self.bench.setup()
+        self.assertEqual(self.bench.autotune_trials, [])
+        self.bench.run()
+        self.assertEqual(self.bench.make_stats()['autotune'], 0)
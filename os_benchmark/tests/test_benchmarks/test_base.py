@@ -1,5 +1,10 @@
-from unittest import TestCase
+import os
+import time
+import tempfile
+from unittest import TestCase, mock
+from os_benchmark import manifest
 from os_benchmark.tests import utils
+from os_benchmark.drivers import ram
 from os_benchmark.benchmarks import base
 
 
@@ -19,6 +24,43 @@ class BaseBenchmarkMakeAggrTest(TestCase):
         self.bench._make_aggr(values=values)
 
 
+class BaseBenchmarkMakeDriverStatsTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.driver.auth_timings.append({'time': 1, 'cached': False})
+        self.bench = base.BaseBenchmark(self.driver)
+
+    def test_no_auth(self):
+        self.assertNotIn('auth_time', self.bench._make_driver_stats())
+
+    def test_auth(self):
+        self.driver.auth_timings.append({'time': .5, 'cached': True})
+        stats = self.bench._make_driver_stats()
+        self.assertEqual(stats['auth_time'], .5)
+        self.assertEqual(stats['auth_cached'], 1)
+
+
+class BaseBenchmarkMakeStreamStatsTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = base.BaseBenchmark(self.driver)
+
+    def test_func(self):
+        results = [
+            {'ttfb': .1, 'throughput': 2**20, 'stalls': 1, 'stall_time': 2},
+            {'ttfb': .3, 'throughput': None, 'stalls': 0, 'stall_time': 0},
+            None,
+        ]
+        stats = self.bench._make_stream_stats(results)
+        self.assertEqual(stats['ttfb_max'], .3)
+        self.assertEqual(stats['stream_bw_avg'], 1)
+        self.assertEqual(stats['stalls'], 1)
+        self.assertEqual(stats['stall_time'], 2)
+
+    def test_empty(self):
+        self.assertEqual(self.bench._make_stream_stats([]), {})
+
+
 class BaseBenchmarkTimeItTest(TestCase):
     def setUp(self):
         self.driver = utils.InMemoryDriver()
@@ -30,6 +72,44 @@ class BaseBenchmarkTimeItTest(TestCase):
         self.assertGreater(elapsed, 0)
         self.assertEqual('foo', 'foo')
 
+    def test_in_flight(self):
+        def func():
+            self.assertEqual(self.bench.in_flight, 1)
+        self.bench.timeit(func)
+        self.assertEqual(self.bench.in_flight, 0)
+
+    def test_in_flight_error(self):
+        def func():
+            raise ValueError()
+        self.assertRaises(ValueError, self.bench.timeit, func)
+        self.assertEqual(self.bench.in_flight, 0)
+
+
+class BaseBenchmarkTimeOperationTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = base.BaseBenchmark(self.driver)
+
+    def test_func(self):
+        elapsed, output = self.bench.time_operation(lambda x: x, 'foo')
+        self.assertIsInstance(elapsed, float)
+        self.assertEqual(output, 'foo')
+        self.assertEqual(len(self.bench.timestamps), 1)
+
+    def test_error(self):
+        def func():
+            raise ValueError()
+        self.assertRaises(ValueError, self.bench.time_operation, func)
+        self.assertEqual(self.bench.timestamps, [])
+        self.assertEqual(self.bench.in_flight, 0)
+
+    def test_get_timestamps(self):
+        self.bench.time_operation(lambda: {'ttfb': 0})
+        timestamps = self.bench.get_timestamps()[0]
+        self.assertLessEqual(timestamps['start'], timestamps['end'])
+        self.assertEqual(timestamps['first_byte'], timestamps['start'])
+        self.assertLess(abs(timestamps['end'] - time.time_ns()), 10**9)
+
 
 class BaseSetupObjectsBenchmarkMakeUploadTest(TestCase):
     def setUp(self):
@@ -49,6 +129,12 @@ class BaseSetupObjectsBenchmarkMakeUploadTest(TestCase):
     def test_func(self):
         self.bench._make_upload()
 
+    def test_key_layout(self):
+        self.bench.params['key_layout'] = 'deep-tree:2'
+        self.bench._make_upload()
+        self.assertEqual(self.bench.objects[0].count('/'), 2)
+        self.assertEqual(self.bench._make_setup_stats()['key_layout'], 'deep-tree:2')
+
 
 class BaseSetupObjectsBenchmarkCreateBucketTest(TestCase):
     def setUp(self):
@@ -85,6 +171,90 @@ class BaseSetupObjectsBenchmarkReuseBucketTest(TestCase):
         self.bench._reuse_bucket()
 
 
+class BaseSetupObjectsBenchmarkManifestCacheTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {'OSB_CACHE_DIR': self.tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+        self.driver = utils.InMemoryDriver()
+        self.driver.create_bucket('foo')
+        self.params = {
+            'object_size': 1,
+            'object_number': 2,
+            'presigned': False,
+            'bucket_id': 'foo',
+            'keep_objects': True,
+        }
+
+    def setup_bench(self, **params):
+        bench = base.BaseSetupObjectsBenchmark(self.driver)
+        bench.params.update(self.params, **params)
+        bench.setup()
+        return bench
+
+    def test_func(self):
+        first = self.setup_bench()
+        with mock.patch.object(self.driver, 'list_objects') as list_objects, \
+                mock.patch.object(self.driver, 'get_urls') as get_urls:
+            second = self.setup_bench()
+        list_objects.assert_not_called()
+        get_urls.assert_not_called()
+        self.assertEqual(second.objects, first.objects)
+        self.assertEqual(second.urls, first.urls)
+        self.assertEqual(second.presign_time, 0)
+
+    def test_refresh(self):
+        self.setup_bench()
+        with mock.patch.object(self.driver, 'list_objects', return_value=['bar']):
+            bench = self.setup_bench(refresh_manifest=True)
+        self.assertEqual(bench.objects, ['bar'])
+
+    def test_bucket_changed(self):
+        self.setup_bench()
+        bucket = {'id': 'foo', 'name': 'foo', 'storage_class': 'cold'}
+        with mock.patch.object(self.driver, 'get_bucket', return_value=bucket), \
+                mock.patch.object(self.driver, 'list_objects', return_value=['bar']):
+            bench = self.setup_bench()
+        self.assertEqual(bench.objects, ['bar'])
+
+    def test_expired_urls(self):
+        self.setup_bench(presigned=True)
+        path = manifest.get_cache_path(self.driver, 'foo')
+        header, entries = manifest.read_cache(path)
+        for entry in entries:
+            entry['url_expires'] = 0
+        manifest.write_cache(path, header, entries)
+        with mock.patch.object(self.driver, 'list_objects') as list_objects:
+            bench = self.setup_bench(presigned=True)
+        list_objects.assert_not_called()
+        self.assertGreater(bench.presign_time, 0)
+
+    def test_expiration_kept(self):
+        self.setup_bench(presigned=True)
+        path = manifest.get_cache_path(self.driver, 'foo')
+        header, entries = manifest.read_cache(path)
+        self.setup_bench(presigned=True)
+        self.assertEqual(manifest.read_cache(path), (header, entries))
+
+    def test_objects_changed(self):
+        self.driver = ram.Driver()
+        self.driver.create_bucket('foo')
+        first = self.setup_bench()
+        self.driver.delete_object('foo', first.objects[0])
+        bench = self.setup_bench()
+        self.assertEqual(bench.objects, first.objects[1:])
+
+    def test_tear_down(self):
+        bench = self.setup_bench()
+        path = manifest.get_cache_path(self.driver, 'foo')
+        self.assertTrue(os.path.exists(path))
+        bench.params['keep_objects'] = False
+        bench.tear_down()
+        self.assertFalse(os.path.exists(path))
+
+
 class BaseSetupObjectsBenchmarkSetupTest(TestCase):
     def setUp(self):
         self.driver = utils.InMemoryDriver()
@@ -107,6 +277,22 @@ class BaseSetupObjectsBenchmarkSetupTest(TestCase):
         })
         self.bench.setup()
 
+    def test_urls(self):
+        self.bench.params['object_number'] = 3
+        self.bench.setup()
+        self.assertEqual(
+            self.bench.urls,
+            ['https://osb.org/%s/%s' % (self.bench.bucket_id, o) for o in self.bench.objects],
+        )
+        self.assertIsNotNone(self.bench.presign_time)
+        self.assertIn('presign_time', self.bench._make_setup_stats())
+
+    def test_sdk_download(self):
+        self.bench.params['sdk_download'] = True
+        self.bench.setup()
+        self.assertEqual(len(self.bench.objects), 1)
+        self.assertEqual(self.bench.urls, [])
+
 
 class BaseSetupObjectsBenchmarkTearDownTest(TestCase):
     def setUp(self):
@@ -0,0 +1,30 @@
+from unittest import TestCase
+from os_benchmark.drivers import ram
+from os_benchmark.benchmarks import download
+
+
+class DownloadBenchmarkErrorTest(TestCase):
+    def setUp(self):
+        self.driver = ram.Driver()
+        self.bench = download.Benchmark(self.driver)
+        self.bench.params.update({
+            'object_size': 1,
+            'object_number': 2,
+            'presigned': False,
+            'parallel_objects': 2,
+            'warmup_sleep': 0,
+        })
+        self.bench.setup()
+        # Object removed outside the benchmark
+        self.driver.delete_object(self.bench.bucket_id, self.bench.objects[0])
+
+    def test_url(self):
+        self.bench.run()
+        self.assertEqual(len(self.bench.errors), 1)
+        self.assertEqual(len(self.bench.timings), 1)
+
+    def test_sdk(self):
+        self.bench.params['sdk_download'] = True
+        self.bench.run()
+        self.assertEqual(len(self.bench.errors), 1)
+        self.assertEqual(len(self.bench.timings), 1)
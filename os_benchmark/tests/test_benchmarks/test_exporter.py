@@ -0,0 +1,51 @@
+from unittest import TestCase
+from urllib.request import urlopen
+from urllib.error import HTTPError
+from os_benchmark.tests import utils
+from os_benchmark.benchmarks import base, exporter
+
+
+class MetricsExporterTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = base.BaseBenchmark(self.driver)
+        self.exporter = exporter.MetricsExporter(
+            benchmark=self.bench,
+            labels={'operation': 'upload', 'driver': 'in-memory', 'bucket': 'foo'},
+            buckets=(.1, 1),
+        )
+
+    def tearDown(self):
+        self.exporter.server.server_close()
+
+    def test_call(self):
+        sample = {'ops': 3, 'errors': 1, 'bytes': 30}
+        self.exporter(sample, [.05, .1, 2])
+        self.assertEqual(self.exporter.ops, 3)
+        self.assertEqual(self.exporter.errors, 1)
+        self.assertEqual(self.exporter.bytes, 30)
+        self.assertEqual(self.exporter.bucket_counts, [2, 0, 1])
+
+    def test_render(self):
+        self.exporter({'ops': 3, 'errors': 0, 'bytes': 30}, [.05, .1, 2])
+        text = self.exporter.render()
+        labels = 'operation="upload",driver="in-memory",bucket="foo"'
+        self.assertIn('osb_operations_total{%s} 3' % labels, text)
+        self.assertIn('osb_operation_duration_seconds_bucket{%s,le="0.1"} 2' % labels, text)
+        self.assertIn('osb_operation_duration_seconds_bucket{%s,le="1.0"} 2' % labels, text)
+        self.assertIn('osb_operation_duration_seconds_bucket{%s,le="+Inf"} 3' % labels, text)
+        self.assertIn('osb_operation_duration_seconds_count{%s} 3' % labels, text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+    def test_http_get(self):
+        self.exporter.start()
+        self.exporter({'ops': 1, 'errors': 0, 'bytes': 10}, [.2])
+        url = 'http://127.0.0.1:%s/metrics' % self.exporter.port
+        with urlopen(url) as response:
+            self.assertEqual(response.headers['Content-Type'], exporter.CONTENT_TYPE)
+            body = response.read().decode()
+        self.assertIn('osb_transferred_bytes_total', body)
+
+        with self.assertRaises(HTTPError):
+            urlopen('http://127.0.0.1:%s/foo' % self.exporter.port)
+        self.exporter.close()
@@ -0,0 +1,96 @@
+import io
+from unittest import TestCase
+from os_benchmark.tests import utils
+from os_benchmark.benchmarks import base, sampling
+
+
+class GetTimingValueTest(TestCase):
+    def test_float(self):
+        self.assertEqual(sampling.get_timing_value(.5), .5)
+
+    def test_dict(self):
+        self.assertEqual(sampling.get_timing_value({'total_time': .5}), .5)
+
+    def test_unknown(self):
+        self.assertIsNone(sampling.get_timing_value('foo'))
+
+
+class SamplerTickTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = base.BaseBenchmark(self.driver)
+        self.bench.params['object_size'] = 1024
+        self.bench.timings = []
+        self.bench.errors = []
+        self.sampler = sampling.Sampler(self.bench, interval=1)
+
+    def test_empty(self):
+        sample = self.sampler.tick()
+        self.assertEqual(sample['ops'], 0)
+        self.assertEqual(sample['bytes'], 0)
+        self.assertIsNone(sample['time_perc50'])
+
+    def test_new_items_only(self):
+        self.bench.timings.extend([.1, .2, .3])
+        self.bench.errors.append(Exception())
+        sample = self.sampler.tick()
+        self.assertEqual(sample['ops'], 3)
+        self.assertEqual(sample['bytes'], 3072)
+        self.assertEqual(sample['errors'], 1)
+        self.assertEqual(sample['time_perc99'], .3)
+
+        self.bench.timings.append(.4)
+        sample = self.sampler.tick()
+        self.assertEqual(sample['ops'], 1)
+        self.assertEqual(sample['errors'], 0)
+        self.assertEqual(len(self.sampler.results), 2)
+
+    def test_replaced_list(self):
+        self.bench.timings.extend([.1, .2])
+        self.sampler.tick()
+        self.bench.timings = [.5]
+        sample = self.sampler.tick()
+        self.assertEqual(sample['ops'], 1)
+
+    def test_callback(self):
+        received = []
+        self.sampler.callbacks.append(lambda s, v: received.append(v))
+        self.bench.timings.extend([.1, {'total_time': .2}])
+        self.sampler.tick()
+        self.assertEqual(received, [[.1, .2]])
+
+
+class BaseBenchmarkSamplingTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = base.BaseBenchmark(self.driver)
+        self.bench.timings = []
+        self.bench.errors = []
+
+    def test_func(self):
+        self.bench.start_sampling(interval=.01)
+        self.bench.timings.append(.1)
+        self.bench.stop_sampling()
+        results = self.bench.get_sampling_results()
+        self.assertEqual(sum([s['ops'] for s in results]), 1)
+
+
+class StatusLineTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.bench = base.BaseBenchmark(self.driver)
+        self.stream = io.StringIO()
+        self.status = sampling.StatusLine(self.bench, stream=self.stream, window=2)
+
+    def test_call(self):
+        sample = {'timestamp': self.status.start + 1, 'ops': 3, 'errors': 1, 'rate': 3, 'bw': 0}
+        self.status(sample, [.1, .2, .3])
+        self.status(sample, [])
+        line = self.stream.getvalue().split('\r')[-1]
+        self.assertIn('6 ops', line)
+        self.assertIn('errors     2', line)
+        self.assertEqual(list(self.status.values), [.2, .3])
+
+    def test_close(self):
+        self.status.close()
+        self.assertEqual(self.stream.getvalue(), '\n')
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from unittest import TestCase, IsolatedAsyncioTestCase, mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from os_benchmark.benchmarks import video_streaming
+
+
+class NewEventLoopTest(TestCase):
+    def test_default(self):
+        loop, is_uvloop = video_streaming._new_event_loop()
+        loop.close()
+        self.assertFalse(is_uvloop)
+
+    @mock.patch.object(video_streaming, 'uvloop', None)
+    def test_uvloop_missing(self):
+        loop, is_uvloop = video_streaming._new_event_loop(use_uvloop=True)
+        loop.close()
+        self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        self.assertFalse(is_uvloop)
+
+
+class MonitorLoopLagTest(IsolatedAsyncioTestCase):
+    async def test_func(self):
+        lags = []
+        monitor = asyncio.ensure_future(video_streaming._monitor_loop_lag(lags, interval=.01))
+        await asyncio.sleep(.02)
+        # Block the loop
+        time.sleep(.1)
+        await asyncio.sleep(.02)
+        monitor.cancel()
+        self.assertGreater(max(lags), .05)
+
+
+class RunClientsTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.peers = set()
+        app = web.Application()
+        app.router.add_get('/{name}', self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def handle(self, request):
+        self.peers.add(request.transport.get_extra_info('peername'))
+        return web.Response(body=b'x' * 1000)
+
+    async def test_func(self):
+        urls = [str(self.server.make_url('/obj%s' % i)) for i in range(3)]
+        results, lags = await video_streaming._run_clients(
+            process_id=0,
+            urls=urls,
+            client_number=4,
+            delay=0,
+            sleep_time=0,
+            read_timeout=5,
+            connect_timeout=5,
+            connection_limit=2,
+            loop_lag_interval=.01,
+        )
+        self.assertEqual(len(results), 4)
+        for timings, errs in results:
+            self.assertEqual(len(timings), 3)
+            self.assertEqual(errs, [])
+        # Clients share the connection pool
+        self.assertLessEqual(len(self.peers), 2)
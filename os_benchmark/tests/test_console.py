@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from os_benchmark import console
+from os_benchmark.benchmarks import base
+
+# Seconds to import the CLI, an order of magnitude above the measured cost
+IMPORT_TIME_BUDGET = 1
+# Modules only needed by some drivers or actions
+LAZY_MODULES = (
+    'aiohttp',
+    'boto3',
+    'faker',
+    'probes',
+    'randomio',
+    'requests',
+    'yaml',
+    'http.server',
+)
+CODE = """
+import sys, time
+start = time.perf_counter()
+import os_benchmark.console
+print(time.perf_counter() - start)
+print(' '.join(sys.modules))
+"""
+
+
+class ImportTest(TestCase):
+    def test_budget(self):
+        output = subprocess.check_output([sys.executable, '-c', CODE], text=True)
+        elapsed, modules = output.splitlines()
+        self.assertLess(float(elapsed), IMPORT_TIME_BUDGET)
+        modules = set(modules.split())
+        for module in LAZY_MODULES:
+            with self.subTest(module=module):
+                self.assertNotIn(module, modules)
+
+
+class ControllerTest(TestCase):
+    def test_lazy_driver(self):
+        argv = ['os-benchmark', '--config-raw', '{"driver": "ram"}', 'list-buckets']
+        with mock.patch.object(sys, 'argv', argv):
+            controller = console.Controller()
+        self.assertIsNone(controller._driver)
+        self.assertEqual(controller.driver.id, 'ram')
+        self.assertIs(controller.driver, controller.driver)
+
+    def test_argv(self):
+        controller = console.Controller(argv=['--config-raw', '{"driver": "ram"}', '-v', '1', 'list-buckets'])
+        self.assertEqual(controller.action, 'list_buckets')
+        self.assertEqual(controller.main_args.verbosity, 1)
+
+    def test_ram_action(self):
+        controller = console.Controller(argv=['--config-raw', '{"driver": "s3"}', 'self-benchmark'])
+        self.assertEqual(controller.config['driver'], 'ram')
+
+    def test_shared_drivers(self):
+        drivers = {}
+        argv = ['--config-raw', '{"driver": "ram"}', 'list-buckets']
+        driver = console.Controller(argv=argv, drivers=drivers).driver
+        self.assertIs(console.Controller(argv=argv, drivers=drivers).driver, driver)
+
+
+class TimestampsOutputTest(TestCase):
+    def test_func(self):
+        class Benchmark(base.BaseBenchmark):
+            def run(self):
+                def func():
+                    time.sleep(.002)
+                    return {'ttfb': .001}
+                self.time_operation(func)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, 'timestamps.json')
+            argv = ['--config-raw', '{"driver": "ram"}', '--timestamps-output', output, 'list-buckets']
+            controller = console.Controller(argv=argv)
+            with mock.patch.object(controller, 'print_stats'):
+                controller.run_benchmark(Benchmark(controller.driver))
+            with open(output) as fd:
+                lines = [json.loads(line) for line in fd]
+        self.assertEqual(len(lines), 1)
+        for key in ('start', 'first_byte', 'end'):
+            self.assertIsInstance(lines[0][key], int)
+        # Epoch nanoseconds
+        self.assertGreater(lines[0]['start'], 10**18)
+        self.assertEqual(lines[0]['first_byte'] - lines[0]['start'], 10**6)
+        self.assertLessEqual(lines[0]['first_byte'], lines[0]['end'])
+
+
+class PopDaemonSocketTest(TestCase):
+    def test_func(self):
+        argv = ['--daemon-socket', 'foo.sock', 'list-buckets']
+        self.assertEqual(console.pop_daemon_socket(argv), ('foo.sock', ['list-buckets']))
+
+    def test_equal(self):
+        argv = ['--daemon-socket=foo.sock', 'list-buckets']
+        self.assertEqual(console.pop_daemon_socket(argv), ('foo.sock', ['list-buckets']))
+
+    def test_after_action(self):
+        argv = ['upload', '--daemon-socket', 'foo.sock']
+        self.assertEqual(console.pop_daemon_socket(argv), (None, argv))
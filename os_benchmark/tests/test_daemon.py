@@ -0,0 +1,111 @@
+import io
+import os
+import stat
+import tempfile
+import threading
+from contextlib import redirect_stdout, redirect_stderr
+from unittest import TestCase, mock
+
+from os_benchmark import daemon
+
+CONFIG = '{"driver": "ram"}'
+
+
+class BaseDaemonTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'daemon.sock')
+        self.server = daemon.Server(self.path)
+        self.addCleanup(self.server.server_close)
+
+
+class ServerInitTest(TestCase):
+    def test_permissions(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'run', 'daemon.sock')
+            umask = os.umask(0o022)
+            try:
+                # Socket created private, not only chmod-ed after its bind
+                with mock.patch('os.chmod'):
+                    server = daemon.Server(path)
+                self.addCleanup(server.server_close)
+                self.assertEqual(os.umask(umask), 0o022)
+            finally:
+                os.umask(umask)
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode), 0o700)
+
+
+class ServerExecuteTest(BaseDaemonTest):
+    def test_func(self):
+        response = self.server.execute([
+            '--config-raw', CONFIG,
+            'time-upload', '--object-size', '1', '--object-number', '2',
+        ])
+        self.assertEqual(response['exit_code'], 0)
+        self.assertIn('operation\t\tupload', response['stdout'])
+
+    def test_driver_reused(self):
+        self.server.execute(['--config-raw', CONFIG, 'create-bucket', '--name', 'foo'])
+        response = self.server.execute(['--config-raw', CONFIG, 'list-buckets'])
+        self.assertEqual(response['stdout'], 'foo\n')
+        self.assertEqual(len(self.server.drivers), 1)
+
+    def test_parser_error(self):
+        response = self.server.execute(['--config-raw', CONFIG, 'time-upload'])
+        self.assertEqual(response['exit_code'], 2)
+        self.assertIn('required', response['stderr'])
+
+    def test_daemon(self):
+        response = self.server.execute(['daemon'])
+        self.assertEqual(response['exit_code'], 2)
+
+    def test_daemon_argument(self):
+        self.server.execute(['--config-raw', CONFIG, 'create-bucket', '--name', 'foo'])
+        response = self.server.execute([
+            '--config-raw', CONFIG,
+            'upload', '--bucket-id', 'foo', '--name', 'daemon', '--content-size', '1',
+        ])
+        self.assertEqual(response['exit_code'], 0)
+
+    def test_no_input(self):
+        with mock.patch('builtins.input', side_effect=EOFError) as input_:
+            response = self.server.execute(['--config-raw', CONFIG, 'clean'])
+        input_.assert_not_called()
+        self.assertEqual(response['exit_code'], 0)
+
+    def test_from_stdin(self):
+        response = self.server.execute(['--config-raw', CONFIG, 'upload', '--bucket-id', 'foo', '--from-stdin'])
+        self.assertEqual(response['exit_code'], 2)
+        self.assertIn('standard input', response['stderr'])
+
+    def test_sigterm_during_command(self):
+        def run_command(*args, **kwargs):
+            self.server.handle_sigterm(None, None)
+        with mock.patch('os_benchmark.console.main', side_effect=run_command):
+            response = self.server.execute(['list-buckets'])
+        self.assertEqual(response['exit_code'], 0)
+        self.assertTrue(self.server.stopped)
+
+    def test_sigterm_idle(self):
+        with self.assertRaises(SystemExit):
+            self.server.handle_sigterm(None, None)
+
+
+class ForwardTest(BaseDaemonTest):
+    def test_func(self):
+        thread = threading.Thread(target=self.server.handle_request)
+        thread.start()
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exit_code = daemon.forward(self.path, ['--config-raw', CONFIG, 'list-buckets'])
+        thread.join()
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(stdout.getvalue(), '')
+
+
+class GetSocketPathTest(TestCase):
+    def test_func(self):
+        self.assertEqual(daemon.get_socket_path('/tmp/foo.sock'), '/tmp/foo.sock')
+        self.assertTrue(daemon.get_socket_path().endswith(daemon.SOCKET_NAME))
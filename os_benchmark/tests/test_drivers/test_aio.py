@@ -0,0 +1,178 @@
+import asyncio
+import datetime
+from io import BytesIO
+from unittest import TestCase, IsolatedAsyncioTestCase, mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from botocore.auth import S3SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+
+from os_benchmark.drivers import aio, errors
+from os_benchmark.tests import utils
+from os_benchmark.benchmarks import upload
+
+NOW = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+
+
+class SignRequestTest(TestCase):
+    def assertSameSignature(self, method, url, headers):
+        request = AWSRequest(method=method, url=url, headers=headers)
+        with mock.patch('botocore.auth.get_current_datetime', return_value=NOW):
+            S3SigV4Auth(Credentials('ak', 'sk', 'token'), 's3', 'eu-west-1').add_auth(request)
+        signed = aio.sign_request(
+            method, url, headers, 'ak', 'sk', 'eu-west-1',
+            session_token='token',
+            payload_hash=request.headers['X-Amz-Content-SHA256'],
+            now=NOW,
+        )
+        self.assertEqual(signed['Authorization'], request.headers['Authorization'])
+
+    def test_object(self):
+        self.assertSameSignature('PUT', 'https://s3.example.com/foo/b%20ar/baz', {'x-amz-acl': 'private'})
+
+    def test_query(self):
+        self.assertSameSignature('GET', 'http://localhost:9000/foo?list-type=2&prefix=a%2Fb', {})
+
+    def test_unsigned_payload(self):
+        headers = aio.sign_request('GET', 'https://s3.example.com/foo', {}, 'ak', 'sk', 'eu-west-1')
+        self.assertEqual(headers['X-Amz-Content-SHA256'], aio.UNSIGNED_PAYLOAD)
+        self.assertNotIn('X-Amz-Security-Token', headers)
+
+
+class ThreadedAsyncDriverTest(IsolatedAsyncioTestCase):
+    async def test_func(self):
+        driver = utils.InMemoryDriver()
+        driver.create_bucket('foo')
+        async with driver.get_async_driver() as async_driver:
+            self.assertIsInstance(async_driver, aio.ThreadedAsyncDriver)
+            await asyncio.gather(*[
+                async_driver.upload(bucket_id='foo', name='obj%s' % i, content=b'x')
+                for i in range(10)
+            ])
+            self.assertEqual(len(await async_driver.list_objects(bucket_id='foo')), 10)
+            await async_driver.delete_objects(bucket_id='foo', names=['obj0', 'obj1'])
+            self.assertEqual(len(await async_driver.list_objects(bucket_id='foo')), 8)
+
+
+class FakeS3:
+    """Minimal S3 endpoint checking requests are signed"""
+    def __init__(self):
+        self.objects = {}
+        self.app = web.Application()
+        self.app.router.add_route('*', '/{bucket}', self.handle_bucket)
+        self.app.router.add_route('*', '/{bucket}/{name:.+}', self.handle_object)
+
+    def check(self, request):
+        if not request.headers.get('Authorization', '').startswith('AWS4-HMAC-SHA256'):
+            raise web.HTTPForbidden(text='<Error><Code>AccessDenied</Code></Error>')
+
+    async def handle_bucket(self, request):
+        self.check(request)
+        if request.match_info['bucket'] != 'foo':
+            return web.Response(status=404, text='<Error><Code>NoSuchBucket</Code><Message>No bucket</Message></Error>')
+        names = sorted(self.objects)
+        start = int(request.query.get('continuation-token', 0))
+        page = names[start:start+2]
+        contents = ''.join('<Contents><Key>%s</Key></Contents>' % n for n in page)
+        truncated = start + 2 < len(names)
+        body = (
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">%s'
+            '<IsTruncated>%s</IsTruncated><NextContinuationToken>%s</NextContinuationToken>'
+            '</ListBucketResult>' % (contents, str(truncated).lower(), start + 2)
+        )
+        return web.Response(text=body)
+
+    async def handle_object(self, request):
+        self.check(request)
+        name = request.match_info['name']
+        if request.method == 'PUT':
+            self.objects[name] = await request.read()
+            return web.Response()
+        if name not in self.objects:
+            return web.Response(status=404)
+        if request.method == 'DELETE':
+            del self.objects[name]
+            return web.Response(status=204)
+        if request.method == 'HEAD':
+            return web.Response(headers={'Content-Length': str(len(self.objects[name])), 'ETag': '"abc"'})
+        return web.Response(body=self.objects[name])
+
+
+class S3AsyncDriverTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fake = FakeS3()
+        self.server = TestServer(self.fake.app)
+        await self.server.start_server()
+        self.driver = aio.S3AsyncDriver(
+            endpoint_url=str(self.server.make_url('/')),
+            access_key='ak',
+            secret_key='sk',
+        )
+
+    async def asyncTearDown(self):
+        await self.driver.close()
+        await self.server.close()
+
+    async def test_upload(self):
+        await self.driver.upload(bucket_id='foo', name='a/b c', content=BytesIO(b'data'))
+        self.assertEqual(self.fake.objects, {'a/b c': b'data'})
+
+    async def test_upload_stream(self):
+        content = BytesIO(b'x' * 1000)
+        content.size = 1000
+        with mock.patch.object(aio, 'UPLOAD_CHUNKSIZE', 100):
+            await self.driver.upload(bucket_id='foo', name='bar', content=content)
+        self.assertEqual(self.fake.objects, {'bar': b'x' * 1000})
+
+    async def test_download_object(self):
+        self.fake.objects['bar'] = b'x' * 1000
+        result = await self.driver.download_object(bucket_id='foo', name='bar', block_size=100)
+        self.assertEqual(result['size'], 1000)
+
+    async def test_list_objects(self):
+        for i in range(5):
+            self.fake.objects['obj%s' % i] = b''
+        names = await self.driver.list_objects(bucket_id='foo')
+        self.assertEqual(names, ['obj%s' % i for i in range(5)])
+
+    async def test_head_object(self):
+        self.fake.objects['bar'] = b'data'
+        obj = await self.driver.head_object(bucket_id='foo', name='bar')
+        self.assertEqual(obj, {'name': 'bar', 'size': 4, 'etag': 'abc'})
+
+    async def test_delete_object(self):
+        self.fake.objects['bar'] = b'data'
+        await self.driver.delete_object(bucket_id='foo', name='bar')
+        self.assertEqual(self.fake.objects, {})
+
+    async def test_errors(self):
+        with self.assertRaises(errors.DriverObjectUnfoundError):
+            await self.driver.head_object(bucket_id='foo', name='bar')
+        with self.assertRaises(errors.DriverBucketUnfoundError):
+            await self.driver.list_objects(bucket_id='bar')
+        self.driver.access_key = None
+        with self.assertRaises(errors.DriverPermissionError):
+            await self.driver.upload(bucket_id='foo', name='bar', content=b'')
+
+
+class UploadAsyncEngineTest(TestCase):
+    def test_func(self):
+        driver = utils.InMemoryDriver()
+        bench = upload.Benchmark(driver)
+        bench.params.update({
+            'object_size': 1,
+            'object_number': 5,
+            'multipart_threshold': 1,
+            'multipart_chunksize': 1,
+            'max_concurrency': 1,
+            'parallel_objects': 2,
+            'engine': 'asyncio',
+        })
+        bench.setup()
+        bench.run()
+        self.assertEqual(len(driver.list_objects(bench.bucket_id)), 5)
+        stats = bench.make_stats()
+        self.assertEqual(stats['ops'], 5)
+        self.assertEqual(stats['engine'], 'asyncio')
@@ -0,0 +1,88 @@
+import os
+import stat
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from os_benchmark.drivers import auth, ram
+
+
+class BaseAuthTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        env = mock.patch.dict(os.environ, {'OSB_CACHE_DIR': self.tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.driver = ram.Driver(user='foo', token_cache=True)
+
+
+class TokenCacheTest(BaseAuthTest):
+    def test_func(self):
+        path = auth.get_token_path(self.driver)
+        auth.write_token(path, {'token': 'foo'}, time.time() + 3600)
+        self.assertEqual(auth.read_token(path), {'token': 'foo'})
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_expiring(self):
+        path = auth.get_token_path(self.driver)
+        auth.write_token(path, 'foo', time.time() + auth.TOKEN_MIN_TTL / 2)
+        self.assertIsNone(auth.read_token(path))
+
+    def test_missing(self):
+        self.assertIsNone(auth.read_token(auth.get_token_path(self.driver)))
+
+    def test_invalid(self):
+        path = auth.get_token_path(self.driver)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as fd:
+            fd.write('{')
+        self.assertIsNone(auth.read_token(path))
+
+    def test_path_by_config(self):
+        other = ram.Driver(user='bar', token_cache=True)
+        self.assertNotEqual(auth.get_token_path(self.driver), auth.get_token_path(other))
+
+
+class DriverAuthenticateTest(BaseAuthTest):
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+
+    def get_token(self):
+        self.calls += 1
+        return 'token%s' % self.calls, None
+
+    def test_cached(self):
+        self.assertEqual(self.driver.authenticate(self.get_token), 'token1')
+        # Another process
+        driver = ram.Driver(user='foo', token_cache=True)
+        self.assertEqual(driver.authenticate(self.get_token), 'token1')
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(self.driver.auth_timings[0]['cached'])
+        self.assertTrue(driver.auth_timings[0]['cached'])
+
+    def test_default_disabled(self):
+        driver = ram.Driver(user='foo')
+        driver.authenticate(self.get_token)
+        driver.authenticate(self.get_token)
+        self.assertEqual(self.calls, 2)
+
+    def test_disabled(self):
+        driver = ram.Driver(user='foo', token_cache=False)
+        driver.authenticate(self.get_token)
+        driver.authenticate(self.get_token)
+        self.assertEqual(self.calls, 2)
+        self.assertNotIn('token_cache', driver.kwargs)
+
+    def test_forget_token(self):
+        self.driver.authenticate(self.get_token)
+        self.driver.forget_token()
+        self.assertEqual(self.driver.authenticate(self.get_token), 'token2')
+
+    def test_reauthenticate(self):
+        self.driver.authenticate(self.get_token)
+        self.assertEqual(self.driver.reauthenticate(self.get_token), 'token2')
+        # Next processes get the new token
+        driver = ram.Driver(user='foo', token_cache=True)
+        self.assertEqual(driver.authenticate(self.get_token), 'token2')
@@ -1,8 +1,68 @@
 import io
+import tempfile
+import time
 from unittest import TestCase, mock
 from os_benchmark.drivers import base, errors
 
 
+class MeasureDownloadTest(TestCase):
+    def test_func(self):
+        start = time.perf_counter()
+        result = base.measure_download([b'abc', b'de', b'f'], start)
+        self.assertEqual(result['size'], 6)
+        self.assertGreaterEqual(result['ttfb'], 0)
+        self.assertGreaterEqual(result['transfer_time'], 0)
+        self.assertEqual(result['stalls'], 0)
+
+    def test_empty(self):
+        result = base.measure_download([], time.perf_counter())
+        self.assertEqual(result['size'], 0)
+        self.assertIsNone(result['throughput'])
+
+    def test_stalls(self):
+        def chunks():
+            yield b'a'
+            time.sleep(.02)
+            yield b'b'
+            yield b'c'
+        result = base.measure_download(chunks(), time.perf_counter(), stall_threshold=.01)
+        self.assertEqual(result['stalls'], 1)
+        self.assertGreaterEqual(result['stall_time'], .02)
+        self.assertGreater(result['throughput'], 0)
+
+
+class GetContentSizeTest(TestCase):
+    def test_size(self):
+        content = io.BytesIO(b'abc')
+        content.size = 3
+        self.assertEqual(base.get_content_size(content), 3)
+
+    def test_file(self):
+        with tempfile.TemporaryFile() as fd:
+            fd.write(b'abc')
+            fd.flush()
+            self.assertEqual(base.get_content_size(fd), 3)
+
+    def test_stream(self):
+        content = io.BufferedReader(io.BytesIO(b'abc'))
+        self.assertIsNone(base.get_content_size(content))
+
+
+class SpoolContentTest(TestCase):
+    def test_small(self):
+        content, size = base.spool_content(io.BufferedReader(io.BytesIO(b'abc')), 3)
+        self.assertEqual(size, 3)
+        self.assertEqual(content.read(), b'abc')
+
+    def test_large(self):
+        content, size = base.spool_content(io.BufferedReader(io.BytesIO(b'abcdef')), 3)
+        self.assertIsNone(size)
+        self.assertEqual(content.read(2), b'ab')
+        self.assertEqual(content.read(3), b'cde')
+        self.assertEqual(content.read(), b'f')
+        self.assertEqual(content.read(1), b'')
+
+
 class MultiPartTest(TestCase):
     def test_init(self):
         fd = io.BytesIO(b'a')
@@ -12,7 +72,7 @@ class MultiPartTest(TestCase):
         fd = io.BytesIO(b'abc')
         part = base.MultiPart(fd, 3)
         self.assertEqual(part.read(), b'abc')
-        self.assertEqual(part.read(), '')
+        self.assertEqual(part.read(), b'')
 
     def test_read_chunksize(self):
         fd = io.BytesIO(b'abc')
@@ -20,20 +80,79 @@ class MultiPartTest(TestCase):
         self.assertEqual(part.read(chunksize=1), b'a')
         self.assertEqual(part.read(chunksize=1), b'b')
         self.assertEqual(part.read(chunksize=1), b'c')
-        self.assertEqual(part.read(), '')
+        self.assertEqual(part.read(), b'')
 
     def test_seek(self):
         fd = io.BytesIO(b'abc')
         part = base.MultiPart(fd, 3)
         part.seek(1)
         self.assertEqual(len(part.read()), 2)
-        self.assertEqual(part.read(), '')
+        self.assertEqual(part.read(), b'')
 
     def test_len(self):
         fd = io.BytesIO(b'abc')
         part = base.MultiPart(fd, 3)
         self.assertEqual(part.size, 3)
 
+    def test_start(self):
+        fd = io.BytesIO(b'abcdef')
+        part1 = base.MultiPart(fd, 3)
+        part2 = base.MultiPart(fd, 3, start=3)
+        self.assertEqual(part2.read(1), b'd')
+        self.assertEqual(part1.read(), b'abc')
+        self.assertEqual(part2.read(), b'ef')
+
+
+class UrlCacheTest(TestCase):
+    def test_get_or_create(self):
+        cache = base.UrlCache(min_ttl=0)
+        func = mock.Mock(return_value='http://foo')
+        self.assertEqual(cache.get_or_create(('foo', 'bar'), 60, func), 'http://foo')
+        self.assertEqual(cache.get_or_create(('foo', 'bar'), 60, func), 'http://foo')
+        self.assertEqual(func.call_count, 1)
+
+    def test_expired(self):
+        cache = base.UrlCache(min_ttl=10)
+        cache.set('foo', 'http://foo', 5)
+        self.assertIsNone(cache.get('foo'))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        cache = base.UrlCache(max_size=2, min_ttl=0)
+        cache.set('foo', 'http://foo', 60)
+        cache.set('bar', 'http://bar', 60)
+        cache.get('foo')
+        cache.set('ham', 'http://ham', 60)
+        self.assertEqual(cache.get('foo'), 'http://foo')
+        self.assertIsNone(cache.get('bar'))
+
+
+class ReadAtTest(TestCase):
+    def test_buffer(self):
+        fd = io.BytesIO(b'abcdef')
+        data = base.read_at(fd, 2, 3)
+        self.assertEqual(data, b'cde')
+        self.assertIsInstance(data, bytes)
+        # No view kept on the buffer
+        fd.write(b'ghi')
+        fd.close()
+
+    def test_file(self):
+        with tempfile.TemporaryFile() as fd:
+            fd.write(b'abcdef')
+            fd.flush()
+            self.assertEqual(base.read_at(fd, 2, 3), b'cde')
+            self.assertEqual(fd.tell(), 6)
+
+    def test_stream(self):
+        fd = io.BufferedReader(io.BytesIO(b'abcdef'))
+        self.assertEqual(base.read_at(fd, 2, 3), b'cde')
+
+    def test_read_lock(self):
+        fd = io.BufferedReader(io.BytesIO(b'abcdef'))
+        self.assertIs(base.get_read_lock(fd), base.get_read_lock(fd))
+        self.assertIsNot(base.get_read_lock(fd), base.get_read_lock(io.BytesIO()))
+
 
 class MultiPartUploaderTest(TestCase):
     def test_init(self):
@@ -62,11 +181,53 @@ class MultiPartUploaderTest(TestCase):
         self.assertEqual(len(results), 26)
         self.assertEqual(len(parts), 26)
 
+    def test_run_content(self):
+        def _upload_func(part_id, offset, content):
+            return bytes(content.read())
+
+        content = io.BytesIO(b'abcdefghij')
+        content.size = 10
+        uploader = base.MultiPartUploader(
+            content=content,
+            max_concurrency=2,
+            multipart_chunksize=3,
+        )
+        results = uploader.run(_upload_func)
+        self.assertEqual(results, [b'abc', b'def', b'ghi', b'j'])
+
+    def test_run_stream(self):
+        in_flight = []
+        max_in_flight = []
+
+        def _upload_func(part_id, offset, content):
+            in_flight.append(part_id)
+            max_in_flight.append(len(in_flight))
+            time.sleep(.01)
+            in_flight.remove(part_id)
+            return offset, bytes(content.read())
+
+        content = io.BufferedReader(io.BytesIO(b'abcdefghij'))
+        uploader = base.MultiPartUploader(
+            content=content,
+            max_concurrency=2,
+            multipart_chunksize=3,
+        )
+        results = uploader.run(_upload_func)
+        self.assertEqual(results, [(0, b'abc'), (3, b'def'), (6, b'ghi'), (9, b'j')])
+        self.assertLessEqual(max(max_in_flight), 2)
+
 
 class BaseDriverTest(TestCase):
     def test_init(self):
         base.BaseDriver()
 
+    def test_get_urls(self):
+        driver = base.BaseDriver()
+        driver.get_url = lambda bucket_id, name, **kwargs: '%s/%s' % (bucket_id, name)
+        names = [str(i) for i in range(10)]
+        urls = driver.get_urls('foo', names, max_workers=4)
+        self.assertEqual(urls, ['foo/%s' % n for n in names])
+
     def test_urljoin(self):
         driver = base.BaseDriver()
         self.assertEqual(
@@ -0,0 +1,128 @@
+import os
+import tempfile
+from io import BytesIO
+from unittest import TestCase
+
+from os_benchmark import utils
+from os_benchmark.drivers import fs, errors
+
+CONTENT = os.urandom(10000)
+
+
+class BaseFsTest(TestCase):
+    driver_kwargs = {}
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.driver = fs.Driver(path=self.tmpdir.name, **self.driver_kwargs)
+        self.driver.setup()
+        self.driver.create_bucket('foo')
+
+    def read(self, name):
+        with open(os.path.join(self.tmpdir.name, 'foo', name), 'rb') as fd:
+            return fd.read()
+
+
+class FsUploadTest(BaseFsTest):
+    def test_bytesio(self):
+        obj = self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        self.assertEqual(obj, {'name': 'bar'})
+        self.assertEqual(self.read('bar'), CONTENT)
+
+    def test_file(self):
+        with tempfile.TemporaryFile() as src:
+            src.write(CONTENT)
+            src.seek(100)
+            self.driver.upload(bucket_id='foo', name='bar', content=src)
+        self.assertEqual(self.read('bar'), CONTENT[100:])
+
+    def test_generator(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=utils.get_random_content(5000))
+        self.assertEqual(len(self.read('bar')), 5000)
+
+    def test_nested(self):
+        self.driver.upload(bucket_id='foo', name='a/b/bar', content=BytesIO(CONTENT))
+        self.assertEqual(self.driver.list_objects('foo'), ['a/b/bar'])
+
+
+class FsCopyUploadTest(BaseFsTest):
+    driver_kwargs = {'upload_mode': 'copy', 'block_size': 4096}
+
+    def test_bytesio(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        self.assertEqual(self.read('bar'), CONTENT)
+
+    def test_generator(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=utils.get_random_content(5000))
+        self.assertEqual(len(self.read('bar')), 5000)
+
+
+class FsDownloadTest(BaseFsTest):
+    def test_modes(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        url = self.driver.get_url('foo', 'bar')
+        for mode in fs.DOWNLOAD_MODES:
+            self.driver.download_mode = mode
+            result = self.driver.download(url, block_size=4096)
+            self.assertEqual(result['size'], len(CONTENT), mode)
+
+    def test_empty(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO())
+        url = self.driver.get_url('foo', 'bar')
+        for mode in fs.DOWNLOAD_MODES:
+            self.driver.download_mode = mode
+            self.assertEqual(self.driver.download(url)['size'], 0, mode)
+
+    def test_download_object(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        result = self.driver.download_object(bucket_id='foo', name='bar')
+        self.assertEqual(result['size'], len(CONTENT))
+
+
+class FsDirectIoTest(BaseFsTest):
+    driver_kwargs = {'direct_io': True, 'block_size': 4096}
+
+    def setUp(self):
+        if not hasattr(os, 'O_DIRECT'):
+            self.skipTest("O_DIRECT unavailable")
+        super().setUp()
+
+    def test_func(self):
+        try:
+            self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        except errors.DriverFeatureUnsupported:
+            self.skipTest("O_DIRECT unsupported by the filesystem")
+        self.assertEqual(self.read('bar'), CONTENT)
+        result = self.driver.download(self.driver.get_url('foo', 'bar'))
+        self.assertEqual(result['size'], len(CONTENT))
+
+
+class FsConfigTest(TestCase):
+    def test_invalid_mode(self):
+        with self.assertRaises(errors.DriverConfigError):
+            fs.Driver(path='/tmp', download_mode='foo')
+
+    def test_direct_io_alignment(self):
+        if not hasattr(os, 'O_DIRECT'):
+            self.skipTest("O_DIRECT unavailable")
+        with self.assertRaises(errors.DriverConfigError):
+            fs.Driver(path='/tmp', direct_io=True, block_size=1000)
+
+
+class FsHeadObjectTest(BaseFsTest):
+    def test_func(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        obj = self.driver.head_object(bucket_id='foo', name='bar')
+        self.assertEqual(obj['size'], len(CONTENT))
+
+    def test_not_found(self):
+        with self.assertRaises(errors.DriverObjectUnfoundError):
+            self.driver.head_object(bucket_id='foo', name='bar')
+
+
+class FsDeleteBucketTest(BaseFsTest):
+    def test_clean_bucket(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(CONTENT))
+        self.driver.clean_bucket(bucket_id='foo')
+        self.assertEqual(self.driver.list_buckets(), [])
@@ -0,0 +1,122 @@
+from unittest import TestCase, mock
+
+from os_benchmark.drivers import multi, errors, ram
+
+ENDPOINTS = [{'name': 'eu'}, {'name': 'us'}, {'name': 'ap'}]
+
+
+def make_driver(strategy='round-robin', endpoints=ENDPOINTS):
+    driver = multi.Driver(
+        strategy=strategy,
+        defaults={'driver': 'ram'},
+        endpoints=endpoints,
+    )
+    driver.create_bucket('foo')
+    return driver
+
+
+class MultiInitTest(TestCase):
+    def test_func(self):
+        driver = make_driver()
+        self.assertEqual([e.name for e in driver.endpoints], ['eu', 'us', 'ap'])
+        for endpoint in driver.endpoints:
+            self.assertEqual(endpoint.driver.list_buckets(), [{'id': 'foo'}])
+
+    def test_invalid_strategy(self):
+        with self.assertRaises(errors.DriverConfigError):
+            make_driver(strategy='foo')
+
+    def test_no_endpoint(self):
+        with self.assertRaises(errors.DriverConfigError):
+            make_driver(endpoints=[])
+
+    def test_duplicate_name(self):
+        with self.assertRaises(errors.DriverConfigError):
+            make_driver(endpoints=[{'name': 'eu'}, {'name': 'eu'}])
+
+
+class MultiStrategyTest(TestCase):
+    def upload(self, driver, number=30):
+        for i in range(number):
+            driver.upload(bucket_id='foo', name='obj%s' % i, content=b'x')
+        return [e.driver.list_objects('foo') for e in driver.endpoints]
+
+    def test_round_robin(self):
+        objects = self.upload(make_driver('round-robin'))
+        self.assertEqual([len(o) for o in objects], [10, 10, 10])
+
+    def test_consistent_hash(self):
+        objects = self.upload(make_driver('consistent-hash'))
+        self.assertEqual(objects, self.upload(make_driver('consistent-hash')))
+        self.assertEqual(sum([len(o) for o in objects]), 30)
+
+    def test_least_latency(self):
+        driver = make_driver('least-latency')
+        driver.endpoints[0].latency = 1
+        driver.endpoints[1].latency = .001
+        driver.endpoints[2].latency = .1
+        objects = self.upload(driver, number=5)
+        self.assertEqual(len(objects[1]), 5)
+
+
+class MultiObjectTest(TestCase):
+    def setUp(self):
+        self.driver = make_driver()
+        for i in range(3):
+            self.driver.upload(bucket_id='foo', name='obj%s' % i, content=b'data')
+
+    def test_download(self):
+        for i in range(3):
+            url = self.driver.get_url('foo', 'obj%s' % i)
+            self.assertEqual(self.driver.download(url)['size'], 4)
+            self.assertEqual(self.driver.download_object('foo', 'obj%s' % i)['size'], 4)
+
+    def test_unknown_location(self):
+        # Objects of a reused bucket
+        self.driver._locations.clear()
+        for i in range(3):
+            self.assertEqual(self.driver.download_object('foo', 'obj%s' % i)['size'], 4)
+        self.assertEqual(self.driver.get_stats()['endpoint_us_ops'], 2)
+        self.assertEqual(self.driver.get_stats()['endpoint_us_errors'], 0)
+
+    def test_unknown_location_listed(self):
+        self.driver._locations.clear()
+        with mock.patch.object(ram.Driver, 'head_object', side_effect=NotImplementedError), \
+                mock.patch.object(self.driver, 'list_objects', wraps=self.driver.list_objects) as list_objects:
+            for i in range(3):
+                self.driver.download_object('foo', 'obj%s' % i)
+        list_objects.assert_called_once_with(bucket_id='foo')
+
+    def test_unknown_url(self):
+        urls = [self.driver.get_url('foo', 'obj%s' % i) for i in range(3)]
+        self.driver._hosts.clear()
+        for url in urls:
+            self.driver.download(url)
+        stats = self.driver.get_stats()
+        for name in ('eu', 'us', 'ap'):
+            self.assertEqual(stats['endpoint_%s_ops' % name], 2)
+            self.assertEqual(stats['endpoint_%s_errors' % name], 0)
+
+    def test_list_objects(self):
+        self.assertEqual(sorted(self.driver.list_objects('foo')), ['obj0', 'obj1', 'obj2'])
+
+    def test_delete_objects(self):
+        self.driver.delete_objects('foo', ['obj0', 'obj1'])
+        self.assertEqual(self.driver.list_objects('foo'), ['obj2'])
+
+    def test_clean_bucket(self):
+        self.driver.clean_bucket('foo')
+        self.assertEqual(self.driver.list_buckets(), [])
+
+    def test_stats(self):
+        stats = self.driver.get_stats()
+        for name in ('eu', 'us', 'ap'):
+            self.assertEqual(stats['endpoint_%s_ops' % name], 1)
+            self.assertEqual(stats['endpoint_%s_errors' % name], 0)
+        self.driver.reset_stats()
+        self.assertEqual(self.driver.get_stats()['endpoint_eu_ops'], 0)
+
+    def test_error(self):
+        with self.assertRaises(errors.DriverObjectUnfoundError):
+            self.driver.head_object('foo', 'bar')
+        self.assertEqual(self.driver.get_stats()['endpoint_eu_errors'], 1)
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import TestCase
+
+from os_benchmark import utils
+from os_benchmark.drivers import ram, errors
+
+
+class BaseRamTest(TestCase):
+    def setUp(self):
+        self.driver = ram.Driver(read_timeout=5)
+        self.driver.create_bucket('foo')
+
+
+class RamInitTest(TestCase):
+    def test_func(self):
+        driver = ram.Driver(read_timeout=5, lock_stripes=4)
+        self.assertEqual(driver.read_timeout, 5)
+        self.assertEqual(len(driver._locks), 4)
+
+
+class RamUploadTest(BaseRamTest):
+    def test_bytesio(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(b'data'))
+        self.assertEqual(self.driver.buckets['foo']['bar'], b'data')
+
+    def test_generator(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=utils.get_random_content(100))
+        self.assertEqual(self.driver.head_object('foo', 'bar')['size'], 100)
+
+    def test_bytes_shared(self):
+        data = b'x' * 100
+        self.driver.upload(bucket_id='foo', name='bar', content=data)
+        self.assertIs(self.driver.buckets['foo']['bar'], data)
+
+    def test_bucket_not_found(self):
+        with self.assertRaises(errors.DriverBucketUnfoundError):
+            self.driver.upload(bucket_id='bar', name='bar', content=b'')
+
+    def test_concurrent(self):
+        def upload(i):
+            self.driver.upload(bucket_id='foo', name='obj%s' % i, content=b'x')
+            return self.driver.list_objects('foo')
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(upload, range(1000)))
+        self.assertEqual(len(self.driver.list_objects('foo')), 1000)
+
+    def test_lock_striped_by_object(self):
+        driver = ram.Driver(lock_stripes=64)
+        locks = set(id(driver._get_lock('foo', 'obj%s' % i)) for i in range(100))
+        self.assertGreater(len(locks), 1)
+
+
+class RamDownloadTest(BaseRamTest):
+    def test_func(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=b'x' * 1000)
+        url = self.driver.get_url('foo', 'bar')
+        result = self.driver.download(url, block_size=100)
+        self.assertEqual(result['size'], 1000)
+
+    def test_download_object(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=b'x' * 1000)
+        result = self.driver.download_object('foo', 'bar')
+        self.assertEqual(result['size'], 1000)
+
+    def test_not_found(self):
+        with self.assertRaises(errors.DriverObjectUnfoundError):
+            self.driver.download(self.driver.get_url('foo', 'bar'))
+
+
+class RamCopyObjectTest(BaseRamTest):
+    def test_func(self):
+        self.driver.create_bucket('dst')
+        self.driver.upload(bucket_id='foo', name='bar', content=b'data')
+        self.driver.copy_object('foo', 'bar', 'dst', 'baz')
+        self.assertIs(self.driver.buckets['dst']['baz'], self.driver.buckets['foo']['bar'])
+
+
+class RamDeleteObjectsTest(BaseRamTest):
+    def test_func(self):
+        for i in range(3):
+            self.driver.upload(bucket_id='foo', name='obj%s' % i, content=b'')
+        self.driver.delete_objects('foo', ['obj0', 'obj1'])
+        self.assertEqual(self.driver.list_objects('foo'), ['obj2'])
+
+    def test_clean_bucket(self):
+        self.driver.upload(bucket_id='foo', name='bar', content=b'')
+        self.driver.clean_bucket(bucket_id='foo')
+        self.assertEqual(self.driver.list_buckets(), [])
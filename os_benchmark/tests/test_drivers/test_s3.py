@@ -140,10 +140,22 @@ class S3ListObjectsTest(BaseS3Test):
         objs = self.driver.list_objects(bucket_id=bucket_id)
         self.assertIsInstance(objs, list)
 
+    def test_paginated(self):
+        pages = [
+            {'Contents': [{'Key': 'obj%s' % i} for i in range(1000)],
+             'IsTruncated': True, 'NextContinuationToken': 'next'},
+            {'Contents': [{'Key': 'obj1000'}], 'IsTruncated': False},
+        ]
+        with Stubber(self.driver.s3.meta.client) as stubber:
+            stubber.add_response('list_objects_v2', pages[0], {'Bucket': 'foo'})
+            stubber.add_response('list_objects_v2', pages[1], {'Bucket': 'foo', 'ContinuationToken': 'next'})
+            objs = self.driver.list_objects(bucket_id='foo')
+        self.assertEqual(len(objs), 1001)
+
     @mock_s3
     def test_bucket_not_exist(self):
         with Stubber(self.driver.s3.meta.client) as stubber:
-            stubber.add_client_error('list_objects', 'NoSuchBucket')
+            stubber.add_client_error('list_objects_v2', 'NoSuchBucket')
             self.assertRaises(
                 errors.DriverBucketUnfoundError,
                 self.driver.list_objects,
@@ -202,6 +214,107 @@ class S3UploadObjectTest(BaseS3Test):
             )
 
 
+class S3TransferManagerTest(BaseS3Test):
+    def test_reuse(self):
+        with self.driver.transfer_manager(max_concurrency=2) as manager:
+            pass
+        with self.driver.transfer_manager(max_concurrency=2) as other:
+            self.assertIs(other, manager)
+        with self.driver.transfer_manager(max_concurrency=4) as other:
+            self.assertIsNot(other, manager)
+
+    def test_evicted(self):
+        with self.driver.transfer_manager(max_concurrency=1) as manager:
+            shutdown = mock.patch.object(manager, 'shutdown').start()
+            self.addCleanup(mock.patch.stopall)
+            # Not shut down while used
+            for i in range(2, s3.TRANSFER_MANAGERS_MAX + 2):
+                with self.driver.transfer_manager(max_concurrency=i):
+                    pass
+            shutdown.assert_not_called()
+        self.assertEqual(len(self.driver._transfer_managers), s3.TRANSFER_MANAGERS_MAX)
+        # Least recently used
+        with self.driver.transfer_manager(max_concurrency=100):
+            pass
+        shutdown.assert_called_once_with()
+        self.assertEqual(len(self.driver._transfer_managers), s3.TRANSFER_MANAGERS_MAX)
+
+    def test_release(self):
+        with self.driver.transfer_manager() as manager:
+            pass
+        with mock.patch.object(manager, 'shutdown') as shutdown:
+            self.driver.release()
+        shutdown.assert_called_once_with()
+        self.assertEqual(self.driver._transfer_managers, {})
+
+    @mock_s3
+    def test_upload_reuse(self):
+        self.driver.create_bucket('foo')
+        for name in ('bar', 'ham'):
+            self.driver.upload(bucket_id='foo', name=name, content=BytesIO(b'a'))
+        self.assertEqual(len(self.driver._transfer_managers), 1)
+        self.assertEqual(sorted(self.driver.list_objects('foo')), ['bar', 'ham'])
+
+    @mock_s3
+    def test_upload_no_reuse(self):
+        self.driver = s3.Driver(transfer_manager_reuse=False)
+        self.assertNotIn('transfer_manager_reuse', self.driver.kwargs)
+        self.driver.create_bucket('foo')
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(b'a'))
+        self.assertEqual(self.driver._transfer_managers, {})
+        self.assertEqual(self.driver.list_objects('foo'), ['bar'])
+
+
+class S3DownloadObjectTest(BaseS3Test):
+    def setUp(self):
+        super().setUp()
+        self.content = b'a' * 2**20
+
+    @mock_s3
+    def test_get_object(self):
+        self.driver.create_bucket('foo')
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(self.content))
+        result = self.driver.download_object(bucket_id='foo', name='bar', block_size=1024)
+        self.assertEqual(result['size'], len(self.content))
+        self.assertGreaterEqual(result['ttfb'], 0)
+
+    @mock_s3
+    def test_ranged(self):
+        self.driver.create_bucket('foo')
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(self.content))
+        result = self.driver.download_object(
+            bucket_id='foo',
+            name='bar',
+            ranged=True,
+            size=len(self.content),
+            multipart_threshold=2**18,
+            multipart_chunksize=2**18,
+            max_concurrency=4,
+        )
+        self.assertEqual(result['size'], len(self.content))
+
+    @mock_s3
+    def test_not_found(self):
+        self.driver.create_bucket('foo')
+        self.assertRaises(
+            errors.DriverObjectUnfoundError,
+            self.driver.download_object,
+            bucket_id='foo',
+            name='bar',
+        )
+
+    @mock_s3
+    def test_ranged_not_found(self):
+        self.driver.create_bucket('foo')
+        self.assertRaises(
+            errors.DriverObjectUnfoundError,
+            self.driver.download_object,
+            bucket_id='foo',
+            name='bar',
+            ranged=True,
+        )
+
+
 class S3DeleteObjectTest(BaseS3Test):
     @mock_s3
     def test_delete_object(self):
@@ -298,6 +411,12 @@ class S3GeneratePresignedUrlTest(BaseS3Test):
         # Test
         self.assertTrue(url.startswith('https://foo.s3.amazonaws.com/bar'))
 
+    @mock_s3
+    def test_cache(self):
+        url = self.driver.get_presigned_url(bucket_id='foo', name='bar')
+        self.assertIs(self.driver.get_presigned_url(bucket_id='foo', name='bar'), url)
+        self.assertIsNot(self.driver.get_presigned_url(bucket_id='foo', name='bar', expiration=7200), url)
+
 
 class S3GetEndpointUrlTest(BaseS3Test):
     def tearDown(self):
@@ -378,3 +497,41 @@ class S3GetUrlTest(BaseS3Test):
         )
         # Test
         self.assertTrue(url.startswith('https://foo.s3.amazonaws.com/bar'))
+
+
+class S3HeadObjectTest(BaseS3Test):
+    @mock_s3
+    def test_func(self):
+        self.driver.create_bucket('foo')
+        self.driver.upload(bucket_id='foo', name='bar', content=BytesIO(b'data'))
+        obj = self.driver.head_object(bucket_id='foo', name='bar')
+        self.assertEqual(obj['name'], 'bar')
+        self.assertEqual(obj['size'], 4)
+        self.assertTrue(obj['etag'])
+
+    @mock_s3
+    def test_not_found(self):
+        self.driver.create_bucket('foo')
+        with self.assertRaises(errors.DriverObjectUnfoundError):
+            self.driver.head_object(bucket_id='foo', name='bar')
+
+
+class S3GetAsyncDriverTest(TestCase):
+    def test_native(self):
+        from os_benchmark.drivers import aio
+        driver = s3.Driver(
+            endpoint_url='http://localhost:9000',
+            aws_access_key_id='ak',
+            aws_secret_access_key='sk',
+            region_name='eu-west-1',
+        )
+        async_driver = driver.get_async_driver()
+        self.assertIsInstance(async_driver, aio.S3AsyncDriver)
+        self.assertEqual(async_driver.endpoint_url, 'http://localhost:9000')
+        self.assertEqual(async_driver.access_key, 'ak')
+        self.assertEqual(async_driver.region_name, 'eu-west-1')
+
+    def test_threaded(self):
+        from os_benchmark.drivers import aio
+        async_driver = s3.Driver().get_async_driver(native=False)
+        self.assertIsInstance(async_driver, aio.ThreadedAsyncDriver)
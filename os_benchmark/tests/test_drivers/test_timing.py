@@ -0,0 +1,102 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock
+import boto3
+from os_benchmark.drivers import base, timing
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'a' * 1024
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpDriver(base.RequestsMixin, base.BaseDriver):
+    id = 'http'
+
+
+class PhaseTimingsTest(TestCase):
+    def test_get_values(self):
+        phase_timings = timing.PhaseTimings()
+        phase_timings.add({'dns': 1, 'ttfb': 2})
+        phase_timings.add({'dns': 3})
+        self.assertEqual(phase_timings.get_values('dns'), [1, 3])
+        self.assertEqual(phase_timings.get_values('ttfb'), [2])
+        self.assertEqual(phase_timings.get_last(), {'dns': 3})
+
+    def test_clear(self):
+        phase_timings = timing.PhaseTimings()
+        phase_timings.add({'dns': 1})
+        phase_timings.clear()
+        self.assertEqual(phase_timings.get_values('dns'), [])
+
+
+class RequestsMixinPhasesTest(TestCase):
+    def setUp(self):
+        # Kept-alive connections don't block the shutdown
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = 'http://localhost:%s/foo' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fallback_address(self):
+        getaddrinfo = socket.getaddrinfo
+        port = self.server.server_address[1]
+
+        def resolve(host, *args, **kwargs):
+            if host == 'localhost':
+                # No server on the first address
+                return [
+                    (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.2', port)),
+                    (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port)),
+                ]
+            return getaddrinfo(host, *args, **kwargs)
+
+        driver = HttpDriver(http_phases=True)
+        with mock.patch('socket.getaddrinfo', side_effect=resolve):
+            driver.download(self.url)
+        self.assertEqual(len(driver.phase_timings.records), 1)
+        self.assertGreater(driver.phase_timings.records[0]['connect'], 0)
+
+    def test_disabled(self):
+        driver = HttpDriver()
+        driver.download(self.url)
+        self.assertEqual(driver.phase_timings.records, [])
+
+    def test_download(self):
+        driver = HttpDriver(http_phases=True)
+        driver.download(self.url)
+        driver.download(self.url)
+        records = driver.phase_timings.records
+        self.assertEqual(len(records), 2)
+        for phase in timing.PHASES:
+            self.assertGreaterEqual(records[0][phase], 0)
+        self.assertGreater(records[0]['connect'], 0)
+        # Connection reused
+        self.assertEqual(records[1]['dns'], 0)
+        self.assertEqual(records[1]['connect'], 0)
+
+
+class InstallBotocoreTest(TestCase):
+    def test_func(self):
+        client = boto3.client('s3', region_name='us-east-1')
+        self.assertTrue(timing.install_botocore(client, timing.PhaseTimings()))
+        pool_class = client._endpoint.http_session._pool_classes_by_scheme['https']
+        self.assertTrue(issubclass(pool_class.ConnectionCls, timing.PhaseTimingMixin))
+
+    def test_unsupported(self):
+        client = mock.Mock(spec=[])
+        self.assertFalse(timing.install_botocore(client, timing.PhaseTimings()))
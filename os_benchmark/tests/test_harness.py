@@ -0,0 +1,75 @@
+"""
+Regression tests of the harness hot paths.
+
+Budgets are an order of magnitude above the measured cost. Wall-clock
+limits depend on the machine, they are only checked with ``OSB_PERF_TESTS``
+set, e.g. on a dedicated runner.
+"""
+import os
+from unittest import TestCase, skipUnless
+
+from os_benchmark.benchmarks import harness
+from os_benchmark.drivers import ram
+
+PERF_TESTS = bool(os.environ.get('OSB_PERF_TESTS'))
+
+# Seconds per call
+HOT_PATH_BUDGETS = {
+    'timeit': 20e-6,
+    'name_generator': 100e-6,
+    'random_content': 50e-6,
+    'measure_download_100_chunks': 500e-6,
+    'aggregate': 2e-3,
+}
+# Seconds per dispatched operation
+ENGINE_BUDGETS = {
+    'threads': 500e-6,
+    'asyncio': 500e-6,
+}
+
+
+class HotPathTest(TestCase):
+    def test_hot_paths(self):
+        self.assertEqual(set(harness.get_hot_paths()), set(HOT_PATH_BUDGETS))
+
+    @skipUnless(PERF_TESTS, "OSB_PERF_TESTS not set")
+    def test_budgets(self):
+        for name, func in harness.get_hot_paths().items():
+            with self.subTest(name=name):
+                elapsed = harness.measure_hot_path(func, number=100)
+                self.assertLess(elapsed, HOT_PATH_BUDGETS[name])
+
+
+class EngineTest(TestCase):
+    @skipUnless(PERF_TESTS, "OSB_PERF_TESTS not set")
+    def test_budgets(self):
+        for engine, budget in ENGINE_BUDGETS.items():
+            with self.subTest(engine=engine):
+                elapsed = harness.measure_engine(engine, op_number=1000, workers=4)
+                self.assertLess(elapsed / 1000, budget)
+
+    def test_processes(self):
+        self.assertGreater(harness.measure_engine('processes', op_number=10, workers=2), 0)
+
+
+class HarnessBenchmarkTest(TestCase):
+    def test_func(self):
+        bench = harness.Benchmark(ram.Driver())
+        bench.set_params(
+            op_number=20,
+            object_size=10,
+            parallel=2,
+            engines=('threads', 'asyncio'),
+            operations=harness.OPERATIONS,
+            hot_path_number=10,
+        )
+        bench.setup()
+        bench.run()
+        stats = bench.make_stats()
+        self.assertEqual(stats['driver'], 'ram')
+        for operation in harness.OPERATIONS:
+            key = operation.replace('-', '_')
+            self.assertEqual(stats['%s_errors' % key], 0)
+            self.assertGreater(stats['%s_rate' % key], 0)
+        self.assertIn('engine_asyncio_overhead_us', stats)
+        self.assertIn('hot_path_timeit_us', stats)
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import stat
+import tempfile
+from unittest import TestCase, mock
+from os_benchmark import manifest, prepare
+from os_benchmark.drivers import errors
+from os_benchmark.tests import utils
+
+
+class PrepareRunTest(TestCase):
+    def setUp(self):
+        self.driver = utils.InMemoryDriver()
+        self.driver.create_bucket('foo')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.tmpdir.name, 'manifest.jsonl')
+        env = mock.patch.dict(os.environ, {'OSB_CACHE_DIR': self.tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.parser = argparse.ArgumentParser()
+        prepare.make_parser_args(self.parser)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def parse(self, *args):
+        return self.parser.parse_args([
+            '--bucket-id', 'foo',
+            '--object-size', '1',
+            '--manifest', self.manifest,
+            '--parallel-objects', '2',
+        ] + list(args))
+
+    def test_manifest(self):
+        prepare.run(self.parse('--object-number', '5'), self.driver)
+        entries = manifest.read_manifest(self.manifest)
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(
+            sorted([e['name'] for e in entries]),
+            sorted(self.driver.list_objects('foo')),
+        )
+
+    def test_key_depth(self):
+        prepare.run(self.parse('--object-number', '2', '--key-depth', '2'), self.driver)
+        for name in self.driver.list_objects('foo'):
+            self.assertEqual(name.count('/'), 2)
+
+    def test_key_layout(self):
+        prepare.run(self.parse('--object-number', '3', '--key-layout', 'sequential'), self.driver)
+        names = [e['name'] for e in manifest.read_manifest(self.manifest)]
+        self.assertEqual(sorted(names), sorted(self.driver.list_objects('foo')))
+        self.assertEqual(len(set(n.split('-')[0] for n in names)), 1)
+
+    def test_resume(self):
+        prepare.run(self.parse('--object-number', '3'), self.driver)
+        entries = manifest.read_manifest(self.manifest)
+        # Simulate an object lost during interruption
+        del self.driver.objects['foo'][entries[0]['name']]
+
+        prepare.run(self.parse('--object-number', '5', '--resume'), self.driver)
+        names = self.driver.list_objects('foo')
+        self.assertEqual(len(names), 5)
+        self.assertIn(entries[0]['name'], names)
+        self.assertEqual(len(manifest.read_manifest(self.manifest)), 5)
+
+    def test_resume_fewer(self):
+        prepare.run(self.parse('--object-number', '5'), self.driver)
+        for name in list(self.driver.objects['foo']):
+            del self.driver.objects['foo'][name]
+
+        prepare.run(self.parse('--object-number', '2', '--resume'), self.driver)
+        self.assertEqual(len(self.driver.list_objects('foo')), 2)
+
+    def test_cache(self):
+        prepare.run(self.parse('--object-number', '2'), self.driver)
+        header, entries = manifest.read_cache(manifest.get_cache_path(self.driver, 'foo'))
+        self.assertEqual(header['bucket'], {'id': 'foo', 'name': 'foo'})
+        self.assertEqual(
+            sorted([e['name'] for e in entries]),
+            sorted(self.driver.list_objects('foo')),
+        )
+
+    def test_clean_removes_cache(self):
+        prepare.run(self.parse('--object-number', '2'), self.driver)
+        path = manifest.get_cache_path(self.driver, 'foo')
+        with mock.patch.object(manifest, 'remove_cache') as remove_cache:
+            prepare.run(self.parse('--object-number', '1', '--clean'), self.driver)
+        remove_cache.assert_called_once_with(path)
+
+    def test_errors(self):
+        upload = self.driver.upload
+        calls = []
+
+        def failing_upload(**kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise errors.DriverConnectionError('foo')
+            return upload(**kwargs)
+
+        with mock.patch.object(self.driver, 'upload', failing_upload):
+            prepare.run(self.parse('--object-number', '3'), self.driver)
+        self.assertEqual(len(self.driver.list_objects('foo')), 2)
+        self.assertEqual(len(manifest.read_manifest(self.manifest)), 2)
+
+    def test_unwrapped_errors(self):
+        upload = self.driver.upload
+        calls = []
+
+        def failing_upload(**kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError('foo')
+            return upload(**kwargs)
+
+        with mock.patch.object(self.driver, 'upload', failing_upload):
+            prepare.run(self.parse('--object-number', '3'), self.driver)
+        self.assertEqual(len(self.driver.list_objects('foo')), 2)
+        self.assertEqual(len(manifest.read_manifest(self.manifest)), 2)
+
+
+class ManifestCacheTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.driver = utils.InMemoryDriver()
+
+    def test_path(self):
+        path = manifest.get_cache_path(self.driver, 'foo', cache_dir=self.tmpdir.name)
+        self.assertTrue(path.startswith(self.tmpdir.name))
+        self.assertNotEqual(path, manifest.get_cache_path(self.driver, 'bar', cache_dir=self.tmpdir.name))
+
+    def test_read_write(self):
+        path = os.path.join(self.tmpdir.name, 'cache.jsonl')
+        manifest.write_cache(path, {'bucket': {'id': 'foo'}}, [{'name': 'bar', 'size': 1}])
+        header, entries = manifest.read_cache(path)
+        self.assertEqual(header['bucket'], {'id': 'foo'})
+        self.assertEqual(entries, [{'name': 'bar', 'size': 1}])
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_created_kept(self):
+        path = os.path.join(self.tmpdir.name, 'cache.jsonl')
+        manifest.write_cache(path, {'created': 1}, [])
+        with open(path) as fd:
+            self.assertEqual(json.loads(fd.readline())['created'], 1)
+
+    def test_expired(self):
+        path = os.path.join(self.tmpdir.name, 'cache.jsonl')
+        manifest.write_cache(path, {}, [{'name': 'bar', 'size': 1}])
+        self.assertEqual(manifest.read_cache(path, max_age=-1), (None, []))
+
+    def test_not_found(self):
+        self.assertEqual(manifest.read_cache('/nonexistent/cache.jsonl'), (None, []))
+
+
+class ReadManifestTest(TestCase):
+    def test_truncated(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as fd:
+            fd.write('{"name": "foo", "size": 1}\n{"name": "ba')
+            fd.flush()
+            self.assertEqual(manifest.read_manifest(fd.name), [{'name': 'foo', 'size': 1}])
+
+    def test_not_found(self):
+        self.assertEqual(manifest.read_manifest('/nonexistent/manifest.jsonl'), [])
@@ -76,6 +76,68 @@ class GetRandomNameTest(TestCase):
     def test_func(self):
         name = utils.get_random_name(20)
         self.assertEqual(len(name), 20)
+        self.assertRegex(name, r'^[a-z][a-z2-7]+$')
+
+    def test_prefix_suffix(self):
+        name = utils.get_random_name(10, prefix='foo', suffix='bar')
+        self.assertRegex(name, r'^foo[a-z2-7]{4}bar$')
+
+
+class NameGeneratorTest(TestCase):
+    def test_random(self):
+        name_generator = utils.NameGenerator(size=20, prefix='foo/')
+        name = name_generator()
+        self.assertEqual(len(name), 20)
+        self.assertTrue(name.startswith('foo/'))
+        self.assertNotEqual(name, name_generator())
+
+    def test_sequential(self):
+        name_generator = utils.NameGenerator('sequential')
+        names = [name_generator() for i in range(20)]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(set(names)), 20)
+
+    def test_hashed(self):
+        name_generator = utils.NameGenerator('hashed', prefix='foo/')
+        names = [name_generator() for i in range(20)]
+        self.assertTrue(all(n.startswith('foo/') for n in names))
+        self.assertNotEqual(names, sorted(names))
+        self.assertGreater(len(set(n[4:8] for n in names)), 1)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(errors.ConfigurationError):
+            utils.NameGenerator('foo')
+
+
+class GetTreeNameTest(TestCase):
+    def test_func(self):
+        name = utils.get_tree_name('foo', 2)
+        self.assertRegex(name, r'^[0-9a-f]{2}/[0-9a-f]{2}/foo$')
+        self.assertEqual(utils.get_tree_name('foo', 2), name)
+
+    def test_no_depth(self):
+        self.assertEqual(utils.get_tree_name('foo', 0), 'foo')
+
+
+class KeyLayoutTest(TestCase):
+    def test_layouts(self):
+        patterns = {
+            'random': r'^foo/[a-z2-7]{30}$',
+            'sequential': r'^foo/[a-z2-7]{8}-\d{10}$',
+            'hashed-prefix': r'^foo/[0-9a-f]{4}-[a-z2-7]{8}-\d{10}$',
+            'date-partitioned': r'^foo/\d{4}/\d{2}/\d{2}/\d{2}/[a-z2-7]{8}-\d{10}$',
+            'deep-tree:2': r'^foo/[0-9a-f]{2}/[0-9a-f]{2}/[a-z2-7]{30}$',
+        }
+        for layout, pattern in patterns.items():
+            with self.subTest(layout=layout):
+                key_layout = utils.KeyLayout(layout, prefix='foo/')
+                self.assertRegex(key_layout(), pattern)
+
+    def test_invalid(self):
+        for layout in ('foo', 'deep-tree', 'deep-tree:0', 'random:2'):
+            with self.subTest(layout=layout):
+                with self.assertRaises(errors.ConfigurationError):
+                    utils.KeyLayout(layout)
 
 
 class GetRandomContentTest(TestCase):
@@ -100,3 +162,25 @@ class TimeItTest(TestCase):
         elapsed, _ = utils.timeit(func)
         self.assertGreater(elapsed, 1)
         self.assertLess(elapsed, 1.1)
+
+
+class ClockTest(TestCase):
+    def test_to_wall_ns(self):
+        clock = utils.Clock()
+        wall_ns = clock.to_wall_ns(time.perf_counter_ns())
+        self.assertIsInstance(wall_ns, int)
+        self.assertLess(abs(wall_ns - time.time_ns()), 10**8)
+
+
+class TimeOperationTest(TestCase):
+    def test_func(self):
+        timestamps, output = utils.time_operation(lambda x: x, 'foo')
+        self.assertEqual(output, 'foo')
+        self.assertIsInstance(timestamps.start, int)
+        self.assertGreaterEqual(timestamps.end, timestamps.start)
+        self.assertIsNone(timestamps.first_byte)
+        self.assertIsInstance(timestamps.elapsed, float)
+
+    def test_first_byte(self):
+        timestamps, _ = utils.time_operation(lambda: {'ttfb': .5})
+        self.assertEqual(timestamps.first_byte - timestamps.start, 5 * 10**8)
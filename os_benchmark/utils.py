@@ -1,18 +1,34 @@
 import os
+import argparse
+import base64
+import collections
+import hashlib
+import itertools
 import logging
+import string
 import time
 import math
 import statistics
 
-import yaml
-from faker import Faker
-import randomio
 
 from os_benchmark import errors
 from os_benchmark.drivers import utils as driver_utils
 
 logger = logging.getLogger('osb.utils')
-faker = Faker()
+
+NAME_MODES = ('random', 'sequential', 'hashed', 'faker')
+RUN_ID_SIZE = 8
+HASH_PREFIX_SIZE = 4
+KEY_LAYOUTS = ('random', 'sequential', 'hashed-prefix', 'date-partitioned', 'deep-tree:N')
+KEY_LAYOUT_NAME_MODES = {
+    'random': 'random',
+    'sequential': 'sequential',
+    'hashed-prefix': 'hashed',
+    'date-partitioned': 'sequential',
+    'deep-tree': 'random',
+}
+
+_faker = None
 
 
 def get_config_file(config_file=None):
@@ -26,6 +42,7 @@ def get_config_file(config_file=None):
     else:
         files = ['~/.osb.yml', '/etc/osb.yml']
 
+    import yaml
     configs = None
     for filename in files:
         filename = os.path.expanduser(filename)
@@ -75,10 +92,38 @@ def get_driver(config):
     return driver
 
 
+def _get_random_chars(size):
+    """Random lowercase base32 characters, the first one being a letter"""
+    data = os.urandom((size * 5 + 7) // 8 + 1)
+    chars = base64.b32encode(data[1:]).decode().lower()
+    return string.ascii_lowercase[data[0] % 26] + chars[:size-1]
+
+
 def get_random_name(size=30, prefix=None, suffix=None):
     """
     Creates a random name with static prefix or suffix.
     """
+    name = _get_random_chars(size)
+    if prefix:
+        name = prefix + name[len(prefix):size]
+    if suffix:
+        name = name[:size-len(suffix)] + suffix
+    return name[:size]
+
+
+def get_fake_name(size=30, prefix=None, suffix=None):
+    """
+    Creates a human readable name like :func:`get_random_name`, requires
+    Faker.
+    """
+    global _faker
+    if _faker is None:
+        try:
+            from faker import Faker
+        except ImportError:
+            raise errors.ConfigurationError("Faker is required for human readable names")
+        _faker = Faker()
+    faker = _faker
     name = faker.user_name()
     while len(name) < size:
         name += faker.user_name()
@@ -89,29 +134,196 @@ def get_random_name(size=30, prefix=None, suffix=None):
     return name[:size]
 
 
+class NameGenerator:
+    """
+    Object names generator of a run.
+
+    ``random`` names are independent, ``sequential`` ones are a random run
+    identifier followed by a counter, sorting keys in creation order, and
+    ``hashed`` ones put the hash of sequential names after the prefix to
+    spread them over the key space. ``faker`` makes human readable names.
+    """
+    def __init__(self, mode='random', size=30, prefix=None):
+        if mode not in NAME_MODES:
+            raise errors.ConfigurationError("Unknown name mode '%s'" % mode)
+        self.mode = mode
+        self.size = size
+        self.prefix = prefix or ''
+        self.run_id = _get_random_chars(RUN_ID_SIZE)
+        # next() on a count is atomic, generators are shared by threads
+        self._counter = itertools.count()
+
+    def __call__(self):
+        if self.mode == 'random':
+            return get_random_name(self.size, prefix=self.prefix)
+        if self.mode == 'faker':
+            return get_fake_name(self.size, prefix=self.prefix)
+        name = '%s-%010d' % (self.run_id, next(self._counter))
+        if self.mode == 'hashed':
+            digest = hashlib.md5(name.encode()).hexdigest()
+            name = '%s-%s' % (digest[:HASH_PREFIX_SIZE], name)
+        return self.prefix + name
+
+
+def get_tree_name(name, depth, width=2):
+    """
+    Put a name under ``depth`` levels of directories derived from its
+    hash, spreading objects evenly across prefixes.
+    """
+    if not depth:
+        return name
+    digest = hashlib.md5(name.encode()).hexdigest()
+    levels = [digest[i*width:(i+1)*width] for i in range(depth)]
+    return '/'.join(levels + [name])
+
+
+def parse_key_layout(value):
+    """
+    Parse a key layout as ``name`` or ``deep-tree:N``.
+
+    :returns: Layout name and tree depth
+    :rtype: tuple
+    """
+    name, _, depth = value.partition(':')
+    if name not in KEY_LAYOUT_NAME_MODES:
+        raise ValueError("Unknown key layout '%s', choose from %s" % (value, ', '.join(KEY_LAYOUTS)))
+    if name != 'deep-tree':
+        if depth:
+            raise ValueError("Key layout '%s' has no depth" % name)
+        return name, 0
+    try:
+        depth = int(depth)
+    except ValueError:
+        raise ValueError("Key layout deep-tree requires a depth as deep-tree:N")
+    if depth < 1:
+        raise ValueError("Key layout depth must be positive")
+    return name, depth
+
+
+def key_layout_type(value):
+    """Argparse type validating a key layout"""
+    try:
+        parse_key_layout(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
+    return value
+
+
+class KeyLayout:
+    """
+    Object keys generator distributing names over the key space:
+
+    - ``random``: random names
+    - ``sequential``: names sorted by creation, hotspotting a partition
+    - ``hashed-prefix``: sequential names behind a hash
+    - ``date-partitioned``: sequential names under ``YYYY/MM/DD/HH/``
+    - ``deep-tree:N``: random names under N levels of hashed directories
+    """
+    def __init__(self, layout='random', prefix=None, size=30):
+        try:
+            self.name, self.depth = parse_key_layout(layout)
+        except ValueError as err:
+            raise errors.ConfigurationError(str(err))
+        self.layout = layout
+        self.prefix = prefix or ''
+        self.name_generator = NameGenerator(KEY_LAYOUT_NAME_MODES[self.name], size=size)
+
+    def __call__(self):
+        name = self.name_generator()
+        if self.name == 'date-partitioned':
+            name = time.strftime('%Y/%m/%d/%H/', time.gmtime()) + name
+        elif self.name == 'deep-tree':
+            name = get_tree_name(name, self.depth)
+        return self.prefix + name
+
+
 def get_random_content(size):
     """Creates a random fileobj"""
+    # randomio loads Faker at import
+    import randomio
     return randomio.FileGenerator(size)
 
 
 def timeit(func, *args, **kwargs):
-    """Time a function"""
-    start = time.time()
+    """
+    Time a function with the monotonic high-resolution clock.
+
+    :returns: Elapsed time in seconds and function output
+    :rtype: tuple
+    """
+    start = time.perf_counter_ns()
     output = func(*args, **kwargs)
-    end = time.time()
-    elapsed = end - start
+    elapsed = (time.perf_counter_ns() - start) / 10**9
     return elapsed, output
 
 
 async def async_timeit(func, *args, **kwargs):
-    """Time a function"""
-    start = time.time()
+    """Time a coroutine function like :func:`timeit`"""
+    start = time.perf_counter_ns()
     output = await func(*args, **kwargs)
-    end = time.time()
-    elapsed = end - start
+    elapsed = (time.perf_counter_ns() - start) / 10**9
     return elapsed, output
 
 
+class Clock:
+    """
+    Anchor of the monotonic clock on the wall clock, taken once, to date
+    monotonic measurements without being affected by wall clock jumps.
+    """
+    def __init__(self):
+        self.wall_ns = time.time_ns()
+        self.perf_ns = time.perf_counter_ns()
+
+    def to_wall_ns(self, perf_ns):
+        """Convert a :func:`time.perf_counter_ns` value to epoch nanoseconds"""
+        return self.wall_ns + perf_ns - self.perf_ns
+
+    def time(self):
+        """Current epoch time in seconds, monotonic since the anchor"""
+        return self.to_wall_ns(time.perf_counter_ns()) / 10**9
+
+
+class Timestamps(collections.namedtuple('Timestamps', ('start', 'first_byte', 'end'))):
+    """
+    :func:`time.perf_counter_ns` values of an operation, ``first_byte`` is
+    ``None`` if the operation doesn't return a stream measurement.
+    """
+    __slots__ = ()
+
+    @property
+    def elapsed(self):
+        """Elapsed time in seconds"""
+        return (self.end - self.start) / 10**9
+
+    @classmethod
+    def from_output(cls, start, end, output):
+        first_byte = None
+        if isinstance(output, dict) and output.get('ttfb') is not None:
+            first_byte = start + int(output['ttfb'] * 10**9)
+        return cls(start, first_byte, end)
+
+
+def time_operation(func, *args, **kwargs):
+    """
+    Time a function like :func:`timeit`, keeping its timestamps.
+
+    :returns: :class:`Timestamps` and function output
+    :rtype: tuple
+    """
+    start = time.perf_counter_ns()
+    output = func(*args, **kwargs)
+    end = time.perf_counter_ns()
+    return Timestamps.from_output(start, end, output), output
+
+
+async def async_time_operation(func, *args, **kwargs):
+    """Time a coroutine function like :func:`time_operation`"""
+    start = time.perf_counter_ns()
+    output = await func(*args, **kwargs)
+    end = time.perf_counter_ns()
+    return Timestamps.from_output(start, end, output), output
+
+
 def percentile(values, percent):
     if not values:
         return